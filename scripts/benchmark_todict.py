@@ -0,0 +1,118 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+""" Compares the conversion of a 'resource list' result to dictionaries, with the resource group
+added to every resource, against the previous implementation (todict, then a second pass of the
+resource group transform).
+
+    python scripts/benchmark_todict.py [--count 20000] [--repeat 3]
+"""
+
+from __future__ import print_function
+
+import argparse
+from datetime import datetime, timedelta
+from enum import Enum
+import re
+import timeit
+
+from azure.mgmt.resource.resources.models import GenericResource, Plan, Sku, Identity
+
+from azure.cli.core._util import todict
+from azure.cli.core.extensions.transform import add_resource_group
+
+
+def _previous_todict(obj):  # pylint: disable=too-many-return-statements
+    if isinstance(obj, dict):
+        return {k: _previous_todict(v) for (k, v) in obj.items()}
+    elif isinstance(obj, list):
+        return [_previous_todict(a) for a in obj]
+    elif isinstance(obj, Enum):
+        return obj.value
+    elif isinstance(obj, datetime):
+        return obj.isoformat()
+    elif isinstance(obj, timedelta):
+        return str(obj)
+    elif hasattr(obj, '_asdict'):
+        return _previous_todict(obj._asdict())
+    elif hasattr(obj, '__dict__'):
+        return dict([(re.sub('(?!^)_([a-zA-Z])', lambda x: x.group(1).upper(), k),
+                      _previous_todict(v))
+                     for k, v in obj.__dict__.items()
+                     if not callable(v) and not k.startswith('_')])
+    return obj
+
+
+def _previous_parse_id(strid):
+    parsed = {}
+    parts = re.split('/', strid)
+    if parts[3] != 'resourceGroups':
+        raise KeyError()
+
+    parsed['resource-group'] = parts[4]
+    parsed['name'] = parts[8]
+    return parsed
+
+
+def _previous_add_resource_group(obj):
+    if isinstance(obj, list):
+        for array_item in obj:
+            _previous_add_resource_group(array_item)
+    elif isinstance(obj, dict):
+        try:
+            if 'resourceGroup' not in obj:
+                if obj['id']:
+                    obj['resourceGroup'] = _previous_parse_id(obj['id'])['resource-group']
+        except (KeyError, IndexError, TypeError):
+            pass
+        for item_key in obj:
+            _previous_add_resource_group(obj[item_key])
+
+
+def _previous(resources):
+    result = _previous_todict(resources)
+    _previous_add_resource_group(result)
+    return result
+
+
+def _current(resources):
+    return todict(resources, add_resource_group)
+
+
+def _get_resources(count):
+    resources = []
+    for i in range(count):
+        resource = GenericResource(
+            location='westus', tags={'env': 'test', 'index': str(i)},
+            plan=Plan(name='plan', publisher='publisher', product='product'),
+            properties={'provisioningState': 'Succeeded', 'nested': {'values': [1, 2, 3]}},
+            kind='kind', managed_by=None, sku=Sku(name='Standard_LRS', tier='Standard'),
+            identity=Identity())
+        resource.id = '/subscriptions/00000000-0000-0000-0000-000000000000/resourceGroups/' \
+                      'rg{}/providers/Microsoft.Storage/storageAccounts/sa{}'.format(i % 50, i)
+        resource.name = 'sa{}'.format(i)
+        resource.type = 'Microsoft.Storage/storageAccounts'
+        resources.append(resource)
+    return resources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1].strip())
+    parser.add_argument('--count', type=int, default=20000, help='number of resources')
+    parser.add_argument('--repeat', type=int, default=3, help='best of the given number of runs')
+    args = parser.parse_args()
+
+    resources = _get_resources(args.count)
+    if _current(resources) != _previous(resources):
+        raise AssertionError('The results of the implementations differ.')
+    previous = min(timeit.repeat(lambda: _previous(resources), number=1, repeat=args.repeat))
+    current = min(timeit.repeat(lambda: _current(resources), number=1, repeat=args.repeat))
+    print('{} resources'.format(args.count))
+    print('previous: {:.3f}s'.format(previous))
+    print('current:  {:.3f}s ({:.1f}x)'.format(current, previous / current))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Keep-alive connections shared by the management clients of a process.
+
+msrest asks the credentials for a new requests session for every request, mounts new adapters
+on it and closes it once the response is read, which also closes its connections. The adapters
+mounted on sessions from `get_pooled_session` use a connection pool shared by the process
+instead, which outlives the sessions. Its size per host is set with the 'connection_pool_size'
+option in the 'core' section of the configuration (AZURE_CORE_CONNECTION_POOL_SIZE); 0 turns
+the pool off.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter, PoolManager
+
+from azure.cli.core._config import az_config
+
+DEFAULT_POOL_SIZE = 10
+# Number of hosts whose connections are kept
+_POOL_HOSTS = 10
+
+_pool_manager = None
+_pool_manager_lock = threading.Lock()
+
+
+class _SharedPoolManager(PoolManager):
+
+    def clear(self):
+        # Called when a session closes its adapters; the connections stay for the next session
+        pass
+
+    def close(self):
+        super(_SharedPoolManager, self).clear()
+
+
+def get_pool_size():
+    return az_config.getint('core', 'connection_pool_size', fallback=DEFAULT_POOL_SIZE)
+
+
+def _get_pool_manager():
+    global _pool_manager  # pylint: disable=global-statement
+    with _pool_manager_lock:
+        if _pool_manager is None:
+            _pool_manager = _SharedPoolManager(num_pools=_POOL_HOSTS, maxsize=get_pool_size())
+        return _pool_manager
+
+
+class PooledSession(requests.Session):
+    """ A session whose HTTP adapters send requests over the shared connection pool """
+
+    def mount(self, prefix, adapter):
+        if isinstance(adapter, HTTPAdapter) and \
+                not isinstance(adapter.poolmanager, _SharedPoolManager):
+            adapter.poolmanager.clear()
+            adapter.poolmanager = _get_pool_manager()
+        super(PooledSession, self).mount(prefix, adapter)
+
+
+def get_pooled_session():
+    return PooledSession() if get_pool_size() > 0 else requests.Session()
+
+
+def close_connection_pool():
+    """ Close the shared connections. The next request opens a new pool. """
+    global _pool_manager  # pylint: disable=global-statement
+    with _pool_manager_lock:
+        if _pool_manager is not None:
+            _pool_manager.close()
+            _pool_manager = None
@@ -0,0 +1,332 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Warm daemon for the az entry point.
+
+The daemon imports the CLI and loads the full command table once, then listens on a Unix socket
+in the config directory. The client sends argv, environment and working directory together with
+its stdin/stdout/stderr file descriptors, so output is written straight to the caller's streams.
+Each request runs in a child forked from the warm daemon, which isolates the application session,
+environment and global state of concurrent requests. Only the exit code is sent back.
+
+This module only imports the standard library at module level as the client runs before the
+rest of the CLI is imported.
+"""
+
+import array
+import atexit
+import errno
+import io
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+
+from azure.cli.core import __version__ as core_version
+from azure.cli.core._environment import get_config_dir
+
+DAEMON_COMMAND = 'daemon'
+DAEMON_SOCKET_NAME = 'daemon.sock'
+DAEMON_PID_NAME = 'daemon.pid'
+DAEMON_LOG_NAME = 'daemon.log'
+
+_ARGCOMPLETE_ENV_NAME = '_ARGCOMPLETE'
+_FORWARDED_FDS = (0, 1, 2)
+_REQUEST_LENGTH = struct.Struct('!I')
+# (request accepted, exit code)
+_RESPONSE = struct.Struct('!?i')
+
+
+def is_daemon_supported():
+    return hasattr(socket, 'AF_UNIX') and hasattr(socket.socket, 'sendmsg') and hasattr(os, 'fork')
+
+
+def get_daemon_socket_path():
+    return os.path.join(get_config_dir(), DAEMON_SOCKET_NAME)
+
+
+def _get_daemon_pid_path():
+    return os.path.join(get_config_dir(), DAEMON_PID_NAME)
+
+
+def _recv_exact(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError('Connection closed by the peer.')
+        data += chunk
+    return data
+
+
+def _send_request(sock, request, fds):
+    payload = json.dumps(request).encode('utf-8')
+    data = _REQUEST_LENGTH.pack(len(payload)) + payload
+    sent = sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+    sock.sendall(data[sent:])
+
+
+def _recv_request(sock):
+    fds = array.array('i')
+    data, ancdata, _, _ = sock.recvmsg(_REQUEST_LENGTH.size,
+                                       socket.CMSG_LEN(len(_FORWARDED_FDS) * fds.itemsize))
+    for level, kind, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(cmsg_data[:len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+    data += _recv_exact(sock, _REQUEST_LENGTH.size - len(data))
+    length = _REQUEST_LENGTH.unpack(data)[0]
+    return json.loads(_recv_exact(sock, length).decode('utf-8')), list(fds)
+
+
+def run_in_daemon(argv, socket_path=None, fds=None):
+    """ Run the command in the daemon if one is listening. Returns the exit code of the command,
+    or None when the command should run in this process instead. """
+    if not is_daemon_supported() or os.environ.get(_ARGCOMPLETE_ENV_NAME) or \
+            (argv and argv[0] == DAEMON_COMMAND):
+        return None
+    socket_path = socket_path or get_daemon_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socket_path)
+            sys.stdout.flush()
+            sys.stderr.flush()
+            _send_request(sock, {'version': core_version,
+                                 'argv': argv,
+                                 'env': dict(os.environ),
+                                 'cwd': os.getcwd()}, fds or _FORWARDED_FDS)
+        except (socket.error, OSError):
+            # No daemon listening (e.g. a stale socket), so the command did not start.
+            return None
+        try:
+            accepted, exit_code = _RESPONSE.unpack(_recv_exact(sock, _RESPONSE.size))
+        except (socket.error, OSError, EOFError):
+            sys.stderr.write('The az daemon terminated unexpectedly while running the command.\n')
+            return 1
+        return exit_code if accepted else None
+    finally:
+        sock.close()
+
+
+def _execute_command(argv):
+    """ Runs a command in a request process the same way the az entry point does """
+    import azure.cli.main
+    import azure.cli.core.telemetry as telemetry
+    from azure.cli.core.application import APPLICATION
+    from azure.cli.core._config import AzConfig, az_config, GLOBAL_CONFIG_PATH
+
+    APPLICATION.reset_session()
+    # pick up changes made to the configuration since the daemon started
+    az_config.config_parser = AzConfig().config_parser
+    az_config.config_parser.read([GLOBAL_CONFIG_PATH])
+    try:
+        telemetry.start()
+        exit_code = azure.cli.main.main(argv, file=sys.stdout)
+        if exit_code and exit_code != 0:
+            telemetry.set_failure()
+        else:
+            telemetry.set_success()
+        return exit_code or 0
+    except SystemExit as ex:
+        return ex.code if isinstance(ex.code, int) else (0 if ex.code is None else 1)
+    except KeyboardInterrupt:
+        telemetry.set_user_fault('keyboard interrupt')
+        return 1
+    finally:
+        telemetry.conclude()
+
+
+def _watch_client(conn, finished):
+    """ Interrupts the request when the client goes away, e.g. after Ctrl+C """
+    try:
+        conn.recv(1)
+    except (socket.error, OSError):
+        pass
+    if not finished.is_set():
+        os.kill(os.getpid(), signal.SIGINT)
+
+
+def _handle_request(conn, handler):
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    request, fds = _recv_request(conn)
+    if request.get('version') != core_version or len(fds) != len(_FORWARDED_FDS):
+        for fd in fds:
+            os.close(fd)
+        conn.sendall(_RESPONSE.pack(False, 0))
+        return
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for target_fd, fd in zip(_FORWARDED_FDS, fds):
+        os.dup2(fd, target_fd)
+        os.close(fd)
+    # new stream objects pick up the buffering and tty state of the client's streams
+    sys.stdin = io.open(0, 'r', closefd=False)
+    sys.stdout = io.open(1, 'w', closefd=False)
+    sys.stderr = io.open(2, 'w', buffering=1, closefd=False)
+    os.environ.clear()
+    os.environ.update(request['env'])
+    os.chdir(request['cwd'])
+
+    finished = threading.Event()
+    watcher = threading.Thread(target=_watch_client, args=(conn, finished))
+    watcher.daemon = True
+    watcher.start()
+    try:
+        exit_code = handler(request['argv'])
+    except KeyboardInterrupt:
+        exit_code = 1
+    finished.set()
+    # the request process ends with os._exit, which skips the exit handlers saving the caches of
+    # the CLI, so they run before the client gets the exit code
+    try:
+        atexit._run_exitfuncs()  # pylint: disable=protected-access
+    except Exception:  # pylint: disable=broad-except
+        pass
+    sys.stdout.flush()
+    sys.stderr.flush()
+    conn.sendall(_RESPONSE.pack(True, exit_code or 0))
+
+
+def _warm_up():
+    """ Import the CLI and load every command module once so request processes start warm """
+    import azure.cli.main  # pylint: disable=unused-variable
+    import azure.cli.core.commands as commands
+    import azure.cli.core._profile  # pylint: disable=unused-variable
+    import azure.cli.core.commands.client_factory  # pylint: disable=unused-variable
+    commands.get_command_table()
+
+
+def _get_peer_uid(conn):
+    """ The user id of the process connected to the daemon, or None if the platform can't tell """
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = struct.Struct('3i')
+    _, uid, _ = creds.unpack(conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, creds.size))
+    return uid
+
+
+def _raise_system_exit(*_):
+    raise SystemExit(0)
+
+
+def serve(socket_path=None, handler=None, warm_up=True):
+    """ Listen for az requests on `socket_path` until the daemon is terminated """
+    socket_path = socket_path or get_daemon_socket_path()
+    handler = handler or _execute_command
+    if warm_up:
+        _warm_up()
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        os.remove(socket_path)
+    except OSError:
+        pass
+    # the socket is created accessible only to the user, as requests run with their credentials
+    umask = os.umask(0o077)
+    try:
+        listener.bind(socket_path)
+    finally:
+        os.umask(umask)
+    os.chmod(socket_path, 0o600)
+    listener.listen(32)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+    try:
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except (socket.error, OSError) as ex:
+                if getattr(ex, 'errno', None) == errno.EINTR:
+                    continue
+                raise
+            peer_uid = _get_peer_uid(conn)
+            if peer_uid is not None and peer_uid != os.getuid():
+                conn.close()
+                continue
+            if os.fork() == 0:
+                exit_code = 0
+                try:
+                    listener.close()
+                    _handle_request(conn, handler)
+                except BaseException:  # pylint: disable=broad-except
+                    exit_code = 1
+                finally:
+                    os._exit(exit_code)  # pylint: disable=protected-access
+            conn.close()
+    finally:
+        listener.close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+
+
+def get_daemon_pid():
+    """ Returns the process id of the running daemon or None """
+    try:
+        with open(_get_daemon_pid_path()) as f:
+            pid = int(f.read().strip())
+        os.kill(pid, 0)
+        return pid
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def start_daemon(timeout=120):
+    """ Start the daemon in the background and wait until it accepts requests """
+    import subprocess
+    pid = get_daemon_pid()
+    if pid:
+        return pid
+    socket_path = get_daemon_socket_path()
+    log_path = os.path.join(get_config_dir(), DAEMON_LOG_NAME)
+    with open(os.devnull, 'r') as devnull, open(log_path, 'a') as log:
+        process = subprocess.Popen([sys.executable, '-m', 'azure.cli.core._daemon'],
+                                   stdin=devnull, stdout=log, stderr=log, close_fds=True,
+                                   preexec_fn=os.setsid)
+    with open(_get_daemon_pid_path(), 'w') as f:
+        f.write(str(process.pid))
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The az daemon exited with code {}. See '{}'.".format(
+                process.returncode, log_path))
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+            return process.pid
+        except (socket.error, OSError):
+            time.sleep(0.2)
+        finally:
+            sock.close()
+    raise RuntimeError("The az daemon did not start within {} seconds. See '{}'.".format(
+        timeout, log_path))
+
+
+def stop_daemon(timeout=10):
+    """ Terminate the daemon. Returns False if it was not running. """
+    pid = get_daemon_pid()
+    if pid:
+        os.kill(pid, signal.SIGTERM)
+        deadline = time.time() + timeout
+        while time.time() < deadline and get_daemon_pid():
+            time.sleep(0.1)
+    try:
+        os.remove(_get_daemon_pid_path())
+    except OSError:
+        pass
+    return bool(pid)
+
+
+if __name__ == '__main__':
+    serve()
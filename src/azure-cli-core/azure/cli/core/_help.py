@@ -8,7 +8,7 @@ import argparse
 import sys
 import textwrap
 
-from azure.cli.core.help_files import _load_help_file
+from azure.cli.core.help_files import _load_help_file, _parse_help_text
 
 __all__ = ['print_detailed_help', 'print_welcome_message', 'GroupHelpFile', 'CommandHelpFile']
 
@@ -431,9 +431,8 @@ def _normalize_text(s):
 
 
 def _load_help_file_from_string(text):
-    import yaml
     try:
-        return yaml.load(text) if text else None
+        return _parse_help_text(text) if text else None
     except Exception:  # pylint: disable=broad-except
         return text
 
@@ -43,6 +43,37 @@ def format_json(obj):
                       separators=(',', ': ')) + '\n'
 
 
+def stream_json(obj):
+    """ Yields the JSON of a streamed result as `format_json` formats the list of its items """
+    separator = '\n'
+    yield '['
+    for item in obj.result:
+        text = json.dumps(item, indent=2, sort_keys=True, cls=ComplexEncoder,
+                          separators=(',', ': '))
+        yield separator + '  ' + text.replace('\n', '\n  ')
+        separator = ',\n'
+    yield ']\n' if separator == '\n' else '\n]\n'
+
+
+def _dumps_jsonl(item):
+    return json.dumps(item, cls=ComplexEncoder, separators=(',', ':')) + '\n'
+
+
+def format_jsonl(obj):
+    return ''.join(stream_jsonl(obj))
+
+
+def stream_jsonl(obj):
+    """ Yields one compact JSON document per line for each item of a list result, or for a
+    result which is not a list """
+    result = obj.result
+    if isinstance(result, (list, StreamingResult)):
+        for item in result:
+            yield _dumps_jsonl(item)
+    else:
+        yield _dumps_jsonl(dict(result) if hasattr(result, '__dict__') else result)
+
+
 def format_json_color(obj):
     from pygments import highlight, lexers, formatters
     return highlight(format_json(obj), lexers.JsonLexer(), formatters.TerminalFormatter())  # pylint: disable=no-member
@@ -83,12 +114,42 @@ def format_tsv(obj):
     return TsvOutput.dump(result_list)
 
 
+def stream_tsv(obj):
+    for item in obj.result:
+        yield TsvOutput.dump([item])
+
+
+class StreamingResult(object):  # pylint: disable=too-few-public-methods
+    """ The items of a paged result, fetched one page at a time while the output is written.
+    Conversions added with `map` are applied to each item as it is produced; an item a
+    conversion returns None for is left out. """
+
+    def __init__(self, items):
+        self._items = items
+        self._conversions = []
+
+    def map(self, conversion):
+        self._conversions.append(conversion)
+        return self
+
+    def __iter__(self):
+        for item in self._items:
+            for conversion in self._conversions:
+                item = conversion(item)
+                if item is None:
+                    break
+            else:
+                yield item
+
+
 class CommandResultItem(object):  # pylint: disable=too-few-public-methods
 
-    def __init__(self, result, table_transformer=None, is_query_active=False):
+    def __init__(self, result, table_transformer=None, is_query_active=False, exit_code=0):
         self.result = result
         self.table_transformer = table_transformer
         self.is_query_active = is_query_active
+        # not 0 when some of the invocations of a command for several values failed
+        self.exit_code = exit_code
 
 
 class OutputProducer(object):  # pylint: disable=too-few-public-methods
@@ -96,11 +157,19 @@ class OutputProducer(object):  # pylint: disable=too-few-public-methods
     format_dict = {
         'json': format_json,
         'jsonc': format_json_color,
+        'jsonl': format_jsonl,
         'table': format_table,
         'text': format_text,
         'tsv': format_tsv,
     }
 
+    # Formats which write a StreamingResult item by item
+    stream_format_dict = {
+        'json': stream_json,
+        'jsonl': stream_jsonl,
+        'tsv': stream_tsv,
+    }
+
     def __init__(self, formatter, file=sys.stdout):  # pylint: disable=redefined-builtin
         self.formatter = formatter
         self.file = file
@@ -108,22 +177,51 @@ class OutputProducer(object):  # pylint: disable=too-few-public-methods
     def out(self, obj):
         if platform.system() == 'Windows':
             self.file = colorama.AnsiToWin32(self.file).stream
-        output = self.formatter(obj)
+        # Lists are written item by item, without building the whole output first
+        streaming = isinstance(obj.result, StreamingResult)
+        streamer = OutputProducer.get_streamer(self.formatter) \
+            if streaming or isinstance(obj.result, list) else None
+        if streamer:
+            for output in streamer(obj):
+                if not self._write(output, flush=streaming):
+                    break
+            return
+        if streaming:
+            obj.result = list(obj.result)
+        self._write(self.formatter(obj))
+
+    def _write(self, output, flush=False):
+        """ Returns False when the reader of the output went away """
         try:
             print(output, file=self.file, end='')
+            if flush:
+                self.file.flush()
         except IOError as ex:
             if ex.errno == errno.EPIPE:
-                pass
+                return False
             else:
                 raise
         except UnicodeEncodeError:
             print(output.encode('ascii', 'ignore').decode('utf-8', 'ignore'),
                   file=self.file, end='')
+        return True
 
     @staticmethod
     def get_formatter(format_type):
         return OutputProducer.format_dict.get(format_type)
 
+    @staticmethod
+    def can_stream(format_type):
+        return format_type in OutputProducer.stream_format_dict
+
+    @staticmethod
+    def get_streamer(formatter):
+        """ Returns the streaming variant of a formatter, or None """
+        for format_type, streamer in OutputProducer.stream_format_dict.items():
+            if OutputProducer.format_dict.get(format_type) is formatter:
+                return streamer
+        return None
+
 
 class TableOutput(object):  # pylint: disable=too-few-public-methods
 
@@ -6,16 +6,19 @@
 from __future__ import print_function
 
 import collections
+import copy
 import errno
 import json
 import os.path
+import threading
+import time
 from pprint import pformat
 from enum import Enum
 
 import adal
 import azure.cli.core.azlogging as azlogging
 from azure.cli.core._environment import get_config_dir
-from azure.cli.core._session import ACCOUNT
+from azure.cli.core._session import ACCOUNT, file_lock, write_file_atomic
 from azure.cli.core._util import CLIError, get_file_json
 from azure.cli.core.adal_authentication import AdalAuthentication
 from azure.cli.core.cloud import get_active_cloud, set_cloud_subscription
@@ -43,6 +46,11 @@ _SERVICE_PRINCIPAL_ID = 'servicePrincipalId'
 _SERVICE_PRINCIPAL_TENANT = 'servicePrincipalTenant'
 _TOKEN_ENTRY_USER_ID = 'userId'
 _TOKEN_ENTRY_TOKEN_TYPE = 'tokenType'
+_TOKEN_ENTRY_RESOURCE = 'resource'
+_TOKEN_ENTRY_EXPIRES_ON = 'expiresOn'
+# Access tokens of service principals are persisted next to their secrets. They use their own id
+# field, so they are neither taken for a service principal secret nor loaded into adal's cache.
+_TOKEN_ENTRY_SERVICE_PRINCIPAL_ID = 'tokenServicePrincipalId'
 # This could mean either real access token, or client secret of a service principal
 # This naming is no good, but can't change because xplat-cli does so.
 _ACCESS_TOKEN = 'accessToken'
@@ -55,6 +63,12 @@ TOKEN_FIELDS_EXCLUDED_FROM_PERSISTENCE = ['familyName',
 _CLIENT_ID = '04b07795-8ddb-461a-bbee-02f9e1bf7b46'
 _COMMON_TENANT = 'common'
 
+# Upper bound of the tenants searched for subscriptions at the same time
+_MAX_TENANT_WORKERS = 8
+
+# Access tokens kept in memory are acquired again when they expire within this many seconds
+_TOKEN_EXPIRY_MARGIN = 300
+
 
 def _authentication_context_factory(authority, cache):
     return adal.AuthenticationContext(authority, cache=cache, api_version=None)
@@ -80,6 +94,41 @@ def _load_tokens_from_file(file_path):
     return all_entries
 
 
+def _get_file_stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size
+
+
+def _get_token_expiry(token_entry):
+    '''Returns when the token entry expires as a POSIX timestamp, or None if unknown'''
+    import calendar
+    import dateutil.parser
+    try:
+        expires_on = dateutil.parser.parse(token_entry['expiresOn'])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    if expires_on.tzinfo:
+        return calendar.timegm(expires_on.utctimetuple())
+    # adal records the expiry in local time
+    return time.mktime(expires_on.timetuple())
+
+
+def _get_token_file_key(entry):
+    '''Identifies an entry of the token file, so the changes of a process can be merged into it'''
+    if entry.get(_SERVICE_PRINCIPAL_ID):
+        return (_SERVICE_PRINCIPAL_ID, entry[_SERVICE_PRINCIPAL_ID],
+                entry.get(_SERVICE_PRINCIPAL_TENANT))
+    if entry.get(_TOKEN_ENTRY_SERVICE_PRINCIPAL_ID):
+        return (_TOKEN_ENTRY_SERVICE_PRINCIPAL_ID, entry[_TOKEN_ENTRY_SERVICE_PRINCIPAL_ID],
+                entry.get(_SERVICE_PRINCIPAL_TENANT), entry.get(_TOKEN_ENTRY_RESOURCE))
+    # the fields adal keys its token cache with
+    return tuple((entry.get(field) or '').lower() for field in
+                 ('_authority', _TOKEN_ENTRY_RESOURCE, '_clientId', _TOKEN_ENTRY_USER_ID))
+
+
 def _delete_file(file_path):
     try:
         os.remove(file_path)
@@ -93,26 +142,63 @@ class CredentialType(Enum):  # pylint: disable=too-few-public-methods
     rbac = CLOUD.endpoints.active_directory_graph_resource_id
 
 
+_SHARED_CREDS_CACHE = None
+_SHARED_CREDS_CACHE_LOCK = threading.Lock()
+
+
+def get_shared_creds_cache():
+    '''Returns the credential cache shared by the profiles of this process. It reloads the
+    token file when another process changes it.
+    '''
+    global _SHARED_CREDS_CACHE  # pylint: disable=global-statement
+    with _SHARED_CREDS_CACHE_LOCK:
+        if _SHARED_CREDS_CACHE is None:
+            _SHARED_CREDS_CACHE = CredsCache()
+        else:
+            _SHARED_CREDS_CACHE.reload_if_changed()
+        return _SHARED_CREDS_CACHE
+
+
+def reset_shared_creds_cache():
+    global _SHARED_CREDS_CACHE  # pylint: disable=global-statement
+    with _SHARED_CREDS_CACHE_LOCK:
+        _SHARED_CREDS_CACHE = None
+
+
 class Profile(object):
     def __init__(self, storage=None, auth_ctx_factory=None):
         self._storage = storage or ACCOUNT
-        factory = auth_ctx_factory or _AUTH_CTX_FACTORY
-        self._creds_cache = CredsCache(factory)
-        self._subscription_finder = SubscriptionFinder(factory, self._creds_cache.adal_token_cache)
+        self._auth_ctx_factory = auth_ctx_factory or _AUTH_CTX_FACTORY
+        self._creds_cache = CredsCache(auth_ctx_factory) if auth_ctx_factory \
+            else get_shared_creds_cache()
+        self._finder = None
         self._management_resource_uri = CLOUD.endpoints.management
 
+    @property
+    def _subscription_finder(self):
+        # Created on first use as it imports the subscription client, which only logins need
+        if self._finder is None:
+            self._finder = SubscriptionFinder(self._auth_ctx_factory,
+                                              self._creds_cache.adal_token_cache)
+        return self._finder
+
+    @_subscription_finder.setter
+    def _subscription_finder(self, value):
+        self._finder = value
+
     def find_subscriptions_on_login(self,  # pylint: disable=too-many-arguments
                                     interactive,
                                     username,
                                     password,
                                     is_service_principal,
-                                    tenant):
+                                    tenant,
+                                    tenant_filter=None):
         from azure.cli.core._debug import allow_debug_adal_connection
         allow_debug_adal_connection()
         subscriptions = []
         if interactive:
             subscriptions = self._subscription_finder.find_through_interactive_flow(
-                self._management_resource_uri)
+                self._management_resource_uri, tenant_filter)
         else:
             if is_service_principal:
                 if not tenant:
@@ -122,7 +208,7 @@ class Profile(object):
                     username, password, tenant, self._management_resource_uri)
             else:
                 subscriptions = self._subscription_finder.find_from_user_account(
-                    username, password, self._management_resource_uri)
+                    username, password, self._management_resource_uri, tenant_filter)
 
         if not subscriptions:
             raise CLIError('No subscriptions found for this account.')
@@ -330,7 +416,7 @@ class SubscriptionFinder(object):
 
         self._arm_client_factory = create_arm_client_factory
 
-    def find_from_user_account(self, username, password, resource):
+    def find_from_user_account(self, username, password, resource, tenant_filter=None):
         context = self._create_auth_context(_COMMON_TENANT)
         token_entry = context.acquire_token_with_username_password(
             resource,
@@ -338,16 +424,18 @@ class SubscriptionFinder(object):
             password,
             _CLIENT_ID)
         self.user_id = token_entry[_TOKEN_ENTRY_USER_ID]
-        result = self._find_using_common_tenant(token_entry[_ACCESS_TOKEN], resource)
+        result = self._find_using_common_tenant(token_entry[_ACCESS_TOKEN], resource,
+                                                tenant_filter)
         return result
 
-    def find_through_interactive_flow(self, resource):
+    def find_through_interactive_flow(self, resource, tenant_filter=None):
         context = self._create_auth_context(_COMMON_TENANT)
         code = context.acquire_user_code(resource, _CLIENT_ID)
         logger.warning(code['message'])
         token_entry = context.acquire_token_with_device_code(resource, code, _CLIENT_ID)
         self.user_id = token_entry[_TOKEN_ENTRY_USER_ID]
-        result = self._find_using_common_tenant(token_entry[_ACCESS_TOKEN], resource)
+        result = self._find_using_common_tenant(token_entry[_ACCESS_TOKEN], resource,
+                                                tenant_filter)
         return result
 
     def find_from_service_principal_id(self, client_id, secret, tenant, resource):
@@ -365,22 +453,49 @@ class SubscriptionFinder(object):
         authority = get_authority_url(tenant)
         return self._auth_context_factory(authority, token_cache)
 
-    def _find_using_common_tenant(self, access_token, resource):
+    def _find_using_common_tenant(self, access_token, resource, tenant_filter=None):
         from msrest.authentication import BasicTokenAuthentication
+        from multiprocessing.pool import ThreadPool
 
-        all_subscriptions = []
         token_credential = BasicTokenAuthentication({'access_token': access_token})
         client = self._arm_client_factory(token_credential)
-        tenants = client.tenants.list()
-        for t in tenants:
-            tenant_id = t.tenant_id
-            temp_context = self._create_auth_context(tenant_id)
-            temp_credentials = temp_context.acquire_token(resource, self.user_id, _CLIENT_ID)
-            subscriptions = self._find_using_specific_tenant(
-                tenant_id,
-                temp_credentials[_ACCESS_TOKEN])
-            all_subscriptions.extend(subscriptions)
+        tenants = [t.tenant_id for t in client.tenants.list()]
+        if tenant_filter:
+            tenant_filter = [t.lower() for t in tenant_filter]
+            skipped = [t for t in tenants if t.lower() not in tenant_filter]
+            if skipped:
+                logger.debug('Skipping tenants %s as they are not in the tenant filter', skipped)
+            tenants = [t for t in tenants if t.lower() in tenant_filter]
+        if not tenants:
+            return []
+
+        def _find_in_tenant(tenant_id):
+            try:
+                temp_context = self._create_auth_context(tenant_id)
+                temp_credentials = temp_context.acquire_token(resource, self.user_id, _CLIENT_ID)
+                return self._find_using_specific_tenant(tenant_id,
+                                                        temp_credentials[_ACCESS_TOKEN]), None
+            except Exception as ex:  # pylint: disable=broad-except
+                return [], ex
+
+        # map keeps the results in the order of the tenants
+        pool = ThreadPool(min(len(tenants), _MAX_TENANT_WORKERS))
+        try:
+            results = pool.map(_find_in_tenant, tenants)
+        finally:
+            pool.close()
+            pool.join()
 
+        all_subscriptions = []
+        errors = []
+        for tenant_id, (subscriptions, error) in zip(tenants, results):
+            if error is not None:
+                logger.warning("Failed to find subscriptions in tenant '%s': %s", tenant_id, error)
+                errors.append(error)
+            all_subscriptions.extend(subscriptions)
+        # without any tenant to show for it, the login fails with the error of the first tenant
+        if errors and len(errors) == len(tenants):
+            raise errors[0]
         return all_subscriptions
 
     def _find_using_specific_tenant(self, tenant, access_token):
@@ -403,14 +518,21 @@ class CredsCache(object):
 
     def __init__(self, auth_ctx_factory=None):
         self._token_file = os.path.join(get_config_dir(), 'accessTokens.json')
+        self._token_file_stamp = None
+        self._persisted_entries = collections.OrderedDict()
         self._service_principal_creds = []
+        self._service_principal_tokens = []
+        self._service_principal_token_hits = 0
+        self._service_principal_token_misses = 0
         self._auth_ctx_factory = auth_ctx_factory or _AUTH_CTX_FACTORY
         self.adal_token_cache = None
+        # (user or service principal, tenant, resource) -> (token type, access token, expiry)
+        self._access_tokens = {}
+        self._lock = threading.RLock()
         self._load_creds()
 
     def persist_cached_creds(self):
-        with os.fdopen(os.open(self._token_file, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600),
-                       'w+') as cred_file:
+        with self._lock:
             items = self.adal_token_cache.read_items()
             all_creds = [entry for _, entry in items]
 
@@ -420,33 +542,121 @@ class CredsCache(object):
                     i.pop(key, None)
 
             all_creds.extend(self._service_principal_creds)
-            cred_file.write(json.dumps(all_creds))
-
-        self.adal_token_cache.has_state_changed = False
+            all_creds.extend(self._service_principal_tokens)
+            with file_lock(self._token_file):
+                # other processes may have changed the file since it was read, so only the
+                # entries this process added, changed or removed since then are written
+                current = collections.OrderedDict((_get_token_file_key(x), x) for x in all_creds)
+                merged = collections.OrderedDict(
+                    (_get_token_file_key(x), x) for x in _load_tokens_from_file(self._token_file))
+                for key in self._persisted_entries:
+                    if key not in current:
+                        merged.pop(key, None)
+                for key, entry in current.items():
+                    if self._persisted_entries.get(key) != entry:
+                        merged[key] = entry
+                all_creds = list(merged.values())
+                write_file_atomic(self._token_file, json.dumps(all_creds), mode=0o600)
+                self._token_file_stamp = _get_file_stamp(self._token_file)
+            self._load_entries(all_creds)
+
+    def reload_if_changed(self):
+        '''Load the token file again if it changed since it was last read or written, e.g. by a
+        login or logout in another process.
+        '''
+        with self._lock:
+            if _get_file_stamp(self._token_file) != self._token_file_stamp:
+                logger.debug("Reloading changed token file '%s'", self._token_file)
+                self._access_tokens.clear()
+                self._token_file_stamp = _get_file_stamp(self._token_file)
+                self._load_entries(_load_tokens_from_file(self._token_file))
+
+    def _get_cached_access_token(self, key):
+        cached = self._access_tokens.get(key)
+        if cached and cached[2] - _TOKEN_EXPIRY_MARGIN > time.time():
+            return cached[0], cached[1]
+        return None
+
+    def _cache_access_token(self, key, token_entry):
+        expiry = _get_token_expiry(token_entry)
+        if expiry:
+            self._access_tokens[key] = (token_entry[_TOKEN_ENTRY_TOKEN_TYPE],
+                                        token_entry[_ACCESS_TOKEN],
+                                        expiry)
 
     def retrieve_token_for_user(self, username, tenant, resource):
-        authority = get_authority_url(tenant)
-        context = self._auth_ctx_factory(authority, cache=self.adal_token_cache)
-        token_entry = context.acquire_token(resource, username, _CLIENT_ID)
-        if not token_entry:
-            raise CLIError("Could not retrieve token from local cache, please run 'az login'.")
-
-        if self.adal_token_cache.has_state_changed:
-            self.persist_cached_creds()
-        return (token_entry[_TOKEN_ENTRY_TOKEN_TYPE], token_entry[_ACCESS_TOKEN])
+        key = (username, tenant, resource)
+        with self._lock:
+            cached = self._get_cached_access_token(key)
+            if cached:
+                return cached
+            authority = get_authority_url(tenant)
+            context = self._auth_ctx_factory(authority, cache=self.adal_token_cache)
+            token_entry = context.acquire_token(resource, username, _CLIENT_ID)
+            if not token_entry:
+                raise CLIError("Could not retrieve token from local cache, please run 'az login'.")
+
+            if self.adal_token_cache.has_state_changed:
+                self.persist_cached_creds()
+            self._cache_access_token(key, token_entry)
+            return (token_entry[_TOKEN_ENTRY_TOKEN_TYPE], token_entry[_ACCESS_TOKEN])
 
     def retrieve_token_for_service_principal(self, sp_id, resource):
         matched = [x for x in self._service_principal_creds if sp_id == x[_SERVICE_PRINCIPAL_ID]]
         if not matched:
             raise CLIError("Please run 'az account set' to select active account.")
         cred = matched[0]
-        authority_url = get_authority_url(cred[_SERVICE_PRINCIPAL_TENANT])
+        tenant = cred[_SERVICE_PRINCIPAL_TENANT]
+        key = (sp_id, tenant, resource)
+        with self._lock:
+            cached = self._get_cached_access_token(key)
+            if cached:
+                self._service_principal_token_hits += 1
+                logger.debug("Using cached token of service principal '%s' for '%s' "
+                             "(cache hits: %d, misses: %d)", sp_id, resource,
+                             self._service_principal_token_hits,
+                             self._service_principal_token_misses)
+                return cached
+            # another process may have acquired the token meanwhile
+            self.reload_if_changed()
+            cached = self._get_cached_access_token(key)
+            if cached:
+                return cached
+            self._service_principal_token_misses += 1
+            logger.debug("Acquiring token of service principal '%s' for '%s' "
+                         "(cache hits: %d, misses: %d)", sp_id, resource,
+                         self._service_principal_token_hits, self._service_principal_token_misses)
+        # other threads keep using the cached tokens while this one is acquired
+        authority_url = get_authority_url(tenant)
         context = self._auth_ctx_factory(authority_url, None)
         token_entry = context.acquire_token_with_client_credentials(resource,
                                                                     sp_id,
                                                                     cred[_ACCESS_TOKEN])
+        with self._lock:
+            self._cache_access_token(key, token_entry)
+            self._save_service_principal_token(sp_id, tenant, resource, token_entry)
         return (token_entry[_TOKEN_ENTRY_TOKEN_TYPE], token_entry[_ACCESS_TOKEN])
 
+    def _save_service_principal_token(self, sp_id, tenant, resource, token_entry):
+        if _TOKEN_ENTRY_EXPIRES_ON not in token_entry:
+            return
+        entry = {
+            _TOKEN_ENTRY_SERVICE_PRINCIPAL_ID: sp_id,
+            _SERVICE_PRINCIPAL_TENANT: tenant,
+            _TOKEN_ENTRY_RESOURCE: resource,
+            _TOKEN_ENTRY_TOKEN_TYPE: token_entry[_TOKEN_ENTRY_TOKEN_TYPE],
+            _ACCESS_TOKEN: token_entry[_ACCESS_TOKEN],
+            _TOKEN_ENTRY_EXPIRES_ON: token_entry[_TOKEN_ENTRY_EXPIRES_ON]
+        }
+        # replace the previous token for the resource and drop expired ones
+        now = time.time()
+        self._service_principal_tokens = [
+            x for x in self._service_principal_tokens
+            if (x[_TOKEN_ENTRY_SERVICE_PRINCIPAL_ID], x[_SERVICE_PRINCIPAL_TENANT],
+                x[_TOKEN_ENTRY_RESOURCE]) != (sp_id, tenant, resource) and
+            (_get_token_expiry(x) or 0) > now] + [entry]
+        self.persist_cached_creds()
+
     def retrieve_secret_of_service_principal(self, sp_id):
         matched = [x for x in self._service_principal_creds if sp_id == x[_SERVICE_PRINCIPAL_ID]]
         if not matched:
@@ -457,12 +667,25 @@ class CredsCache(object):
     def _load_creds(self):
         if self.adal_token_cache is not None:
             return self.adal_token_cache
-        all_entries = _load_tokens_from_file(self._token_file)
-        self._load_service_principal_creds(all_entries)
-        real_token = [x for x in all_entries if x not in self._service_principal_creds]
-        self.adal_token_cache = adal.TokenCache(json.dumps(real_token))
+        self._token_file_stamp = _get_file_stamp(self._token_file)
+        self.adal_token_cache = adal.TokenCache()
+        self._load_entries(_load_tokens_from_file(self._token_file))
         return self.adal_token_cache
 
+    def _load_entries(self, all_entries):
+        # what the token file contains, to tell the changes of this process when it is written
+        self._persisted_entries = collections.OrderedDict(
+            (_get_token_file_key(x), copy.deepcopy(x)) for x in all_entries)
+        self._service_principal_creds = []
+        self._service_principal_tokens = []
+        self._load_service_principal_creds(all_entries)
+        self._load_service_principal_tokens(all_entries)
+        real_token = [x for x in all_entries if x not in self._service_principal_creds and
+                      x not in self._service_principal_tokens]
+        # refreshed in place, as the subscription finder shares the cache
+        self.adal_token_cache.deserialize(json.dumps(real_token))
+        self.adal_token_cache.has_state_changed = False
+
     def save_service_principal_cred(self, service_principal_id, secret, tenant):
         entry = {
             _SERVICE_PRINCIPAL_ID: service_principal_id,
@@ -483,6 +706,7 @@ class CredsCache(object):
             state_changed = True
 
         if state_changed:
+            self._remove_service_principal_tokens(service_principal_id)
             self.persist_cached_creds()
 
     def _load_service_principal_creds(self, creds):
@@ -491,8 +715,26 @@ class CredsCache(object):
                 self._service_principal_creds.append(c)
         return self._service_principal_creds
 
+    def _load_service_principal_tokens(self, entries):
+        for entry in entries:
+            if entry.get(_TOKEN_ENTRY_SERVICE_PRINCIPAL_ID):
+                self._service_principal_tokens.append(entry)
+                self._cache_access_token((entry[_TOKEN_ENTRY_SERVICE_PRINCIPAL_ID],
+                                          entry[_SERVICE_PRINCIPAL_TENANT],
+                                          entry[_TOKEN_ENTRY_RESOURCE]), entry)
+        return self._service_principal_tokens
+
+    def _remove_service_principal_tokens(self, sp_id):
+        self._access_tokens = {key: value for key, value in self._access_tokens.items()
+                               if key[0] != sp_id}
+        matched = [x for x in self._service_principal_tokens
+                   if x[_TOKEN_ENTRY_SERVICE_PRINCIPAL_ID] == sp_id]
+        self._service_principal_tokens = [x for x in self._service_principal_tokens
+                                          if x not in matched]
+        return bool(matched)
+
     def remove_cached_creds(self, user_or_sp):
-        state_changed = False
+        state_changed = self._remove_service_principal_tokens(user_or_sp)
         # clear AAD tokens
         tokens = self.adal_token_cache.find({_TOKEN_ENTRY_USER_ID: user_or_sp})
         if tokens:
@@ -511,5 +753,9 @@ class CredsCache(object):
             self.persist_cached_creds()
 
     def remove_all_cached_creds(self):
-        # we can clear file contents, but deleting it is simpler
-        _delete_file(self._token_file)
+        with self._lock, file_lock(self._token_file):
+            # we can clear file contents, but deleting it is simpler
+            _delete_file(self._token_file)
+            self._token_file_stamp = None
+            self._access_tokens.clear()
+            self._load_entries([])
@@ -0,0 +1,269 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Pacing of the requests the threads of a process send to each host.
+
+Every host has a token bucket shared by the threads of the process. Its rate is set with the
+'max_requests_per_second' option in the 'core' section of the configuration
+(AZURE_CORE_MAX_REQUESTS_PER_SECOND); 0, the default, does not limit the rate. While the
+x-ms-ratelimit-remaining-* headers of the responses report that few requests are left, the
+host is limited to one request per second. A throttled response (429 or 503) holds back all
+requests to the host until the time given by Retry-After, or a jittered exponential backoff
+without it, and the request is sent again. Throttled requests are sent again up to
+'throttling_retries' times (AZURE_CORE_THROTTLING_RETRIES); requests rejected with 503 only when
+their method is idempotent. Requests streaming a body which can't be rewound are not sent again.
+"""
+
+from email.utils import parsedate_tz, mktime_tz
+import random
+import threading
+import time
+
+from six import binary_type, text_type
+from six.moves.urllib.parse import urlparse  # pylint: disable=import-error
+
+from azure.cli.core._config import az_config
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
+
+DEFAULT_THROTTLING_RETRIES = 5
+THROTTLED_STATUS_CODES = (429, 503)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE', 'PUT', 'DELETE')
+
+_RATE_LIMIT_REMAINING_PREFIX = 'x-ms-ratelimit-remaining-'
+# Below this number of remaining requests a host gets _LOW_REMAINING_RATE requests per second
+_LOW_REMAINING = 10
+_LOW_REMAINING_RATE = 1.0
+_BACKOFF_FACTOR = 0.8
+_MAX_BACKOFF = 90
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_max_requests_per_second():
+    return az_config.getfloat('core', 'max_requests_per_second', fallback=0)
+
+
+def get_throttling_retries():
+    return az_config.getint('core', 'throttling_retries', fallback=DEFAULT_THROTTLING_RETRIES)
+
+
+def _get_header(headers, name):
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def get_retry_after(headers):
+    """ Returns the seconds to wait given by a Retry-After header, or None """
+    value = _get_header(headers, 'retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        date = parsedate_tz(value)
+        return max(0.0, mktime_tz(date) - time.time()) if date else None
+
+
+def get_remaining_requests(headers):
+    """ Returns the lowest number of requests the x-ms-ratelimit-remaining-* headers report as
+    left, or None """
+    remaining = []
+    for key, value in (headers or {}).items():
+        if key.lower().startswith(_RATE_LIMIT_REMAINING_PREFIX):
+            try:
+                remaining.append(int(value))
+            except ValueError:
+                pass
+    return min(remaining) if remaining else None
+
+
+def get_backoff(attempt):
+    """ Exponential backoff for the given retry (starting at 1) with half of it jittered, so
+    throttled threads don't come back at the same time """
+    backoff = min(_MAX_BACKOFF, _BACKOFF_FACTOR * (2 ** (attempt - 1)))
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def is_throttled(status_code):
+    return status_code in THROTTLED_STATUS_CODES
+
+
+class HostLimiter(object):
+    """ Token bucket and throttling state of one host """
+
+    def __init__(self, host, rate=0):
+        self.host = host
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._tokens = max(1.0, rate)
+        self._updated = time.time()
+        self._resume_at = 0
+        self._low_remaining = False
+
+    def _get_rate(self):
+        if self._low_remaining:
+            return min(self.rate, _LOW_REMAINING_RATE) if self.rate > 0 else _LOW_REMAINING_RATE
+        return self.rate
+
+    def acquire(self):
+        """ Waits until a request may be sent to the host """
+        while True:
+            with self._lock:
+                now = time.time()
+                rate = self._get_rate()
+                if self._resume_at > now:
+                    wait = self._resume_at - now
+                elif rate <= 0:
+                    return
+                else:
+                    self._tokens = min(max(1.0, rate),
+                                       self._tokens + (now - self._updated) * rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """ Holds back all requests to the host for the given number of seconds """
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.time() + seconds)
+            self._tokens = min(self._tokens, 1.0)
+
+    def update(self, headers):
+        remaining = get_remaining_requests(headers)
+        if remaining is not None:
+            with self._lock:
+                low_remaining = remaining < _LOW_REMAINING
+                if low_remaining != self._low_remaining:
+                    logger.debug('%d requests to %s remaining.', remaining, self.host)
+                    self._low_remaining = low_remaining
+
+
+def get_host_limiter(url_or_host):
+    host = urlparse(url_or_host).netloc if '//' in url_or_host else url_or_host
+    host = host.lower()
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = HostLimiter(host, get_max_requests_per_second())
+        return limiter
+
+
+def reset_host_limiters():
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def throttled(limiter, attempt, method, status_code, headers):
+    """ Records a response to a request and returns the seconds to wait before sending the
+    request again, or None when it should not be sent again """
+    limiter.update(headers)
+    if not is_throttled(status_code):
+        return None
+    if attempt > get_throttling_retries() or \
+            (status_code != 429 and method.upper() not in IDEMPOTENT_METHODS):
+        return None
+    delay = get_retry_after(headers)
+    if delay is None:
+        delay = get_backoff(attempt)
+    logger.warning('Requests to %s are throttled (%d), retrying in %.1f seconds.',
+                   limiter.host, status_code, delay)
+    limiter.pause(delay)
+    return delay
+
+
+def _get_body_rewind(body):
+    """ Returns a function which makes `body` ready to be sent again, or None for a stream which
+    can't be rewound """
+    if body is None or isinstance(body, (binary_type, text_type, dict, list)):
+        return lambda: None
+    try:
+        position = body.tell()
+    except (AttributeError, IOError, OSError, ValueError):
+        return None
+    return lambda: body.seek(position)
+
+
+def _get_body_rewinds(request, args, kwargs):
+    """ The rewinds of the bodies of a ServiceClient.send call, or None if one of them can't be
+    sent again """
+    if kwargs.get('files'):
+        return None
+    content = kwargs['content'] if 'content' in kwargs else (args[1] if len(args) > 1 else None)
+    rewinds = [_get_body_rewind(body) for body in (request.data, content)]
+    return None if None in rewinds else rewinds
+
+
+def schedule_client(client):
+    """ Sends the requests of a msrest service client through the scheduler """
+    service_client = client._client  # pylint: disable=protected-access
+    if getattr(service_client, '_scheduled', False):
+        return
+    send = service_client.send
+    # msrest would retry a throttled response by itself, without telling the other threads
+    policy = client.config.retry_policy.policy
+    policy.status_forcelist = [c for c in policy.status_forcelist or []
+                               if c not in THROTTLED_STATUS_CODES]
+
+    def _send(request, *args, **kwargs):
+        limiter = get_host_limiter(request.url)
+        rewinds = _get_body_rewinds(request, args, kwargs)
+        attempt = 0
+        while True:
+            attempt += 1
+            limiter.acquire()
+            response = send(request, *args, **kwargs)
+            if rewinds is None:
+                # the body was streamed, so the throttled response goes back to the caller
+                limiter.update(response.headers)
+                return response
+            if throttled(limiter, attempt, request.method, response.status_code,
+                         response.headers) is None:
+                return response
+            response.close()
+            for rewind in rewinds:
+                rewind()
+
+    service_client.send = _send
+    service_client._scheduled = True  # pylint: disable=protected-access
+
+
+def schedule_data_client(client):
+    """ Sends the requests of an azure-storage service client through the scheduler. Whether a
+    failed request is sent again is left to the retry policy of the client; throttled requests
+    wait for Retry-After, together with the other requests to the host. """
+    request_callback = client.request_callback
+    retry = client.retry
+
+    def _request_callback(request):
+        if request_callback:
+            request_callback(request)
+        get_host_limiter(request.host).acquire()
+
+    def _retry(context):
+        interval = retry(context)
+        response = getattr(context, 'response', None)
+        if interval is None or response is None:
+            return interval
+        limiter = get_host_limiter(context.request.host)
+        limiter.update(response.headers)
+        if not is_throttled(response.status):
+            return interval / 2 + random.uniform(0, interval / 2)
+        interval = max(interval, get_retry_after(response.headers) or 0)
+        logger.warning('Requests to %s are throttled (%d), retrying in %.1f seconds.',
+                       limiter.host, response.status, interval)
+        # The request callback of the next attempt waits for the host
+        limiter.pause(interval)
+        return 0
+
+    client.request_callback = _request_callback
+    client.retry = _retry
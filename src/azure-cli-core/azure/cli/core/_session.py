@@ -3,8 +3,11 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from contextlib import contextmanager
 import json
 import os
+import tempfile
+import threading
 import time
 try:
     import collections.abc as collections
@@ -15,17 +18,141 @@ except ImportError:
 from codecs import open as codecs_open
 
 
+class _FileLock(object):
+    '''An exclusive lock on '<filename>.lock' held across processes. It is reentrant for the
+    thread holding it and excludes the other threads of the process.
+    '''
+
+    def __init__(self, filename):
+        self._lock_filename = filename + '.lock'
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._lock_file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._lock_file = _lock_file(self._lock_filename)
+            except Exception:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *_):
+        self._depth -= 1
+        if self._depth == 0:
+            _unlock_file(self._lock_file)
+            self._lock_file = None
+        self._thread_lock.release()
+
+
+def _lock_file(filename):
+    lock_file = open(filename, 'a')
+    try:
+        try:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        except ImportError:
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except (IOError, OSError):
+                    # LK_LOCK gives up after 10 attempts a second apart
+                    pass
+    except Exception:
+        lock_file.close()
+        raise
+    return lock_file
+
+
+def _unlock_file(lock_file):
+    try:
+        try:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        except ImportError:
+            import msvcrt
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        lock_file.close()
+
+
+_file_locks = {}
+_file_locks_lock = threading.Lock()
+
+
+def file_lock(filename):
+    '''Returns the lock that processes hold while they change `filename`, for use in a with
+    statement.
+    '''
+    filename = os.path.abspath(filename)
+    with _file_locks_lock:
+        if filename not in _file_locks:
+            _file_locks[filename] = _FileLock(filename)
+        return _file_locks[filename]
+
+
+def _replace_file(source, destination):
+    try:
+        os.replace(source, destination)
+    except AttributeError:
+        # Python 2 can't rename over an existing file on Windows
+        if os.name == 'nt' and os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
+
+
+def write_file_atomic(filename, content, encoding='utf-8', mode=None):
+    '''Replace `filename` with `content` so that readers see either the old or the new file.
+
+    The new file gets `mode` or the mode of the file it replaces. New files are only accessible
+    to the user.
+    '''
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_filename = tempfile.mkstemp(dir=directory, prefix=os.path.basename(filename) + '.',
+                                         suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content.encode(encoding))
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is None and os.path.exists(filename):
+            mode = os.stat(filename).st_mode & 0o777
+        if mode is not None:
+            os.chmod(temp_filename, mode)
+        _replace_file(temp_filename, filename)
+    except Exception:
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+        raise
+
+
 class Session(collections.MutableMapping):
     '''A simple dict-like class that is backed by a JSON file.
 
     All direct modifications will save the file. Indirect modifications should
     be followed by a call to `save_with_retry` or `save`.
+
+    Saving a direct modification only writes the changed key over the current content of the
+    file, so processes changing different keys don't lose each other's updates. `save` writes
+    all data. Saves within `transaction` are written once when the transaction ends. Files are
+    written under a file lock and replaced atomically.
     '''
 
     def __init__(self, encoding=None):
         self.filename = None
         self.data = {}
         self._encoding = encoding if encoding else 'utf-8-sig'
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self._pending_keys = None
+        self._pending_save_all = False
 
     def load(self, filename, max_age=0):
         self.filename = filename
@@ -40,20 +167,71 @@ class Session(collections.MutableMapping):
         except (OSError, IOError):
             self.save()
 
-    def save(self):
-        if self.filename:
-            with codecs_open(self.filename, 'w', encoding=self._encoding) as f:
-                json.dump(self.data, f)
+    def _read_file(self):
+        try:
+            with codecs_open(self.filename, 'r', encoding=self._encoding) as f:
+                return json.load(f)
+        except (OSError, IOError, ValueError):
+            return {}
 
-    def save_with_retry(self, retries=5):
+    def _save(self, changed_keys=None):
+        '''Write the `changed_keys` over the content of the file, or all data if None'''
+        if not self.filename:
+            return
+        with self._lock:
+            if self._transaction_depth:
+                if changed_keys is None:
+                    self._pending_save_all = True
+                else:
+                    self._pending_keys = (self._pending_keys or set()) | set(changed_keys)
+                return
+            with file_lock(self.filename):
+                if changed_keys is None:
+                    data = self.data
+                else:
+                    data = self._read_file()
+                    for key in changed_keys:
+                        if key in self.data:
+                            data[key] = self.data[key]
+                        else:
+                            data.pop(key, None)
+                write_file_atomic(self.filename, json.dumps(data), encoding=self._encoding)
+
+    def _save_with_retry(self, changed_keys=None, retries=5):
         for _ in range(retries - 1):
             try:
-                self.save()
+                self._save(changed_keys)
                 break
             except OSError:
                 time.sleep(0.1)
         else:
-            self.save()
+            self._save(changed_keys)
+
+    def save(self):
+        self._save()
+
+    def save_with_retry(self, retries=5):
+        self._save_with_retry(retries=retries)
+
+    @contextmanager
+    def transaction(self):
+        '''Coalesce the saves in the with statement into one write when the outermost
+        transaction ends.
+        '''
+        with self._lock:
+            self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._transaction_depth -= 1
+                if not self._transaction_depth:
+                    save_all, changed_keys = self._pending_save_all, self._pending_keys
+                    self._pending_save_all, self._pending_keys = False, None
+                    if save_all:
+                        self._save_with_retry()
+                    elif changed_keys:
+                        self._save_with_retry(changed_keys)
 
     def get(self, key, default=None):
         return self.data.get(key, default)
@@ -63,11 +241,11 @@ class Session(collections.MutableMapping):
 
     def __setitem__(self, key, value):
         self.data[key] = value
-        self.save_with_retry()
+        self._save_with_retry([key])
 
     def __delitem__(self, key):
         del self.data[key]
-        self.save_with_retry()
+        self._save_with_retry([key])
 
     def __iter__(self):
         return iter(self.data)
@@ -84,3 +262,14 @@ CONFIG = Session()
 
 # SESSION provides read-write session variables
 SESSION = Session()
+
+# INDEX maps command names and command group prefixes to the command modules registering them
+INDEX = Session()
+
+# METADATA caches the arguments and summaries extracted from the signatures and docstrings of
+# command operations
+METADATA = Session()
+
+# PROVIDERS caches the resource types and api-versions of the resource providers per cloud and
+# subscription
+PROVIDERS = Session()
@@ -10,6 +10,8 @@ import json
 from datetime import datetime, timedelta
 from enum import Enum
 
+from six import integer_types, string_types
+
 import azure.cli.core.azlogging as azlogging
 
 CLI_PACKAGE_NAME = 'azure-cli'
@@ -119,33 +121,94 @@ def read_file_content(file_path, allow_binary=False):
     raise CLIError('Failed to decode file {} - unknown decoding'.format(file_path))
 
 
-def todict(obj):  # pylint: disable=too-many-return-statements
+_SCALAR_TYPES = frozenset(integer_types + string_types + (float, bool, bytes, type(None)))
+_DICT, _LIST, _ENUM, _DATETIME, _TIMEDELTA, _NAMEDTUPLE, _OBJECT, _OTHER = range(8)
+# The kind of conversion by type, and the camel case keys of the attributes by model type
+_kinds = {}
+_key_maps = {}
+
 
+def _get_kind(obj):
     if isinstance(obj, dict):
-        return {k: todict(v) for (k, v) in obj.items()}
+        return _DICT
     elif isinstance(obj, list):
-        return [todict(a) for a in obj]
+        return _LIST
     elif isinstance(obj, Enum):
-        return obj.value
+        return _ENUM
     elif isinstance(obj, datetime):
-        return obj.isoformat()
+        return _DATETIME
     elif isinstance(obj, timedelta):
-        return str(obj)
+        return _TIMEDELTA
     elif hasattr(obj, '_asdict'):
-        return todict(obj._asdict())
+        return _NAMEDTUPLE
     elif hasattr(obj, '__dict__'):
-        return dict([(to_camel_case(k), todict(v))
-                     for k, v in obj.__dict__.items()
-                     if not callable(v) and not k.startswith('_')])
+        return _OBJECT
+    return _OTHER
+
+
+def _get_key_map(cls):
+    """ Camel case keys of the attributes of a type, None for the private ones. The attributes of
+    msrest models are known up front from their _attribute_map. """
+    return {k: None if k.startswith('_') else to_camel_case(k)
+            for k in getattr(cls, '_attribute_map', None) or {}}
+
+
+def todict(obj, post_processor=None):
+    """ Converts the SDK models in a result to dictionaries with camel case keys. The optional
+    post_processor is called with every dictionary once its values are converted and returns the
+    dictionary to use. """
+    cls = type(obj)
+    if cls in _SCALAR_TYPES:
+        return obj
+    kind = _kinds.get(cls)
+    if kind is None:
+        kind = _kinds[cls] = _get_kind(obj)
+    if kind == _DICT:
+        result = {k: todict(v, post_processor) for (k, v) in obj.items()}
+    elif kind == _LIST:
+        return [todict(a, post_processor) for a in obj]
+    elif kind == _ENUM:
+        return obj.value
+    elif kind == _DATETIME:
+        return obj.isoformat()
+    elif kind == _TIMEDELTA:
+        return str(obj)
+    elif kind == _NAMEDTUPLE:
+        return todict(obj._asdict(), post_processor)
+    elif kind == _OBJECT:
+        key_map = _key_maps.get(cls)
+        if key_map is None:
+            key_map = _key_maps[cls] = _get_key_map(cls)
+        result = {}
+        for k, v in obj.__dict__.items():
+            try:
+                key = key_map[k]
+            except KeyError:
+                key = key_map[k] = None if k.startswith('_') else to_camel_case(k)
+            if key is None:
+                continue
+            if type(v) in _SCALAR_TYPES:
+                result[key] = v
+            elif not callable(v):
+                result[key] = todict(v, post_processor)
     else:
         return obj
+    return post_processor(result) if post_processor else result
 
 
 KEYS_CAMELCASE_PATTERN = re.compile('(?!^)_([a-zA-Z])')
 
 
+_camel_case_names = {}
+
+
 def to_camel_case(s):
-    return re.sub(KEYS_CAMELCASE_PATTERN, lambda x: x.group(1).upper(), s)
+    try:
+        return _camel_case_names[s]
+    except KeyError:
+        name = _camel_case_names[s] = re.sub(KEYS_CAMELCASE_PATTERN, lambda x: x.group(1).upper(),
+                                             s)
+        return name
 
 
 def to_snake_case(s):
@@ -8,6 +8,8 @@ import adal
 
 from msrest.authentication import Authentication
 
+from azure.cli.core._connection_pool import get_pooled_session
+import azure.cli.core.request_timing as request_timing
 from azure.cli.core._util import CLIError
 
 
@@ -17,10 +19,11 @@ class AdalAuthentication(Authentication):  # pylint: disable=too-few-public-meth
         self._token_retriever = token_retriever
 
     def signed_session(self):
-        session = super(AdalAuthentication, self).signed_session()
+        session = get_pooled_session()
 
         try:
-            scheme, token = self._token_retriever()
+            with request_timing.measure(request_timing.AUTH_HOST, 'get token'):
+                scheme, token = self._token_retriever()
         except adal.AdalError as err:
             # pylint: disable=no-member
             if (hasattr(err, 'error_response') and
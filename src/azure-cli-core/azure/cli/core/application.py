@@ -3,17 +3,21 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
-from collections import defaultdict
+import logging
 import sys
 import os
+import threading
 import uuid
 import argparse
 from azure.cli.core.parser import AzCliCommandParser, enable_autocomplete
-from azure.cli.core._output import CommandResultItem
+from azure.cli.core._output import CommandResultItem, OutputProducer, StreamingResult
 import azure.cli.core.extensions
+from azure.cli.core.extensions.transform import add_resource_group
 import azure.cli.core._help as _help
 import azure.cli.core.azlogging as azlogging
-from azure.cli.core._util import todict, truncate_text, CLIError, read_file_content
+import azure.cli.core.profiler as profiler
+from azure.cli.core._util import (todict, truncate_text, CLIError, read_file_content,
+                                  handle_exception)
 from azure.cli.core._config import az_config
 
 import azure.cli.core.telemetry as telemetry
@@ -22,6 +26,13 @@ logger = azlogging.get_az_logger(__name__)
 
 ARGCOMPLETE_ENV_NAME = '_ARGCOMPLETE'
 
+_COMMAND_LOAD_LOCK = threading.RLock()
+
+
+def _todict(result):
+    # the resource group of the resources is added in the same pass
+    return todict(result, add_resource_group)
+
 
 class Configuration(object):  # pylint: disable=too-few-public-methods
     """The configuration object tracks session specific data such
@@ -31,14 +42,22 @@ class Configuration(object):  # pylint: disable=too-few-public-methods
     def __init__(self, argv):
         self.argv = argv or sys.argv[1:]
         self.output_format = None
+        self.max_parallel = 1
 
     def get_command_table(self):  # pylint: disable=no-self-use
         import azure.cli.core.commands as commands
-        # Find the first noun on the command line and only load commands from that
-        # module to improve startup time.
-        for a in self.argv:
+        # Find the nouns on the command line and only load commands from the module(s)
+        # registering them to improve startup time.
+        for index, a in enumerate(self.argv):
             if not a.startswith('-'):
-                return commands.get_command_table(a)
+                if a.lower() == 'help':
+                    break
+                nouns = []
+                for noun in self.argv[index:]:
+                    if noun.startswith('-'):
+                        break
+                    nouns.append(noun)
+                return commands.get_command_table(a, command_name=' '.join(nouns))
         # No noun found, so load all commands.
         return commands.get_command_table()
 
@@ -57,16 +76,16 @@ class Application(object):
     COMMAND_TABLE_LOADED = 'CommandTable.Loaded'
     COMMAND_TABLE_PARAMS_LOADED = 'CommandTableParams.Loaded'
 
+    EVENTS = (TRANSFORM_RESULT, FILTER_RESULT, GLOBAL_PARSER_CREATED, COMMAND_PARSER_LOADED,
+              COMMAND_PARSER_PARSED, COMMAND_TABLE_LOADED, COMMAND_TABLE_PARAMS_LOADED)
+
     def __init__(self, config=None):
-        self._event_handlers = defaultdict(lambda: [])
-        self.session = {
-            'headers': {
-                'x-ms-client-request-id': str(uuid.uuid1())
-            },
-            'command': 'unknown',
-            'completer_active': ARGCOMPLETE_ENV_NAME in os.environ,
-            'query_active': False
-        }
+        # register and remove replace the handler list of an event instead of changing it, so
+        # raise_event can iterate over it without copying even if a handler (un)registers
+        self._event_handlers = {name: [] for name in self.EVENTS}
+        self._session = None
+        self._thread_local = threading.local()
+        self.reset_session()
 
         # Register presence of and handlers for global parameters
         self.register(self.GLOBAL_PARSER_CREATED, Application._register_builtin_arguments)
@@ -86,11 +105,158 @@ class Application(object):
     def initialize(self, configuration):
         self.configuration = configuration
 
-    def execute(self, unexpanded_argv):  # pylint: disable=too-many-statements
+    @property
+    def session(self):
+        return getattr(self._thread_local, 'session', None) or self._session
+
+    @session.setter
+    def session(self, value):
+        self._session = value
+
+    def reset_session(self):
+        '''Start a new session, e.g. for each request handled by a long running process.
+        '''
+        self.session = Application._create_session()
+
+    def use_thread_session(self, session):
+        '''Use `session` instead of the shared session on the calling thread, so commands
+        running concurrently on other threads send their own headers. Pass None to stop.
+        '''
+        self._thread_local.session = session
+
+    @staticmethod
+    def _create_session():
+        return {
+            'headers': {
+                'x-ms-client-request-id': str(uuid.uuid1())
+            },
+            'command': 'unknown',
+            'completer_active': ARGCOMPLETE_ENV_NAME in os.environ,
+            'query_active': False,
+            'stream_results': False
+        }
+
+    def execute(self, unexpanded_argv):
         argv = Application._expand_file_prefixed_files(unexpanded_argv)
-        command_table = self.configuration.get_command_table()
+        # Loading commands and parsing update module level state shared by all applications, so
+        # concurrently executing applications take turns up to the point the handler runs.
+        with _COMMAND_LOAD_LOCK:
+            command_table, args = self._load_and_parse(argv)
+        if args is None:
+            return None
+
+        expanded_args = list(_explode_list_args(args))
+        # The pages of a single list command are written as they arrive when the output format
+        # can be written item by item
+        self.session['stream_results'] = len(expanded_args) == 1 and \
+            OutputProducer.can_stream(self.configuration.output_format)
+
+        exit_code = 0
+        max_parallel = self.configuration.max_parallel
+        if len(expanded_args) > 1 and max_parallel > 1:
+            results, exit_code = self._execute_concurrently(expanded_args, unexpanded_argv,
+                                                            max_parallel)
+        else:
+            results = []
+            for expanded_arg in expanded_args:
+                self._validate_arguments(expanded_arg)
+                results.append(self._execute_expanded(expanded_arg, unexpanded_argv))
+
+        if len(expanded_args) == 1:
+            results = results[0]
+
+        event_data = {'result': results}
+        self.raise_event(self.TRANSFORM_RESULT, event_data=event_data)
+        self.raise_event(self.FILTER_RESULT, event_data=event_data)
+
+        return CommandResultItem(event_data['result'],
+                                 table_transformer=command_table[args.command].table_transformer,
+                                 is_query_active=self.session['query_active'],
+                                 exit_code=exit_code)
+
+    def _validate_arguments(self, expanded_arg):
+        try:
+            _validate_arguments(expanded_arg)
+        except CLIError:
+            raise
+        except:  # pylint: disable=bare-except
+            err = sys.exc_info()[1]
+            getattr(expanded_arg, '_parser', self.parser).validation_error(str(err))
+
+    def _execute_expanded(self, expanded_arg, unexpanded_argv):
+        self.session['command'] = expanded_arg.command
+
+        # Consider - we are using any args that start with an underscore (_) as 'private'
+        # arguments and remove them from the arguments that we pass to the actual function.
+        # This does not feel quite right.
+        params = dict([(key, value)
+                       for key, value in expanded_arg.__dict__.items()
+                       if not key.startswith('_')])
+        params.pop('subcommand', None)
+        params.pop('func', None)
+        params.pop('command', None)
+
+        telemetry.set_command_details(expanded_arg.command,
+                                      self.configuration.output_format,
+                                      [p for p in unexpanded_argv if p.startswith('-')])
+
+        with profiler.span(expanded_arg.command, 'command'):
+            result = expanded_arg.func(params)
+        if isinstance(result, StreamingResult):
+            return result.map(_todict)
+        with profiler.span('todict', 'result'):
+            return _todict(result)
+
+    def _execute_concurrently(self, expanded_args, unexpanded_argv, max_parallel):
+        """ Runs the invocations of a command for the values of its IterateValue arguments, e.g.
+        for each of the --ids, on up to max_parallel threads. A failed invocation is reported
+        without stopping the others. Returns the results in the order of the values and the
+        exit code. """
+        from multiprocessing.pool import ThreadPool
+
+        # Invalid arguments stop the command before anything runs, as they do one at a time
+        for expanded_arg in expanded_args:
+            self._validate_arguments(expanded_arg)
+        session = self.session
+
+        def _execute(expanded_arg):
+            # the worker threads send the headers of the command, e.g. its request id
+            self.use_thread_session(session)
+            try:
+                result = self._execute_expanded(expanded_arg, unexpanded_argv)
+                # The items of streamed list results are fetched here, within the error handling
+                return (list(result) if isinstance(result, StreamingResult) else result), None
+            except Exception as ex:  # pylint: disable=broad-except
+                return None, ex
+            finally:
+                self.use_thread_session(None)
+
+        pool = ThreadPool(min(len(expanded_args), max_parallel))
+        try:
+            # map keeps the results in the order of the values
+            outcomes = pool.map(_execute, expanded_args)
+        finally:
+            pool.close()
+            pool.join()
+
+        results = []
+        exit_code = 0
+        for expanded_arg, (result, error) in zip(expanded_args, outcomes):
+            if error is None:
+                results.append(result)
+                continue
+            logger.error('Failed for %s:', _get_iterated_values_text(expanded_arg))
+            exit_code = handle_exception(error) or exit_code
+        if exit_code:
+            logger.error('%d of %d invocations failed.', len(expanded_args) - len(results),
+                         len(expanded_args))
+        return results, exit_code
+
+    def _load_and_parse(self, argv):
+        with profiler.span('get_command_table', 'load'):
+            command_table = self.configuration.get_command_table()
         self.raise_event(self.COMMAND_TABLE_LOADED, command_table=command_table)
-        self.parser.load_command_table(command_table)
+        self.parser.load_command_table(command_table, lazy=True)
         self.raise_event(self.COMMAND_PARSER_LOADED, parser=self.parser)
 
         if len(argv) == 0:
@@ -102,7 +268,7 @@ class Application(object):
             telemetry.set_command_details('az')
             telemetry.set_success(summary='welcome')
 
-            return None
+            return command_table, None
 
         if argv[0].lower() == 'help':
             argv[0] = '--help'
@@ -119,62 +285,34 @@ class Application(object):
         command = ' '.join(nouns)
 
         if argv[-1] in ('--help', '-h') or command in command_table:
-            self.configuration.load_params(command)
+            with profiler.span('load_params', 'load', command=command):
+                self.configuration.load_params(command)
             self.raise_event(self.COMMAND_TABLE_PARAMS_LOADED, command_table=command_table)
-            self.parser.load_command_table(command_table)
+            self.parser.load_command_table(command_table, lazy=True)
 
         if self.session['completer_active']:
             enable_autocomplete(self.parser)
 
-        args = self.parser.parse_args(argv)
+        with profiler.span('parse_args', 'parse'):
+            args = self.parser.parse_args(argv)
 
         self.raise_event(self.COMMAND_PARSER_PARSED, command=args.command, args=args)
-        results = []
-        for expanded_arg in _explode_list_args(args):
-            self.session['command'] = expanded_arg.command
-            try:
-                _validate_arguments(expanded_arg)
-            except CLIError:
-                raise
-            except:  # pylint: disable=bare-except
-                err = sys.exc_info()[1]
-                getattr(expanded_arg, '_parser', self.parser).validation_error(str(err))
-
-            # Consider - we are using any args that start with an underscore (_) as 'private'
-            # arguments and remove them from the arguments that we pass to the actual function.
-            # This does not feel quite right.
-            params = dict([(key, value)
-                           for key, value in expanded_arg.__dict__.items()
-                           if not key.startswith('_')])
-            params.pop('subcommand', None)
-            params.pop('func', None)
-            params.pop('command', None)
-
-            telemetry.set_command_details(expanded_arg.command,
-                                          self.configuration.output_format,
-                                          [p for p in unexpanded_argv if p.startswith('-')])
-
-            result = expanded_arg.func(params)
-            result = todict(result)
-            results.append(result)
-
-        if len(results) == 1:
-            results = results[0]
-
-        event_data = {'result': results}
-        self.raise_event(self.TRANSFORM_RESULT, event_data=event_data)
-        self.raise_event(self.FILTER_RESULT, event_data=event_data)
-
-        return CommandResultItem(event_data['result'],
-                                 table_transformer=command_table[args.command].table_transformer,
-                                 is_query_active=self.session['query_active'])
+        return command_table, args
 
     def raise_event(self, name, **kwargs):
         '''Raise the event `name`.
         '''
-        data = truncate_text(str(kwargs), width=500)
-        logger.debug("Application event '%s' with event data %s", name, data)
-        for func in list(self._event_handlers[name]):  # Make copy in case handler modifies the list
+        if logger.isEnabledFor(logging.DEBUG):
+            # only format the event data, e.g. the command table or the result, when it is logged
+            logger.debug("Application event '%s' with event data %s", name,
+                         truncate_text(str(kwargs), width=500))
+        handlers = self._event_handlers.get(name, ())
+        if profiler.is_enabled():
+            with profiler.span(name, 'event'):
+                for func in handlers:
+                    profiler.timed(func, 'event', event=name)(**kwargs)
+            return
+        for func in handlers:
             func(**kwargs)
 
     def register(self, name, handler):
@@ -186,7 +324,7 @@ class Application(object):
           name: name of the event raised
           event_data: `dict` with event specific data.
         '''
-        self._event_handlers[name].append(handler)
+        self._event_handlers[name] = self._event_handlers.get(name, []) + [handler]
         logger.debug("Registered application event handler '%s' at %s", name, handler)
 
     def remove(self, name, handler):
@@ -198,14 +336,16 @@ class Application(object):
           name: name of the event raised
           event_data: `dict` with event specific data.
         '''
-        self._event_handlers[name].remove(handler)
+        handlers = list(self._event_handlers.get(name, []))
+        handlers.remove(handler)
+        self._event_handlers[name] = handlers
         logger.debug("Removed application event handler '%s' at %s", name, handler)
 
     @staticmethod
     def _register_builtin_arguments(**kwargs):
         global_group = kwargs['global_group']
         global_group.add_argument('--output', '-o', dest='_output_format',
-                                  choices=['json', 'tsv', 'table', 'jsonc'],
+                                  choices=['json', 'tsv', 'table', 'jsonc', 'jsonl'],
                                   default=az_config.get('core', 'output', fallback='json'),
                                   help='Output format',
                                   type=str.lower)
@@ -214,6 +354,13 @@ class Application(object):
                                   help='Increase logging verbosity. Use --debug for full debug logs.')  # pylint: disable=line-too-long
         global_group.add_argument('--debug', dest='_log_verbosity_debug', action='store_true',
                                   help='Increase logging verbosity to show all debug logs.')
+        global_group.add_argument('--max-parallel', dest='_max_parallel', type=int,
+                                  default=az_config.getint('core', 'max_parallel', fallback=1),
+                                  help='Maximum number of the invocations of a command for '
+                                       'several --ids to run at the same time.')
+        global_group.add_argument('--timing', dest='_timing', action='store_true',
+                                  help='Show the number and latency of the requests sent, by host '
+                                       'and operation, when the command is done.')
 
     @staticmethod
     def _maybe_load_file(arg):
@@ -255,11 +402,13 @@ class Application(object):
         args = kwargs['args']
         self.configuration.output_format = args._output_format  # pylint: disable=protected-access
         del args._output_format
+        self.configuration.max_parallel = args._max_parallel  # pylint: disable=protected-access
+        del args._max_parallel
 
 
 def _validate_arguments(args, **_):
     for validator in getattr(args, '_validators', []):
-        validator(args)
+        profiler.timed(validator, 'validator')(args)
     try:
         delattr(args, '_validators')
     except AttributeError:
@@ -275,7 +424,7 @@ def _explode_list_args(args):
     '''
     list_args = {argname: argvalue for argname, argvalue in vars(args).items()
                  if isinstance(argvalue, IterateValue)}
-    if not list_args:
+    if not list_args or getattr(args, '_handles_iterate_values', False):
         yield args
     else:
         values = list(zip(*list_args.values()))
@@ -286,9 +435,15 @@ def _explode_list_args(args):
             new_ns = argparse.Namespace(**vars(args))
             for key_index, key in enumerate(list_args.keys()):
                 setattr(new_ns, key, value[key_index])
+            new_ns._iterated_values = dict(zip(list_args.keys(), value))  # pylint: disable=protected-access
             yield new_ns
 
 
+def _get_iterated_values_text(args):
+    iterated_values = getattr(args, '_iterated_values', {})
+    return ', '.join('{}={}'.format(k, iterated_values[k]) for k in sorted(iterated_values))
+
+
 class IterateAction(argparse.Action):  # pylint: disable=too-few-public-methods
     '''Action used to collect argument values in an IterateValue list
     The application will loop through each value in the IterateValue
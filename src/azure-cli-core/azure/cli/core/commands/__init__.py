@@ -6,8 +6,9 @@
 from __future__ import print_function
 
 import json
-import pkgutil
+import logging
 import re
+import threading
 import time
 import timeit
 import traceback
@@ -17,13 +18,19 @@ from six import string_types
 
 import azure.cli.core.azlogging as azlogging
 import azure.cli.core.telemetry as telemetry
+import azure.cli.core.profiler as profiler
 from azure.cli.core._util import CLIError
 from azure.cli.core.application import APPLICATION
+from azure.cli.core._output import StreamingResult
 from azure.cli.core.prompting import prompt_y_n, NoTTYException
 from azure.cli.core._config import az_config
+from azure.cli.core.help_files import compile_help_index
 
-from ._introspection import (extract_args_from_signature,
-                             extract_full_summary_from_signature)
+from ._introspection import (extract_args_from_operation,
+                             extract_full_summary_from_operation)
+from ._command_index import (get_installed_command_modules, get_index_version, is_index_enabled,
+                             is_index_available, is_index_current, is_command_indexed,
+                             resolve_command_modules, rebuild_index)
 
 logger = azlogging.get_az_logger(__name__)
 
@@ -34,6 +41,8 @@ CONFIRM_PARAM_NAME = 'yes'
 
 BLACKLISTED_MODS = ['context']
 
+_NO_ITEM = object()
+
 
 class CliArgumentType(object):
     REMOVE = '---REMOVE---'
@@ -85,35 +94,71 @@ class CliCommandArgument(object):
         self.type.settings[name] = value
 
 
+def _get_poller_response_content(poller):
+    response = getattr(poller, '_response', None)
+    return json.loads(response.__dict__['_content']) if response is not None else {}
+
+
+def _get_correlation_message(poller):
+    try:
+        correlation_id = _get_poller_response_content(poller)['properties']['correlationId']
+        return 'Correlation ID: {}'.format(correlation_id)
+    except:  # pylint: disable=bare-except
+        return ''
+
+
+def _log_poller_status(start_msg, poller):
+    try:
+        content = _get_poller_response_content(poller)
+        status = content.get('status') or content['properties']['provisioningState']
+    except:  # pylint: disable=bare-except
+        return
+    logger.debug("Long running operation '%s' status: %s", start_msg, status)
+
+
 class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
 
-    def __init__(self, start_msg='', finish_msg='', poller_done_interval_ms=1000.0):
+    def __init__(self, start_msg='', finish_msg='', poller_done_interval_ms=None):
         self.start_msg = start_msg
         self.finish_msg = finish_msg
+        # By default the interval grows like the one between the status requests of the poller
         self.poller_done_interval_ms = poller_done_interval_ms
 
-    def _delay(self):
-        time.sleep(self.poller_done_interval_ms / 1000.0)
+    def _delay(self, done, seconds):  # pylint: disable=no-self-use
+        # returns as soon as the operation is done
+        if done is None:
+            time.sleep(seconds)
+        else:
+            done.wait(seconds)
 
     def __call__(self, poller):
         from msrest.exceptions import ClientException
+        from ._polling import get_polling_policy, apply_polling_policy
         logger.info("Starting long running operation '%s'", self.start_msg)
-        correlation_message = ''
-        while not poller.done():
+        policy = get_polling_policy()
+        apply_polling_policy(poller, policy)
+        done = None
+        if hasattr(poller, 'add_done_callback'):
+            done = threading.Event()
             try:
-                # pylint: disable=protected-access
-                correlation_id = json.loads(
-                    poller._response.__dict__['_content'])['properties']['correlationId']
-
-                correlation_message = 'Correlation ID: {}'.format(correlation_id)
-            except:  # pylint: disable=bare-except
-                pass
-
+                poller.add_done_callback(lambda _: done.set())
+            except ValueError:
+                done.set()
+        attempt = 0
+        while not poller.done() and not (done and done.is_set()):
+            attempt += 1
+            if self.poller_done_interval_ms is not None:
+                seconds = self.poller_done_interval_ms / 1000.0
+            else:
+                seconds = policy.get_interval(attempt)
             try:
-                self._delay()
+                self._delay(done, seconds)
             except KeyboardInterrupt:
-                logger.error('Long running operation wait cancelled.  %s', correlation_message)
+                logger.error('Long running operation wait cancelled.  %s',
+                             _get_correlation_message(poller))
                 raise
+            if logger.isEnabledFor(logging.DEBUG):
+                _log_poller_status(self.start_msg, poller)
         try:
             result = poller.result()
         except ClientException as client_exception:
@@ -130,7 +175,7 @@ class LongRunningOperation(object):  # pylint: disable=too-few-public-methods
             except:  # pylint: disable=bare-except
                 pass
 
-            cli_error = CLIError('{}  {}'.format(message, correlation_message))
+            cli_error = CLIError('{}  {}'.format(message, _get_correlation_message(poller)))
             # capture response for downstream commands (webapp) to dig out more details
             setattr(cli_error, 'response', getattr(client_exception, 'response', None))
             raise cli_error
@@ -186,7 +231,12 @@ class CliCommand(object):  # pylint:disable=too-many-instance-attributes
             else description
         self.arguments = {}
         self.arguments_loader = arguments_loader
+        # Commands without a loader get their arguments through add_argument
+        self.arguments_loaded = arguments_loader is None
         self.table_transformer = table_transformer
+        # The handler gets the values of IterateValue arguments, e.g. of --ids, as lists,
+        # instead of being invoked once per value
+        self.handles_iterate_values = False
 
     @staticmethod
     def _should_load_description():
@@ -195,6 +245,7 @@ class CliCommand(object):  # pylint:disable=too-many-instance-attributes
     def load_arguments(self):
         if self.arguments_loader:
             self.arguments.update(self.arguments_loader())
+        self.arguments_loaded = True
 
     def add_argument(self, param_name, *option_strings, **kwargs):
         dest = kwargs.pop('dest', None)
@@ -231,15 +282,46 @@ def load_params(command):
     _update_command_definitions(command_table)
 
 
-def get_command_table(module_name=None):
+def _load_command_module(mod):
+    with profiler.span(mod, 'module'):
+        import_module('azure.cli.command_modules.' + mod).load_commands()
+
+
+def get_command_table(module_name=None, command_name=None):
     '''Loads command table(s)
+    When `command_name` is specified and the command index knows it, only the modules that
+    register the command (or command group) are loaded. The installed modules are only checked
+    against the index when it doesn't know the command, and all modules are loaded and the index
+    rebuilt when they changed.
     When `module_name` is specified, only commands from that module will be loaded.
-    If the module is not found, all commands are loaded.
+    If the module is not found, all commands are loaded and the command index is rebuilt.
     '''
+    installed_command_modules = None
+    index_version = None
     loaded = False
-    if module_name and module_name != 'acs' and module_name not in BLACKLISTED_MODS:
+    if command_name and is_index_available():
+        modules_to_load = resolve_command_modules(command_name)
+        if not is_command_indexed(command_name):
+            # the command may come from a module installed or changed since the index was built
+            installed_command_modules = get_installed_command_modules(BLACKLISTED_MODS)
+            index_version = get_index_version(installed_command_modules)
+            if not is_index_current(index_version):
+                logger.debug("Command index is outdated. Loading all modules.")
+                modules_to_load = None
+        if modules_to_load is not None:
+            logger.debug("Command index resolved '%s' to modules %s.", command_name,
+                         modules_to_load)
+            try:
+                for mod in modules_to_load:
+                    _load_command_module(mod)
+                loaded = True
+            except Exception:  # pylint: disable=broad-except
+                logger.debug("Unable to load modules from the command index. Loading all modules.")
+                logger.debug(traceback.format_exc())
+    elif module_name and not is_index_enabled() and module_name != 'acs' \
+            and module_name not in BLACKLISTED_MODS:
         try:
-            import_module('azure.cli.command_modules.' + module_name).load_commands()
+            _load_command_module(module_name)
             logger.debug("Successfully loaded command table from module '%s'.", module_name)
             loaded = True
         except ImportError:
@@ -247,20 +329,16 @@ def get_command_table(module_name=None):
         except Exception:  # pylint: disable=broad-except
             pass
     if not loaded:
-        installed_command_modules = []
-        try:
-            mods_ns_pkg = import_module('azure.cli.command_modules')
-            installed_command_modules = [modname for _, modname, _ in
-                                         pkgutil.iter_modules(mods_ns_pkg.__path__)
-                                         if modname not in BLACKLISTED_MODS]
-        except ImportError:
-            pass
-        logger.debug('Installed command modules %s', installed_command_modules)
+        if installed_command_modules is None:
+            installed_command_modules = get_installed_command_modules(BLACKLISTED_MODS)
+        if index_version is None and is_index_enabled():
+            index_version = get_index_version(installed_command_modules)
+        logger.debug('Installed command modules %s', [mod for mod, _ in installed_command_modules])
         cumulative_elapsed_time = 0
-        for mod in installed_command_modules:
+        for mod, _ in installed_command_modules:
             try:
                 start_time = timeit.default_timer()
-                import_module('azure.cli.command_modules.' + mod).load_commands()
+                _load_command_module(mod)
                 elapsed_time = timeit.default_timer() - start_time
                 logger.debug("Loaded module '%s' in %.3f seconds.", mod, elapsed_time)
                 cumulative_elapsed_time += elapsed_time
@@ -274,6 +352,8 @@ def get_command_table(module_name=None):
         logger.debug("Loaded all modules in %.3f seconds. "
                      "(note: there's always an overhead with the first module loaded)",
                      cumulative_elapsed_time)
+        rebuild_index(index_version, command_module_map)
+        compile_help_index()
     _update_command_definitions(command_table)
     ordered_commands = OrderedDict(command_table)
     return ordered_commands
@@ -320,9 +400,7 @@ def create_command(module_name, name, operation,
 
     def _execute_command(kwargs):
         from msrest.paging import Paged
-        from msrest.exceptions import ClientException
         from msrestazure.azure_operation import AzureOperationPoller
-        from azure.common import AzureException
 
         if confirmation \
             and not kwargs.get(CONFIRM_PARAM_NAME) \
@@ -346,37 +424,66 @@ def create_command(module_name, name, operation,
             if isinstance(result, AzureOperationPoller):
                 return LongRunningOperation('Starting {}'.format(name))(result)
             elif isinstance(result, Paged):
+                if APPLICATION.session.get('stream_results'):
+                    return StreamingResult(_stream_paged(result))
                 return list(result)
             else:
                 return result
-        except ClientException as client_exception:
+        except Exception as ex:  # pylint: disable=broad-except
+            _raise_cli_error(ex)
+            raise
+
+    def _stream_paged(paged):
+        # The first page is requested here so that most errors surface before any output
+        items = iter(paged)
+        try:
+            first = next(items, _NO_ITEM)
+        except Exception as ex:  # pylint: disable=broad-except
+            _raise_cli_error(ex)
+            raise
+        if first is _NO_ITEM:
+            return
+        yield first
+        try:
+            for item in items:
+                yield item
+        except Exception as ex:  # pylint: disable=broad-except
+            _raise_cli_error(ex)
+            raise
+
+    def _raise_cli_error(ex):
+        """ Raises the CLIError to report for an exception of the SDKs. Returns for other
+        exceptions. """
+        from msrest.exceptions import ClientException
+        from azure.common import AzureException
+        if isinstance(ex, ClientException):
             fault_type = name.replace(' ', '-') + '-client-error'
-            telemetry.set_exception(client_exception, fault_type=fault_type,
+            telemetry.set_exception(ex, fault_type=fault_type,
                                     summary='Unexpected client exception during command creation')
-            message = getattr(client_exception, 'message', client_exception)
+            message = getattr(ex, 'message', ex)
             raise _polish_rp_not_registerd_error(CLIError(message))
-        except AzureException as azure_exception:
+        elif isinstance(ex, AzureException):
             fault_type = name.replace(' ', '-') + '-service-error'
-            telemetry.set_exception(azure_exception, fault_type=fault_type,
+            telemetry.set_exception(ex, fault_type=fault_type,
                                     summary='Unexpected azure exception during command creation')
-            message = re.search(r"([A-Za-z\t .])+", str(azure_exception))
-            raise CLIError('\n{}'.format(message.group(0) if message else str(azure_exception)))
-        except ValueError as value_error:
+            message = re.search(r"([A-Za-z\t .])+", str(ex))
+            raise CLIError('\n{}'.format(message.group(0) if message else str(ex)))
+        elif isinstance(ex, ValueError):
             fault_type = name.replace(' ', '-') + '-value-error'
-            telemetry.set_exception(value_error, fault_type=fault_type,
+            telemetry.set_exception(ex, fault_type=fault_type,
                                     summary='Unexpected value exception during command creation')
-            raise CLIError(value_error)
-        except CLIError as cli_error:
-            raise _polish_rp_not_registerd_error(cli_error)
+            raise CLIError(ex)
+        elif isinstance(ex, CLIError):
+            raise _polish_rp_not_registerd_error(ex)
 
     command_module_map[name] = module_name
     name = ' '.join(name.split())
 
     def arguments_loader():
-        return extract_args_from_signature(get_op_handler(operation), no_wait_param=no_wait_param)
+        return extract_args_from_operation(operation, no_wait_param=no_wait_param)
 
     def description_loader():
-        return extract_full_summary_from_signature(get_op_handler(operation))
+        return extract_full_summary_from_operation(operation)
 
     cmd = CliCommand(name, _execute_command, table_transformer=table_transformer,
                      arguments_loader=arguments_loader, description_loader=description_loader)
@@ -426,24 +533,58 @@ def _get_cli_argument(command, argname):
 
 
 def _get_cli_extra_arguments(command):
-    return _cli_extra_argument_registry[command].items()
+    return _cli_extra_argument_registry.get(command, {}).items()
+
+
+class _ArgumentScope(object):
+    def __init__(self):
+        self.arguments = {}
+        self.children = {}
 
 
 class _ArgumentRegistry(object):
+    """Argument overrides by scope, stored as a trie of the words of the scope.
+
+    The scopes that apply to a command are the nodes on the path of its words, from the global
+    scope '' to the command itself. The path is cached per command; registering a new scope
+    clears the cache as it may add a node to the path of any command.
+    """
+
     def __init__(self):
-        self.arguments = defaultdict(lambda: {})
+        self.root = _ArgumentScope()
+        self._scope_paths = {}
 
     def register_cli_argument(self, scope, dest, argtype, **kwargs):
         argument = CliArgumentType(overrides=argtype,
                                    **kwargs)
-        self.arguments[scope][dest] = argument
+        node = self.root
+        for word in scope.split():
+            child = node.children.get(word)
+            if child is None:
+                child = node.children[word] = _ArgumentScope()
+                self._scope_paths.clear()
+            node = child
+        node.arguments[dest] = argument
+
+    def _get_scope_path(self, command):
+        try:
+            return self._scope_paths[command]
+        except KeyError:
+            pass
+        path = [self.root]
+        node = self.root
+        for word in command.split():
+            node = node.children.get(word)
+            if node is None:
+                break
+            path.append(node)
+        self._scope_paths[command] = path
+        return path
 
     def get_cli_argument(self, command, name):
-        parts = command.split()
         result = CliArgumentType()
-        for index in range(0, len(parts) + 1):
-            probe = ' '.join(parts[0:index])
-            override = self.arguments.get(probe, {}).get(name, None)
+        for node in self._get_scope_path(command):
+            override = node.arguments.get(name, None)
             if override:
                 result.update(override)
         return result
@@ -455,6 +596,9 @@ _cli_extra_argument_registry = defaultdict(lambda: {})
 
 def _update_command_definitions(command_table_to_update):
     for command_name, command in command_table_to_update.items():
+        # Definitions of the other commands are resolved once load_params loads their arguments
+        if not command.arguments_loaded:
+            continue
         for argument_name in command.arguments:
             overrides = _get_cli_argument(command_name, argument_name)
             command.update_argument(argument_name, overrides)
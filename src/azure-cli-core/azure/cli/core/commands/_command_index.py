@@ -0,0 +1,136 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import pkgutil
+from collections import defaultdict
+from importlib import import_module
+
+from azure.cli.core import __version__ as core_version
+from azure.cli.core._session import INDEX
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
+
+COMMAND_MODULE_PREFIX = 'azure.cli.command_modules.'
+REBUILD_COMMAND_INDEX_FLAG = '--rebuild-command-index'
+
+_INDEX_VERSION = 'version'
+_INDEX_CORE_VERSION = 'coreVersion'
+_INDEX_COMMANDS = 'commands'
+
+
+def get_installed_command_modules(blacklisted_mods=None):
+    """ Returns (name, path) for every package under azure.cli.command_modules """
+    blacklisted_mods = blacklisted_mods or []
+    try:
+        mods_ns_pkg = import_module('azure.cli.command_modules')
+    except ImportError:
+        return []
+    installed = []
+    for finder, modname, _ in pkgutil.iter_modules(mods_ns_pkg.__path__):
+        if modname not in blacklisted_mods:
+            installed.append((modname, os.path.join(getattr(finder, 'path', ''), modname)))
+    return installed
+
+
+def _get_module_stamp(path):
+    """ The latest modification time of the folder of a command module and its source files.
+    Installing a component rewrites the files, and editing a module in place changes the file
+    edited, so the stamp identifies the commands a module registers without querying pip.
+    """
+    try:
+        mtimes = [os.stat(path).st_mtime]
+        for name in os.listdir(path):
+            if name.endswith('.py'):
+                mtimes.append(os.stat(os.path.join(path, name)).st_mtime)
+    except OSError:
+        return 0
+    return int(max(mtimes) * 1000)
+
+
+def get_index_version(installed_command_modules):
+    """ Builds a key that changes whenever a command module is added, removed, reinstalled or
+    edited. Computing it stats the files of every module, so it is only checked when the index
+    doesn't know a command.
+    """
+    parts = ['core={}'.format(core_version)]
+    for modname, path in sorted(installed_command_modules):
+        parts.append('{}={}'.format(modname, _get_module_stamp(path)))
+    return ';'.join(parts)
+
+
+def is_index_enabled():
+    return bool(INDEX.filename)
+
+
+def is_index_current(version):
+    return is_index_enabled() and INDEX.get(_INDEX_VERSION) == version
+
+
+def is_index_available():
+    """ Whether an index was built for this version of the core. The installed modules are not
+    checked, as the commands the index knows are looked up without that cost. """
+    return is_index_enabled() and bool(INDEX.get(_INDEX_VERSION)) and \
+        INDEX.get(_INDEX_CORE_VERSION) == core_version
+
+
+def is_command_indexed(command_name):
+    """ Whether the index knows `command_name` itself, rather than only a group containing it """
+    return ' '.join(command_name.split()) in (INDEX.get(_INDEX_COMMANDS) or {})
+
+
+def resolve_command_modules(command_name):
+    """ Returns the names of the command modules which register the longest known prefix of
+    `command_name`. An empty list means no installed module knows the command.
+    """
+    indexed_commands = INDEX.get(_INDEX_COMMANDS) or {}
+    nouns = command_name.split()
+    for length in range(len(nouns), 0, -1):
+        modules = indexed_commands.get(' '.join(nouns[0:length]))
+        if modules:
+            return modules
+    return []
+
+
+def rebuild_index(version, command_module_map):
+    """ Persists the command/group prefix -> owning command modules mapping """
+    if not is_index_enabled():
+        return
+    commands = defaultdict(set)
+    for command_name, module_name in command_module_map.items():
+        if not module_name.startswith(COMMAND_MODULE_PREFIX):
+            continue
+        modname = module_name[len(COMMAND_MODULE_PREFIX):].split('.')[0]
+        nouns = command_name.split()
+        for length in range(1, len(nouns) + 1):
+            commands[' '.join(nouns[0:length])].add(modname)
+    commands = {name: sorted(modules) for name, modules in commands.items()}
+    if INDEX.get(_INDEX_VERSION) == version and INDEX.get(_INDEX_COMMANDS) == commands and \
+            INDEX.get(_INDEX_CORE_VERSION) == core_version:
+        return
+    logger.debug('Rebuilding command index with %d entries.', len(commands))
+    with INDEX.transaction():
+        INDEX[_INDEX_VERSION] = version
+        INDEX[_INDEX_CORE_VERSION] = core_version
+        INDEX[_INDEX_COMMANDS] = commands
+
+
+def invalidate_index():
+    if INDEX.get(_INDEX_VERSION):
+        logger.debug('Command index invalidated.')
+        del INDEX[_INDEX_VERSION]
+
+
+def handle_rebuild_command_index_flag(argv):
+    """ Remove the maintenance switch from `argv` and invalidate the index so the command table
+    load of this invocation rebuilds it.
+    """
+    if REBUILD_COMMAND_INDEX_FLAG in argv:
+        while REBUILD_COMMAND_INDEX_FLAG in argv:
+            argv.remove(REBUILD_COMMAND_INDEX_FLAG)
+        invalidate_index()
+        return True
+    return False
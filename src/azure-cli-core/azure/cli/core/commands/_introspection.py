@@ -4,7 +4,20 @@
 # --------------------------------------------------------------------------------------------
 
 import inspect
+import json
+import os
 import re
+import sys
+
+from azure.cli.core import __version__ as core_version
+from azure.cli.core._session import METADATA
+
+_METADATA_VERSION = 'version'
+_METADATA_OPERATIONS = 'operations'
+_METADATA_SUMMARY = 'summary'
+
+_module_versions = {}
+_save_registered = False
 
 
 def extract_full_summary_from_signature(operation):
@@ -121,3 +134,91 @@ def extract_args_from_signature(operation, no_wait_param=None):
     if no_wait_param and not found_no_wait_param:
         raise ValueError("Command authoring error: unable to enable no-wait option. Operation '{}' "
                          "does not have a '{}' parameter.".format(operation, no_wait_param))
+
+
+def _find_module_source(module_name):
+    """ Locates the source file of a module on sys.path without importing it or its parents """
+    base = os.path.join(*module_name.split('.'))
+    for path in sys.path:
+        for candidate in (base + '.py', os.path.join(base, '__init__.py')):
+            candidate = os.path.join(path or os.getcwd(), candidate)
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def _get_module_version(module_name):
+    """ Installing or upgrading a package rewrites its files, so the modification time of the
+    module source identifies the installed version of the operation. """
+    try:
+        return _module_versions[module_name]
+    except KeyError:
+        pass
+    source = _find_module_source(module_name)
+    try:
+        version = int(os.stat(source).st_mtime) if source else None
+    except OSError:
+        version = None
+    _module_versions[module_name] = version
+    return version
+
+
+def _get_metadata_entry(operation):
+    """ Returns the cache entry of an operation path ('module#Class.method') or None when the
+    metadata cache is not available. Entries of an outdated module are discarded. """
+    if not METADATA.filename:
+        return None
+    version = _get_module_version(operation.split('#')[0])
+    if version is None:
+        return None
+    if METADATA.get(_METADATA_VERSION) != core_version:
+        METADATA.data = {_METADATA_VERSION: core_version, _METADATA_OPERATIONS: {}}
+    operations = METADATA.data.setdefault(_METADATA_OPERATIONS, {})
+    entry = operations.get(operation)
+    if not entry or entry.get(_METADATA_VERSION) != version:
+        entry = operations[operation] = {_METADATA_VERSION: version}
+    return entry
+
+
+def _store_metadata(entry, key, value):
+    """ Stores a JSON copy of `value` so later changes to the extracted objects do not leak into
+    the cache. Values which do not survive the round trip are not cached. """
+    global _save_registered  # pylint: disable=global-statement
+    try:
+        stored = json.loads(json.dumps(value))
+    except (TypeError, ValueError):
+        return
+    if stored != value:
+        return
+    entry[key] = stored
+    if not _save_registered:
+        import atexit
+        atexit.register(METADATA.save_with_retry)
+        _save_registered = True
+
+
+def extract_full_summary_from_operation(operation):
+    """ Same as extract_full_summary_from_signature for an operation path. The summary is served
+    from the metadata cache when possible, so the operation's module is not imported. """
+    from azure.cli.core.commands import get_op_handler
+    entry = _get_metadata_entry(operation)
+    if entry is not None and _METADATA_SUMMARY in entry:
+        return entry[_METADATA_SUMMARY]
+    summary = extract_full_summary_from_signature(get_op_handler(operation))
+    if entry is not None:
+        _store_metadata(entry, _METADATA_SUMMARY, summary)
+    return summary
+
+
+def extract_args_from_operation(operation, no_wait_param=None):
+    """ Same as extract_args_from_signature for an operation path. The argument definitions are
+    served from the metadata cache when possible, so the operation's module is not imported. """
+    from azure.cli.core.commands import CliCommandArgument, get_op_handler
+    entry = _get_metadata_entry(operation)
+    key = 'args:{}'.format(no_wait_param or '')
+    if entry is not None and key in entry:
+        return [(name, CliCommandArgument(**settings)) for name, settings in entry[key]]
+    args = list(extract_args_from_signature(get_op_handler(operation), no_wait_param))
+    if entry is not None:
+        _store_metadata(entry, key, [[name, arg.type.settings] for name, arg in args])
+    return args
@@ -0,0 +1,75 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Intervals between the status requests of long running operations.
+
+The policy is set with the 'polling' option in the 'core' section of the configuration
+(AZURE_CORE_POLLING), which 'az configure' asks for:
+
+adaptive (default): the status is requested 'polling_interval' seconds after the operation
+    started (AZURE_CORE_POLLING_INTERVAL, default 1), then at twice the previous interval, up to
+    'max_polling_interval' seconds (AZURE_CORE_MAX_POLLING_INTERVAL, default 30).
+fixed: the status is requested every 'max_polling_interval' seconds.
+
+Either way the interval given by the Retry-After header of the last response is used when
+the service sends one.
+"""
+
+import time
+
+from azure.cli.core._config import az_config
+from azure.cli.core._request_scheduler import get_retry_after
+
+ADAPTIVE_POLLING = 'adaptive'
+FIXED_POLLING = 'fixed'
+POLLING_POLICIES = (ADAPTIVE_POLLING, FIXED_POLLING)
+DEFAULT_POLLING_INTERVAL = 1
+DEFAULT_MAX_POLLING_INTERVAL = 30
+
+
+class PollingPolicy(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, adaptive=True, interval=DEFAULT_POLLING_INTERVAL,
+                 max_interval=DEFAULT_MAX_POLLING_INTERVAL):
+        self.adaptive = adaptive
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+
+    def get_interval(self, attempt):
+        """ Seconds to wait before the given status request (starting at 1) """
+        if not self.adaptive:
+            return self.max_interval
+        return min(self.max_interval, self.interval * 2 ** min(attempt - 1, 32))
+
+    def get_delay(self, attempt, headers=None):
+        """ Seconds to wait before the given status request, honouring Retry-After """
+        retry_after = get_retry_after(headers)
+        return self.get_interval(attempt) if retry_after is None else retry_after
+
+
+def get_polling_policy():
+    polling = az_config.get('core', 'polling', fallback=ADAPTIVE_POLLING).lower()
+    interval = az_config.getfloat('core', 'polling_interval', fallback=DEFAULT_POLLING_INTERVAL)
+    max_interval = az_config.getfloat('core', 'max_polling_interval',
+                                      fallback=DEFAULT_MAX_POLLING_INTERVAL)
+    return PollingPolicy(polling != FIXED_POLLING, interval, max_interval)
+
+
+def apply_polling_policy(poller, policy):
+    """ Makes an msrestazure AzureOperationPoller wait between its status requests as the policy
+    says. The poller requests the status in its own thread, which is sending the initial request
+    when the poller is returned by the SDK, so the first status request is affected as well. """
+    if not hasattr(poller, '_delay'):
+        return
+    attempts = [0]
+
+    def _delay():
+        response = poller._response  # pylint: disable=protected-access
+        if response is None:
+            return
+        attempts[0] += 1
+        time.sleep(policy.get_delay(attempts[0], response.headers))
+
+    poller._delay = _delay  # pylint: disable=protected-access
@@ -0,0 +1,89 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Resource types and api-versions of the resource providers, cached on disk.
+
+Commands which resolve the api-version of a generic resource only need the resource types of
+its provider, which rarely change. Entries are kept per cloud and subscription for the number of
+seconds set with the 'provider_cache_ttl' option in the 'core' section of the configuration
+(AZURE_CORE_PROVIDER_CACHE_TTL); 0 turns the cache off. `az provider cache refresh` reloads
+them on demand.
+"""
+
+import time
+
+from azure.cli.core._config import az_config
+from azure.cli.core._session import PROVIDERS
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
+
+DEFAULT_TTL = 24 * 60 * 60
+
+_ENTRY_RETRIEVED = 'retrievedOn'
+_ENTRY_RESOURCE_TYPES = 'resourceTypes'
+_RESOURCE_TYPE = 'resourceType'
+_API_VERSIONS = 'apiVersions'
+
+
+def get_provider_cache_ttl():
+    return az_config.getint('core', 'provider_cache_ttl', fallback=DEFAULT_TTL)
+
+
+def is_provider_cache_enabled():
+    return bool(PROVIDERS.filename) and get_provider_cache_ttl() > 0
+
+
+def _get_subscription_key(client):
+    from azure.cli.core.cloud import get_active_cloud
+    return '{}/{}'.format(get_active_cloud().name, client.config.subscription_id).lower()
+
+
+def _to_resource_types(provider):
+    return [{_RESOURCE_TYPE: t.resource_type, _API_VERSIONS: list(t.api_versions or [])}
+            for t in provider.resource_types or []]
+
+
+def _store_providers(subscription_key, providers, replace=False):
+    now = time.time()
+    with PROVIDERS.transaction():
+        entries = {} if replace else dict(PROVIDERS.get(subscription_key) or {})
+        for namespace, resource_types in providers:
+            entries[namespace.lower()] = {_ENTRY_RETRIEVED: now,
+                                          _ENTRY_RESOURCE_TYPES: resource_types}
+        PROVIDERS[subscription_key] = entries
+
+
+def get_provider_resource_types(client, namespace):
+    """ Returns the resource types of a provider as a list of dictionaries with the
+    'resourceType' and its 'apiVersions', using the cached copy while it is current.
+    `client` is a ResourceManagementClient of the subscription.
+    """
+    if not is_provider_cache_enabled():
+        return _to_resource_types(client.providers.get(namespace))
+
+    subscription_key = _get_subscription_key(client)
+    entry = (PROVIDERS.get(subscription_key) or {}).get(namespace.lower())
+    if entry and time.time() - entry.get(_ENTRY_RETRIEVED, 0) < get_provider_cache_ttl():
+        logger.debug('Using cached resource types of provider %s.', namespace)
+        return entry[_ENTRY_RESOURCE_TYPES]
+
+    resource_types = _to_resource_types(client.providers.get(namespace))
+    _store_providers(subscription_key, [(namespace, resource_types)])
+    return resource_types
+
+
+def refresh_provider_cache(client, namespace=None):
+    """ Reloads the cached resource types of one provider or, without a namespace, of all the
+    providers of the subscription. Returns the namespaces which were loaded.
+    """
+    if namespace:
+        providers = [client.providers.get(namespace)]
+    else:
+        providers = list(client.providers.list())
+    loaded = [(p.namespace, _to_resource_types(p)) for p in providers]
+    if PROVIDERS.filename:
+        _store_providers(_get_subscription_key(client), loaded, replace=not namespace)
+    return [n for n, _ in loaded]
@@ -0,0 +1,119 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Waiting for several resources at once, for the generic wait commands.
+
+Every resource is checked as soon as the wait starts, then at growing intervals (see
+_polling.PollingPolicy) until it reaches the condition, fails or the deadline shared by all
+resources passes. The resources which are due at the same time are checked concurrently, those
+of a group (e.g. a resource group) together, so a single list call can check all of them.
+"""
+
+import time
+
+import azure.cli.core.azlogging as azlogging
+
+logger = azlogging.get_az_logger(__name__)
+
+TIMED_OUT = 'TimedOut'
+FAILED = 'Failed'
+MAX_WAIT_WORKERS = 10
+
+
+class WaitTarget(object):  # pylint: disable=too-few-public-methods
+    """ A resource to wait for. `group` is the key of the resources which can be checked
+    together, or None. """
+
+    def __init__(self, name, getter_args, group=None):
+        self.name = name
+        self.getter_args = getter_args
+        self.group = group
+        self.attempts = 0
+        self.next_check = 0
+        self.status = None
+        self.error = None
+        self.elapsed = None
+
+
+def _get_batches(targets):
+    batches = []
+    groups = {}
+    for target in targets:
+        if target.group is None:
+            batches.append([target])
+        elif target.group in groups:
+            groups[target.group].append(target)
+        else:
+            groups[target.group] = [target]
+            batches.append(groups[target.group])
+    return batches
+
+
+def wait_for_targets(targets, check, policy, timeout):
+    """ Yields the targets as they reach a final status, then the ones which timed out.
+
+    check(batch) returns the status of each target of a batch: None while the target has not
+    reached the condition yet, or the exception it failed with. An exception raised by check
+    fails all the targets of the batch. """
+    from multiprocessing.pool import ThreadPool
+    from azure.cli.core.application import APPLICATION
+
+    start = time.time()
+    deadline = start + timeout
+    pending = list(targets)
+    session = APPLICATION.session
+
+    def _check(batch):
+        try:
+            return check(batch), None
+        except Exception as ex:  # pylint: disable=broad-except
+            return None, ex
+
+    def _check_in_worker(batch):
+        # the worker threads send the headers of the command, e.g. its request id
+        APPLICATION.use_thread_session(session)
+        try:
+            return _check(batch)
+        finally:
+            APPLICATION.use_thread_session(None)
+
+    pool = None
+    try:
+        while pending:
+            now = time.time()
+            batches = _get_batches([t for t in pending if t.next_check <= now])
+            if len(batches) > 1 and pool is None:
+                pool = ThreadPool(MAX_WAIT_WORKERS)
+            outcomes = pool.map(_check_in_worker, batches) if len(batches) > 1 else \
+                [_check(b) for b in batches]
+            now = time.time()
+            for batch, (statuses, batch_error) in zip(batches, outcomes):
+                for index, target in enumerate(batch):
+                    target.attempts += 1
+                    status = None if batch_error else statuses[index]
+                    error = status if isinstance(status, Exception) else batch_error
+                    if error is not None:
+                        target.status, target.error = FAILED, error
+                    else:
+                        target.status = status
+                    if target.status is None:
+                        target.next_check = now + policy.get_interval(target.attempts)
+                        continue
+                    target.elapsed = now - start
+                    pending.remove(target)
+                    yield target
+            if not pending:
+                break
+            if now >= deadline:
+                for target in pending:
+                    target.status, target.elapsed = TIMED_OUT, now - start
+                    yield target
+                break
+            next_check = min(t.next_check for t in pending)
+            time.sleep(max(0, min(next_check, deadline) - now))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
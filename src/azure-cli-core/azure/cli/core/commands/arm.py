@@ -4,6 +4,9 @@
 # --------------------------------------------------------------------------------------------
 
 import argparse
+from collections import OrderedDict
+import copy
+import inspect
 import re
 import json
 from six import string_types
@@ -12,7 +15,7 @@ from azure.cli.core.commands import (CliCommand,
                                      get_op_handler,
                                      command_table as main_command_table,
                                      command_module_map as main_command_module_map)
-from azure.cli.core.commands._introspection import extract_args_from_signature
+from azure.cli.core.commands._introspection import extract_args_from_operation
 from azure.cli.core.commands.client_factory import get_mgmt_service_client
 from azure.cli.core.application import APPLICATION, IterateValue
 import azure.cli.core.azlogging as azlogging
@@ -210,7 +213,13 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
                                setter_arg_name='parameters', table_transformer=None,
                                child_collection_prop_name=None, child_collection_key='name',
                                child_arg_name='item_name', custom_function_op=None,
-                               no_wait_param=None, transform=None):
+                               no_wait_param=None, transform=None, patcher_op=None):
+    """ Registers a command which gets an object, updates it and sets it again.
+
+    When `patcher_op` is given, an operation sending a PATCH with the same arguments as the
+    setter, only the properties which changed are sent with it. The whole object is set when
+    a property was removed, as a merge patch leaves out what it does not mention. When the object
+    is set and has an etag, it is sent as If-Match so concurrent updates aren't lost. """
     if not isinstance(getter_op, string_types):
         raise ValueError("Getter operation must be a string. Got '{}'".format(getter_op))
     if not isinstance(setter_op, string_types):
@@ -220,14 +229,14 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
             custom_function_op))
 
     def get_arguments_loader():
-        return dict(extract_args_from_signature(get_op_handler(getter_op)))
+        return dict(extract_args_from_operation(getter_op))
 
     def set_arguments_loader():
-        return dict(extract_args_from_signature(get_op_handler(setter_op),
+        return dict(extract_args_from_operation(setter_op,
                                                 no_wait_param=no_wait_param))
 
     def function_arguments_loader():
-        return dict(extract_args_from_signature(get_op_handler(custom_function_op))) \
+        return dict(extract_args_from_operation(custom_function_op)) \
             if custom_function_op else {}
 
     def arguments_loader():
@@ -241,8 +250,9 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
         arguments.pop(setter_arg_name, None)
         return arguments
 
-    def handler(args):  # pylint: disable=too-many-branches,too-many-statements
+    def handler(args):  # pylint: disable=too-many-branches,too-many-statements,too-many-locals
         from msrestazure.azure_operation import AzureOperationPoller
+        from msrestazure.azure_exceptions import CloudError
 
         ordered_arguments = args.pop('ordered_arguments') if 'ordered_arguments' in args else []
 
@@ -265,6 +275,9 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
         else:
             parent = None
             instance = getter(client, **getterargs) if client else getter(**getterargs)
+        # what was fetched, to find the properties which change
+        original = copy.deepcopy(instance) if patcher_op and not child_collection_prop_name \
+            else None
 
         # pass instance to the custom_function, if provided
         if custom_function_op:
@@ -304,18 +317,34 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
                     raise CLIError('invalid syntax: {}'.format(remove_usage))
 
         # Done... update the instance!
-        getterargs[setter_arg_name] = parent if child_collection_prop_name else instance
-        setter = get_op_handler(setter_op)
+        updated = parent if child_collection_prop_name else instance
+        patch = _get_patch_instance(original, instance) if original is not None else None
+        if patch is not None:
+            setter = get_op_handler(patcher_op)
+            getterargs[setter_arg_name] = patch
+        else:
+            setter = get_op_handler(setter_op)
+            getterargs[setter_arg_name] = updated
+            etag = getattr(updated, 'etag', None)
+            setter_params = _get_operation_params(setter)
+            if etag and 'custom_headers' in setter_params and 'if_match' not in setter_params:
+                getterargs['custom_headers'] = {'If-Match': etag}
         no_wait = no_wait_param and setterargs.get(no_wait_param, None)
         if no_wait:
             getterargs[no_wait_param] = True
 
-        opres = setter(client, **getterargs) if client else setter(**getterargs)
+        try:
+            opres = setter(client, **getterargs) if client else setter(**getterargs)
 
-        if no_wait:
-            return None
+            if no_wait:
+                return None
 
-        result = opres.result() if isinstance(opres, AzureOperationPoller) else opres
+            result = opres.result() if isinstance(opres, AzureOperationPoller) else opres
+        except CloudError as ex:
+            if getattr(ex, 'status_code', None) == 412:
+                raise CLIError('The resource was changed since it was read. Run the command '
+                               'again to apply the update to the current version.')
+            raise
         if child_collection_prop_name:
             result = _get_child(
                 result,
@@ -356,13 +385,70 @@ def cli_generic_update_command(module_name, name, getter_op, setter_op, factory=
     main_command_module_map[name] = module_name
 
 
-def cli_generic_wait_command(module_name, name, getter_op, factory=None):
+def _get_operation_params(operation):
+    try:
+        return inspect.signature(operation).parameters
+    except AttributeError:
+        return inspect.getargspec(operation).args  # pylint: disable=deprecated-method
+
+
+def _has_removals(old, new):
+    if old is not None and new is None:
+        return True
+    if isinstance(old, dict) and isinstance(new, dict):
+        return any(key not in new or _has_removals(value, new[key])
+                   for key, value in old.items())
+    return False
+
+
+def _get_patch_instance(original, modified):
+    """ A copy of the modified msrest model with only the attributes which changed, and the
+    required ones, set. None when the update cannot be sent as a merge patch: nothing changed
+    or a property was removed. """
+    model_type = type(modified)
+    attribute_map = getattr(model_type, '_attribute_map', None)
+    if not attribute_map:
+        return None
+    required = [k for k, v in getattr(model_type, '_validation', {}).items() if v.get('required')]
+    patch = copy.copy(modified)
+    changed = False
+    for attr in attribute_map:
+        old, new = todict(getattr(original, attr, None)), todict(getattr(modified, attr, None))
+        if old == new:
+            if attr not in required:
+                setattr(patch, attr, None)
+        elif _has_removals(old, new):
+            return None
+        else:
+            changed = True
+    return patch if changed else None
+
+
+def _get_wait_targets(getterargs):
+    """ The getter arguments of each resource, e.g. one per --ids, which the wait command gets
+    as IterateValue lists """
+    from azure.cli.core.commands._wait import WaitTarget
+    list_args = [key for key, value in getterargs.items() if isinstance(value, IterateValue)]
+    if not list_args:
+        return [WaitTarget(None, getterargs)]
+    targets = []
+    for values in zip(*[getterargs[key] for key in list_args]):
+        target_args = dict(getterargs)
+        target_args.update(zip(list_args, values))
+        targets.append(WaitTarget(None, target_args))
+    return targets
+
+
+def cli_generic_wait_command(module_name, name, getter_op, factory=None, lister_op=None):
+    """ Registers a command waiting for resources to reach a condition. When the resources of a
+    resource group can be listed with `lister_op`, taking the resource group name, several
+    resources of a resource group are checked with one list call instead of a get each. """
 
     if not isinstance(getter_op, string_types):
         raise ValueError("Getter operation must be a string. Got '{}'".format(type(getter_op)))
 
     def get_arguments_loader():
-        return dict(extract_args_from_signature(get_op_handler(getter_op)))
+        return dict(extract_args_from_operation(getter_op))
 
     def arguments_loader():
         arguments = {}
@@ -378,9 +464,11 @@ def cli_generic_wait_command(module_name, name, getter_op, factory=None):
                 provisioning_state = getattr(properties, 'provisioning_state', None)
         return provisioning_state
 
-    def handler(args):
+    def handler(args):  # pylint: disable=too-many-statements
         from msrest.exceptions import ClientException
-        import time
+        from azure.cli.core._output import StreamingResult
+        from azure.cli.core.commands._polling import get_polling_policy, PollingPolicy
+        from azure.cli.core.commands._wait import wait_for_targets, FAILED, TIMED_OUT
         try:
             client = factory() if factory else None
         except TypeError:
@@ -393,6 +481,8 @@ def cli_generic_wait_command(module_name, name, getter_op, factory=None):
 
         timeout = args.pop('timeout')
         interval = args.pop('interval')
+        if interval < 1:
+            raise CLIError('incorrect usage: --interval must be at least 1 second')
         wait_for_created = args.pop('created')
         wait_for_deleted = args.pop('deleted')
         wait_for_updated = args.pop('updated')
@@ -403,39 +493,113 @@ def cli_generic_wait_command(module_name, name, getter_op, factory=None):
             raise CLIError(
                 "incorrect usage: --created | --updated | --deleted | --exists | --custom JMESPATH")  # pylint: disable=line-too-long
 
-        for _ in range(0, timeout, interval):
+        def get_status(instance):
+            if wait_for_exists:
+                return 'Exists'
+            provisioning_state = get_provisioning_state(instance)
+            # until we have any needs to wait for 'Failed', let us bail out on this
+            if provisioning_state == 'Failed':
+                return FAILED
+            if wait_for_created or wait_for_updated:
+                if provisioning_state == 'Succeeded':
+                    return provisioning_state
+            if custom_condition and bool(verify_property(instance, custom_condition)):
+                return 'Succeeded'
+            return None
+
+        def get_not_found_status(ex):
+            if wait_for_deleted:
+                return 'Deleted'
+            if not any([wait_for_created, wait_for_exists, custom_condition]):
+                raise ex
+            return None
+
+        def get(target):
             try:
-                instance = getter(client, **getterargs) if client else getter(**getterargs)
-                if wait_for_exists:
-                    return
-                provisioning_state = get_provisioning_state(instance)
-                # until we have any needs to wait for 'Failed', let us bail out on this
-                if provisioning_state == 'Failed':
-                    raise CLIError('The operation failed')
-                if wait_for_created or wait_for_updated:
-                    if provisioning_state == 'Succeeded':
-                        return
-                if custom_condition and bool(verify_property(instance, custom_condition)):
-                    return
+                instance = getter(client, **target.getter_args) if client \
+                    else getter(**target.getter_args)
             except ClientException as ex:
                 if getattr(ex, 'status_code', None) == 404:
-                    if wait_for_deleted:
-                        return
-                    if not any([wait_for_created, wait_for_exists, custom_condition]):
-                        raise
-                else:
-                    raise
-
-            time.sleep(interval)
+                    return get_not_found_status(ex)
+                raise
+            return get_status(instance)
+
+        def list_instances(resource_group_name):
+            lister = get_op_handler(lister_op)
+            instances = lister(client, resource_group_name=resource_group_name) if client \
+                else lister(resource_group_name=resource_group_name)
+            return {i.name.lower(): i for i in instances}
+
+        def check(batch):
+            if len(batch) == 1:
+                return [get(batch[0])]
+            instances = list_instances(batch[0].getter_args['resource_group_name'])
+            statuses = []
+            for target in batch:
+                instance = instances.get(target.name.lower())
+                if instance is not None:
+                    statuses.append(get_status(instance))
+                    continue
+                not_found = ClientException('Resource {} not found.'.format(target.name))
+                not_found.status_code = 404
+                try:
+                    statuses.append(get_not_found_status(not_found))
+                except ClientException as ex:
+                    statuses.append(ex)
+            return statuses
+
+        targets = _get_wait_targets(getterargs)
+        name_args = [key for key in getterargs if key != 'resource_group_name']
+        for target in targets:
+            target.name = '/'.join(str(target.getter_args[key]) for key in name_args
+                                   if target.getter_args[key] is not None)
+            if lister_op and len(name_args) == 1 and 'resource_group_name' in getterargs:
+                target.group = target.getter_args['resource_group_name'].lower()
+
+        configured = get_polling_policy()
+        policy = PollingPolicy(configured.adaptive, min(configured.interval, interval), interval)
+        finished = wait_for_targets(targets, check, policy, timeout)
+
+        if len(targets) == 1:
+            target = next(finished)
+            if target.status == TIMED_OUT:
+                raise CLIError('Wait operation timed-out after {} seconds'.format(timeout))
+            if target.error is not None:
+                raise target.error  # pylint: disable=raising-bad-type
+            if target.status == FAILED:
+                raise CLIError('The operation failed')
+            return None
 
-        return CLIError('Wait operation timed-out after {} seconds'.format(timeout))
+        def get_rows():
+            failed = []
+            for target in finished:
+                row = OrderedDict([('name', target.name),
+                                   ('resourceGroup', target.getter_args.get('resource_group_name')),
+                                   ('status', target.status),
+                                   ('elapsed', round(target.elapsed, 1))])
+                if target.error is not None:
+                    row['error'] = str(target.error)
+                if target.status in (FAILED, TIMED_OUT):
+                    failed.append(target.name)
+                yield row
+            if failed:
+                raise CLIError('{} of {} resources failed or timed out: {}'.format(
+                    len(failed), len(targets), ', '.join(failed)))
+
+        # The status of the resources is written as they finish when the output format allows
+        if APPLICATION.session.get('stream_results'):
+            return StreamingResult(get_rows())
+        return list(get_rows())
 
     cmd = CliCommand(name, handler, arguments_loader=arguments_loader)
+    # all the --ids are waited for at the same time, by one invocation
+    cmd.handles_iterate_values = True
     group_name = 'Wait Condition'
     cmd.add_argument('timeout', '--timeout', default=3600, arg_group=group_name, type=int,
                      help='maximum wait in seconds')
     cmd.add_argument('interval', '--interval', default=30, arg_group=group_name, type=int,
-                     help='polling interval in seconds')
+                     help='maximum polling interval in seconds; a resource is checked more often '
+                          'right after the wait starts')
     cmd.add_argument('deleted', '--deleted', action='store_true', arg_group=group_name,
                      help='wait till deleted')
     cmd.add_argument('created', '--created', action='store_true', arg_group=group_name,
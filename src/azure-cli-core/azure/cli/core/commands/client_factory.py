@@ -3,10 +3,16 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from collections import OrderedDict
+import threading
+
 from azure.cli.core import __version__ as core_version
 from azure.cli.core._profile import Profile, CLOUD
 import azure.cli.core._debug as _debug
 import azure.cli.core.azlogging as azlogging
+import azure.cli.core.profiler as profiler
+import azure.cli.core.request_timing as request_timing
+from azure.cli.core._request_scheduler import schedule_client, schedule_data_client
 from azure.cli.core._util import CLIError
 from azure.cli.core.application import APPLICATION
 from azure.storage._error import _ERROR_STORAGE_MISSING_INFO
@@ -15,6 +21,11 @@ logger = azlogging.get_az_logger(__name__)
 
 UA_AGENT = "AZURECLI/{}".format(core_version)
 
+# Management clients of this process, see _get_mgmt_service_client
+_CLIENT_CACHE_SIZE = 32
+_client_cache = OrderedDict()
+_client_cache_lock = threading.Lock()
+
 
 def get_mgmt_service_client(client_type, subscription_id=None, api_version=None):
     client, _ = _get_mgmt_service_client(client_type, subscription_id=subscription_id,
@@ -31,6 +42,11 @@ def configure_common_settings(client):
 
     client.config.add_user_agent(UA_AGENT)
 
+    # Clients are cached, the wrapper checks whether the command is timed
+    request_timing.instrument_client(client)
+    if profiler.is_enabled():
+        profiler.instrument_client(client)
+
     for header, value in APPLICATION.session['headers'].items():
         # We are working with the autorest team to expose the add_header
         # functionality of the generated client to avoid having to access
@@ -43,12 +59,24 @@ def configure_common_settings(client):
     client.config.generate_client_request_id = \
         'x-ms-client-request-id' not in APPLICATION.session['headers']
 
+    schedule_client(client)
+
 
 def _get_mgmt_service_client(client_type, subscription_bound=True, subscription_id=None,
                              api_version=None):
     logger.debug('Getting management service client client_type=%s', client_type.__name__)
     profile = Profile()
     cred, subscription_id, _ = profile.get_login_credentials(subscription_id=subscription_id)
+    # Clients are reused by the calls made for the same command, which send the same headers
+    session = APPLICATION.session
+    cache_key = (client_type, subscription_bound, subscription_id, api_version,
+                 CLOUD.endpoints.resource_manager, session['command'],
+                 session['completer_active'], tuple(sorted(session['headers'].items())))
+    with _client_cache_lock:
+        client = _client_cache.get(cache_key)
+    if client is not None:
+        return (client, subscription_id)
+
     client_kwargs = {'base_url': CLOUD.endpoints.resource_manager}
     if api_version:
         client_kwargs['api_version'] = api_version
@@ -59,6 +87,10 @@ def _get_mgmt_service_client(client_type, subscription_bound=True, subscription_
 
     configure_common_settings(client)
 
+    with _client_cache_lock:
+        _client_cache[cache_key] = client
+        while len(_client_cache) > _CLIENT_CACHE_SIZE:
+            _client_cache.popitem(last=False)
     return (client, subscription_id)
 
 
@@ -80,6 +112,8 @@ def get_data_service_client(service_type, account_name, account_key, connection_
             raise CLIError('Unable to obtain data client. Check your connection parameters.')
     # TODO: enable Fiddler
     client.request_callback = _add_headers
+    schedule_data_client(client)
+    request_timing.instrument_data_client(client)
     return client
 
 
@@ -31,6 +31,24 @@ def _register_global_parameter(global_group):
                               type=jmespath_type)
 
 
+def _is_item_query(query_expression):
+    """ Whether the query is a projection or filter over the items of a list, e.g. '[].name' or
+    "[?location=='westus']", which gives the same result when applied to one item at a time """
+    parsed = query_expression.parsed
+    if parsed['type'] not in ('projection', 'filter_projection'):
+        return False
+    source = parsed['children'][0]
+    if source['type'] == 'flatten':
+        source = source['children'][0]
+    return source['type'] in ('identity', 'current')
+
+
+def _search_item(query_expression, item, options):
+    # The query applied to a list of the single item gives the item's result, if any
+    result = query_expression.search([item], options)
+    return result[0] if result else None
+
+
 def register(application):
     def handle_query_parameter(**kwargs):
         args = kwargs['args']
@@ -38,9 +56,17 @@ def register(application):
         del args._jmespath_query
         if query_expression:
             def filter_output(**kwargs):
-                from jmespath import search, Options
-                kwargs['event_data']['result'] = query_expression.search(
-                    kwargs['event_data']['result'], Options(collections.OrderedDict))
+                from jmespath import Options
+                from azure.cli.core._output import StreamingResult
+                options = Options(collections.OrderedDict)
+                result = kwargs['event_data']['result']
+                if isinstance(result, StreamingResult):
+                    if _is_item_query(query_expression):
+                        result.map(lambda item: _search_item(query_expression, item, options))
+                        application.remove(application.FILTER_RESULT, filter_output)
+                        return
+                    result = list(result)
+                kwargs['event_data']['result'] = query_expression.search(result, options)
                 application.remove(application.FILTER_RESULT, filter_output)
             application.register(application.FILTER_RESULT, filter_output)
             application.session['query_active'] = True
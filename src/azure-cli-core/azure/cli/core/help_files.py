@@ -3,14 +3,94 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import hashlib
+import json
+
+from six import text_type
+
+from azure.cli.core import __version__ as core_version
+from azure.cli.core._session import Session
 
 # modules should add entries to helps in the form: "group command": "YAML help"
 helps = {}
 
+_HELP_INDEX_VERSION = 'version'
+_HELP_INDEX_ENTRIES = 'entries'
 
-def _load_help_file(delimiters):
+# parsed help entries keyed by command/group name, read from disk on the first help lookup
+_help_index = Session()
+_help_index_file = None
+_help_index_save_registered = False
+
+
+def enable_help_index(filename):
+    """ Persist the parsed help entries in `filename` so the YAML of an entry is only parsed
+    again once its text changes. """
+    global _help_index_file  # pylint: disable=global-statement
+    _help_index_file = filename
+
+
+def _get_help_index():
+    if not _help_index_file:
+        return None
+    if _help_index.filename != _help_index_file:
+        _help_index.load(_help_index_file)
+        if _help_index.get(_HELP_INDEX_VERSION) != core_version:
+            _help_index.data = {_HELP_INDEX_VERSION: core_version, _HELP_INDEX_ENTRIES: {}}
+    return _help_index
+
+
+def _save_help_index_at_exit():
+    global _help_index_save_registered  # pylint: disable=global-statement
+    if not _help_index_save_registered:
+        import atexit
+        atexit.register(_help_index.save_with_retry)
+        _help_index_save_registered = True
+
+
+def _parse_help_text(text):
+    """ Parse help YAML with the libyaml based loader when PyYAML was built with it """
     import yaml
-    if delimiters in helps:
-        return yaml.load(helps[delimiters])
-    else:
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.load(text, Loader=loader)
+
+
+def _get_help_key(text):
+    return hashlib.md5(text.encode('utf-8') if isinstance(text, text_type) else text).hexdigest()
+
+
+def _load_help_file(delimiters):
+    if delimiters not in helps:
         return None
+    text = helps[delimiters]
+    help_index = _get_help_index()
+    if help_index is None:
+        return _parse_help_text(text)
+    entries = help_index.data.setdefault(_HELP_INDEX_ENTRIES, {})
+    key = _get_help_key(text)
+    entry = entries.get(delimiters)
+    if entry and entry[0] == key:
+        return entry[1]
+    data = _parse_help_text(text)
+    try:
+        serializable = json.loads(json.dumps(data)) == data
+    except (TypeError, ValueError):
+        serializable = False
+    if serializable:
+        entries[delimiters] = [key, data]
+        _save_help_index_at_exit()
+    return data
+
+
+def compile_help_index():
+    """ Parse every registered help entry into the help index. Called once all command modules
+    have been loaded so later help lookups, e.g. for 'az network -h', don't parse YAML. """
+    help_index = _get_help_index()
+    if help_index is None:
+        return
+    entries = help_index.data.setdefault(_HELP_INDEX_ENTRIES, {})
+    for delimiters in [d for d in entries if d not in helps]:
+        del entries[delimiters]
+        _save_help_index_at_exit()
+    for delimiters in helps:
+        _load_help_file(delimiters)
@@ -41,6 +41,88 @@ def enable_autocomplete(parser):
                              default_completer=lambda _: ())
 
 
+class _PendingCommandParser(object):  # pylint: disable=too-few-public-methods
+    """Placeholder for the parser of a command loaded lazily."""
+
+    def __init__(self, command_name, metadata, parents):
+        self.command_name = command_name
+        self.metadata = metadata
+        self.parents = parents
+
+    def create(self, subparser, name):
+        command_parser = subparser.add_parser(name,
+                                              description=self.metadata.description,
+                                              parents=self.parents, conflict_handler='error',
+                                              help_file=self.metadata.help)
+        command_parser.load_command_arguments(self.command_name, self.metadata)
+        return command_parser
+
+
+class _PendingGroupParser(object):  # pylint: disable=too-few-public-methods
+    """Placeholder for the parser of a command group loaded lazily. Holds the placeholders
+    of the commands and groups below it until it is created.
+    """
+
+    def __init__(self, root_parser, path):
+        self.root_parser = root_parser
+        self.path = path
+        self.children = {}
+
+    def create(self, subparser, name):
+        group_parser = subparser.add_parser(name)
+
+        # Due to http://bugs.python.org/issue9253, we have to give the subparser
+        # a destination and set it to required in order to get a meaningful error
+        group_subparser = group_parser.add_subparsers(dest='subcommand')
+        group_subparser.required = True
+        group_subparser.choices.update(self.children)
+        self.root_parser.subparsers[self.path] = group_subparser
+        return group_parser
+
+
+class _LazyParserMap(dict):
+    """The name -> parser map of a subparsers action. Placeholders are replaced with the
+    actual parsers when they are looked up, e.g. when argparse descends into a command,
+    so only the parsers on the path of the invoked command are created. Membership tests
+    and iterating the names do not create parsers. Iteration works on a snapshot of the names
+    so callers such as argcomplete may look parsers up while iterating.
+    """
+
+    def __init__(self, subparser):
+        super(_LazyParserMap, self).__init__()
+        self.subparser = subparser
+
+    def __getitem__(self, key):
+        value = super(_LazyParserMap, self).__getitem__(key)
+        if isinstance(value, (_PendingCommandParser, _PendingGroupParser)):
+            super(_LazyParserMap, self).__delitem__(key)
+            value = value.create(self.subparser, key)
+        return value
+
+    def __iter__(self):
+        return iter(list(super(_LazyParserMap, self).keys()))
+
+    def keys(self):
+        return list(self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[key] for key in list(self)]
+
+    def items(self):
+        return [(key, self[key]) for key in list(self)]
+
+
+class AzCliSubParsersAction(argparse._SubParsersAction):  # pylint: disable=protected-access
+
+    def __init__(self, *args, **kwargs):
+        super(AzCliSubParsersAction, self).__init__(*args, **kwargs)
+        self._name_parser_map = _LazyParserMap(self)
+        self.choices = self._name_parser_map
+
+
 class AzCliCommandParser(argparse.ArgumentParser):
     """ArgumentParser implementation specialized for the
     Azure CLI utility.
@@ -51,9 +133,13 @@ class AzCliCommandParser(argparse.ArgumentParser):
         self.parents = kwargs.get('parents', [])
         self.help_file = kwargs.pop('help_file', None)
         super(AzCliCommandParser, self).__init__(**kwargs)
+        self.register('action', 'parsers', AzCliSubParsersAction)
 
-    def load_command_table(self, command_table):
+    def load_command_table(self, command_table, lazy=False):
         """Load a command table into our parser.
+        When `lazy` is set, parsers for command groups and commands are only created once
+        argparse descends into them, so the parse cost depends on the invoked command rather
+        than on the number of commands in the table.
         """
         # If we haven't already added a subparser, we
         # better do it.
@@ -63,47 +149,70 @@ class AzCliCommandParser(argparse.ArgumentParser):
             self.subparsers = {(): sp}
 
         for command_name, metadata in command_table.items():
-            subparser = self._get_subparser(command_name.split())
-            command_verb = command_name.split()[-1]
-            # To work around http://bugs.python.org/issue9253, we artificially add any new
-            # parsers we add to the "choices" section of the subparser.
-            subparser.choices[command_verb] = command_verb
-            command_parser = subparser.add_parser(command_verb,
-                                                  description=metadata.description,
-                                                  parents=self.parents, conflict_handler='error',
-                                                  help_file=metadata.help)
-
-            argument_validators = []
-            argument_groups = {}
-            for arg in metadata.arguments.values():
-                if arg.validator:
-                    argument_validators.append(arg.validator)
-                if arg.arg_group:
-                    try:
-                        group = argument_groups[arg.arg_group]
-                    except KeyError:
-                        # group not found so create
-                        group_name = '{} Arguments'.format(arg.arg_group)
-                        group = command_parser.add_argument_group(arg.arg_group, group_name)
-                        argument_groups[arg.arg_group] = group
-                    param = group.add_argument(
+            path = command_name.split()
+            pending = _PendingCommandParser(command_name, metadata, self.parents)
+            if lazy:
+                self._get_pending_children(path)[path[-1]] = pending
+            else:
+                subparser = self._get_subparser(path)
+                # Loading the command table again (e.g. once the parameters of the command
+                # have been loaded) replaces the parser registered for the command before.
+                subparser.choices.pop(path[-1], None)
+                pending.create(subparser, path[-1])
+
+    def load_command_arguments(self, command_name, metadata):
+        """Add the arguments of the command `metadata` to this parser."""
+        argument_validators = []
+        argument_groups = {}
+        for arg in metadata.arguments.values():
+            if arg.validator:
+                argument_validators.append(arg.validator)
+            if arg.arg_group:
+                try:
+                    group = argument_groups[arg.arg_group]
+                except KeyError:
+                    # group not found so create
+                    group_name = '{} Arguments'.format(arg.arg_group)
+                    group = self.add_argument_group(arg.arg_group, group_name)
+                    argument_groups[arg.arg_group] = group
+                param = group.add_argument(
+                    *arg.options_list, **arg.options)
+            else:
+                try:
+                    param = self.add_argument(
                         *arg.options_list, **arg.options)
-                else:
-                    try:
-                        param = command_parser.add_argument(
-                            *arg.options_list, **arg.options)
-                    except argparse.ArgumentError:
-                        dest = arg.options['dest']
-                        if dest in ['no_wait', 'raw']:
-                            pass
-                        else:
-                            raise
-                param.completer = arg.completer
-
-            command_parser.set_defaults(func=metadata.handler,
-                                        command=command_name,
-                                        _validators=argument_validators,
-                                        _parser=command_parser)
+                except argparse.ArgumentError:
+                    dest = arg.options['dest']
+                    if dest in ['no_wait', 'raw']:
+                        pass
+                    else:
+                        raise
+            param.completer = arg.completer
+
+        self.set_defaults(func=metadata.handler,
+                          command=command_name,
+                          _validators=argument_validators,
+                          _parser=self,
+                          _handles_iterate_values=getattr(metadata, 'handles_iterate_values',
+                                                          False))
+
+    def _get_pending_children(self, path):
+        """Walk down the groups of the path and return the name -> parser map the command
+        should be added to. Groups which have not been created yet are only registered as
+        placeholders.
+        """
+        children = self.subparsers[()].choices
+        for length in range(1, len(path)):
+            group_path = tuple(path[0:length])
+            if group_path in self.subparsers:
+                children = self.subparsers[group_path].choices
+                continue
+            group = dict.get(children, path[length - 1])
+            if not isinstance(group, _PendingGroupParser):
+                group = _PendingGroupParser(self, group_path)
+                children[path[length - 1]] = group
+            children = group.children
+        return children
 
     def _get_subparser(self, path):
         """For each part of the path, walk down the tree of
@@ -121,13 +230,14 @@ class AzCliCommandParser(argparse.ArgumentParser):
                 # subcmd2 and so on), we know we can always back up one step and
                 # add a subparser if one doesn't exist
                 grandparent_subparser = self.subparsers[tuple(path[0:length - 1])]
-                new_parser = grandparent_subparser.add_parser(path[length - 1])
-
-                # Due to http://bugs.python.org/issue9253, we have to give the subparser
-                # a destination and set it to required in order to get a meaningful error
-                parent_subparser = new_parser.add_subparsers(dest='subcommand')
-                parent_subparser.required = True
-                self.subparsers[tuple(path[0:length])] = parent_subparser
+                group_name = path[length - 1]
+                if not isinstance(dict.get(grandparent_subparser.choices, group_name),
+                                  _PendingGroupParser):
+                    grandparent_subparser.choices[group_name] = \
+                        _PendingGroupParser(self, tuple(path[0:length]))
+                # Looking up the placeholder creates the group and registers its subparser
+                grandparent_subparser.choices.get(group_name)
+                parent_subparser = self.subparsers[tuple(path[0:length])]
         return parent_subparser
 
     def _handle_command_package_error(self, err_msg):  # pylint: disable=no-self-use
@@ -0,0 +1,210 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Wall time profiler for the phases of an az invocation.
+
+Profiling is enabled with the global '--profile-startup' flag or by setting AZURE_CLI_PROFILE=1.
+It records imports, application events (each handler separately), validators, command handlers,
+HTTP requests, result conversion and output formatting, and writes them as a Chrome trace-event
+file that can be opened in chrome://tracing or https://ui.perfetto.dev. Setting AZURE_CLI_PROFILE
+to a file path writes the trace to that file instead of the 'profiles' folder in the config
+directory.
+
+This module only imports the standard library and azure.cli.core._environment as it is enabled
+before the rest of the CLI is imported.
+"""
+
+from contextlib import contextmanager
+import json
+import os
+import sys
+import threading
+import time
+import timeit
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins  # pylint: disable=import-error
+
+from azure.cli.core._environment import get_config_dir
+
+PROFILE_FLAG = '--profile-startup'
+PROFILE_ENV_NAME = 'AZURE_CLI_PROFILE'
+PROFILE_DIR_NAME = 'profiles'
+
+_DISABLED_VALUES = ('', '0', 'false', 'no', 'off')
+_ENABLED_VALUES = ('1', 'true', 'yes', 'on')
+
+_timer = timeit.default_timer
+_origin = _timer()
+_enabled = False
+_trace_file = None
+_events = []
+_original_import = None
+
+
+def is_enabled():
+    return _enabled
+
+
+def handle_profile_flag(argv):
+    """ Remove the profile flag from `argv` and enable profiling if either the flag or the
+    environment variable asks for it. Returns whether profiling is enabled. """
+    flagged = PROFILE_FLAG in argv
+    while PROFILE_FLAG in argv:
+        argv.remove(PROFILE_FLAG)
+    setting = os.environ.get(PROFILE_ENV_NAME, '').strip()
+    if flagged or setting.lower() not in _DISABLED_VALUES:
+        trace_file = setting if setting.lower() not in _DISABLED_VALUES + _ENABLED_VALUES \
+            else None
+        enable(trace_file)
+    return _enabled
+
+
+def enable(trace_file=None):
+    """ Start recording. Imports are timed from here on. """
+    global _enabled, _trace_file  # pylint: disable=global-statement
+    _trace_file = trace_file
+    if not _enabled:
+        _enabled = True
+        _install_import_hook()
+
+
+def _install_import_hook():
+    global _original_import  # pylint: disable=global-statement
+    _original_import = builtins.__import__
+
+    def _timed_import(name, *args, **kwargs):
+        # only record imports that load modules, including submodules loaded through the fromlist
+        loaded_modules = len(sys.modules)
+        start = _timer()
+        try:
+            return _original_import(name, *args, **kwargs)
+        finally:
+            if len(sys.modules) != loaded_modules:
+                record('import ' + name, 'import', start, _timer())
+
+    builtins.__import__ = _timed_import
+
+
+def _remove_import_hook():
+    global _original_import  # pylint: disable=global-statement
+    if _original_import:
+        builtins.__import__ = _original_import
+        _original_import = None
+
+
+def record(name, category, start, end, **args):
+    """ Record a span that started and ended at the given `timeit.default_timer` values """
+    if not _enabled:
+        return
+    event = {'name': name,
+             'cat': category,
+             'ph': 'X',
+             'ts': int((start - _origin) * 1000000),
+             'dur': int(max(end - start, 0) * 1000000),
+             'pid': os.getpid(),
+             'tid': threading.current_thread().ident}
+    if args:
+        event['args'] = args
+    _events.append(event)
+
+
+@contextmanager
+def span(name, category, **args):
+    """ Time the body of the with statement """
+    if not _enabled:
+        yield
+        return
+    start = _timer()
+    try:
+        yield
+    finally:
+        record(name, category, start, _timer(), **args)
+
+
+def _get_callable_name(func):
+    name = getattr(func, '__qualname__', None) or getattr(func, '__name__', None)
+    if name is None:
+        return repr(func)
+    module = getattr(func, '__module__', None)
+    return '{}.{}'.format(module, name) if module else name
+
+
+def timed(func, category, **args):
+    """ Returns `func` wrapped to record a span named after it on each call. Returns `func` itself
+    when profiling is disabled. """
+    if not _enabled:
+        return func
+    name = _get_callable_name(func)
+
+    def _timed(*func_args, **func_kwargs):
+        with span(name, category, **args):
+            return func(*func_args, **func_kwargs)
+    return _timed
+
+
+def instrument_client(client):
+    """ Records a span for each request the msrest service client of `client` sends, wrapping its
+    send method as msrest 0.4 has no response hooks """
+    service_client = client._client  # pylint: disable=protected-access
+    if getattr(service_client, '_profiled', False):
+        return
+    send = service_client.send
+
+    def _send(request, *args, **kwargs):
+        start = _timer()
+        response = send(request, *args, **kwargs)
+        record('{} {}'.format(request.method, request.url.split('?')[0]), 'http',
+               start, _timer(), status=response.status_code)
+        return response
+
+    service_client.send = _send
+    service_client._profiled = True  # pylint: disable=protected-access
+
+
+def get_trace():
+    """ Returns the recorded spans in the Chrome trace-event format """
+    threads = {}
+    for thread in threading.enumerate():
+        threads[thread.ident] = thread.name
+    metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                 'args': {'name': threads.get(tid, str(tid))}}
+                for tid in sorted(set(e['tid'] for e in _events))]
+    return {'traceEvents': metadata + sorted(_events, key=lambda e: (e['ts'], -e['dur'])),
+            'displayTimeUnit': 'ms',
+            'otherData': {'argv': sys.argv[1:]}}
+
+
+def _get_default_trace_file():
+    return os.path.join(get_config_dir(), PROFILE_DIR_NAME,
+                        'az-{}-{}.json'.format(time.strftime('%Y%m%d-%H%M%S'), os.getpid()))
+
+
+def write_trace(trace_file=None):
+    """ Write the recorded spans and return the path of the trace file """
+    trace_file = os.path.abspath(os.path.expanduser(trace_file or _get_default_trace_file()))
+    trace_dir = os.path.dirname(trace_file)
+    if not os.path.isdir(trace_dir):
+        os.makedirs(trace_dir)
+    with open(trace_file, 'w') as f:
+        json.dump(get_trace(), f)
+    return trace_file
+
+
+def conclude():
+    """ Stop recording and write the trace file if profiling was enabled """
+    global _enabled  # pylint: disable=global-statement
+    if not _enabled:
+        return
+    _remove_import_hook()
+    record('az', 'process', _origin, _timer())
+    _enabled = False
+    try:
+        trace_file = write_trace(_trace_file)
+        sys.stderr.write('Profile written to {}\n'.format(trace_file))
+    except (IOError, OSError) as ex:
+        sys.stderr.write('Unable to write the profile: {}\n'.format(ex))
@@ -0,0 +1,242 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Latency of the requests a command sends.
+
+With the global '--timing' flag the management and storage clients created by client_factory
+record the method, host, path template, status, size and latency of every request, and the
+time spent getting access tokens. At the end of the command a summary with the count, median,
+95th percentile and total time per host and operation is written to stderr. Latency is the time
+until the response headers were received.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+import re
+import sys
+import threading
+import timeit
+
+from six.moves.urllib.parse import urlparse, parse_qs  # pylint: disable=import-error
+
+TIMING_FLAG = '--timing'
+AUTH_HOST = 'auth'
+
+RequestRecord = namedtuple('RequestRecord', ['method', 'host', 'path', 'status', 'request_bytes',
+                                             'response_bytes', 'latency'])
+
+_timer = timeit.default_timer
+_enabled = False
+_started = None
+_records = []
+_records_lock = threading.Lock()
+_pending = threading.local()
+
+_GUID = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.I)
+_ARM_NAME_PLACEHOLDERS = {'subscriptions': '{subscriptionId}',
+                          'resourcegroups': '{resourceGroupName}'}
+# Query parameters which select the storage operation
+_STORAGE_OPERATION_PARAMETERS = ('restype', 'comp')
+
+
+def is_enabled():
+    return _enabled
+
+
+def handle_timing_flag(argv):
+    """ Remove the timing flag from `argv` and start recording if it was given """
+    global _enabled, _started  # pylint: disable=global-statement
+    _enabled = TIMING_FLAG in argv
+    while TIMING_FLAG in argv:
+        argv.remove(TIMING_FLAG)
+    _started = _timer()
+    with _records_lock:
+        del _records[:]
+    return _enabled
+
+
+def _get_arm_path_template(segments):
+    template = []
+    names = iter(segments)
+    for segment in names:
+        template.append(segment)
+        if segment.lower() == 'providers':
+            template.extend(n for n in [next(names, None)] if n is not None)
+            continue
+        # a collection followed by the name of one of its items
+        if next(names, None) is not None:
+            template.append(_ARM_NAME_PLACEHOLDERS.get(segment.lower(), '{name}'))
+    return template
+
+
+def get_path_template(url):
+    """ Returns the path of a request URL with the names and ids replaced by placeholders """
+    parts = urlparse(url)
+    segments = [s for s in parts.path.split('/') if s]
+    if segments and segments[0].lower() in ('subscriptions', 'providers'):
+        segments = _get_arm_path_template(segments)
+    elif '.core.' in parts.netloc:
+        # storage: /container/blob, /share/directory/file, /queue/messages, /table
+        segments = ['{name}' for _ in segments]
+    else:
+        segments = ['{id}' if _GUID.match(s) else s for s in segments]
+    template = '/' + '/'.join(segments)
+    query = parse_qs(parts.query)
+    operation = ['{}={}'.format(p, query[p][0]) for p in _STORAGE_OPERATION_PARAMETERS
+                 if p in query]
+    return template + ('?' + '&'.join(operation) if operation else '')
+
+
+def record(method, url_or_host, status, request_bytes, response_bytes, latency):
+    if not _enabled:
+        return
+    if '//' in url_or_host:
+        host, path = urlparse(url_or_host).netloc.lower(), get_path_template(url_or_host)
+    else:
+        host, path = url_or_host, ''
+    with _records_lock:
+        _records.append(RequestRecord(method, host, path, status, request_bytes, response_bytes,
+                                      latency))
+
+
+def _get_length(value):
+    if value is None:
+        return 0
+    if hasattr(value, '__len__'):
+        return len(value)
+    return 0
+
+
+def _get_content_length(headers):
+    try:
+        return int(headers.get('content-length') or headers.get('Content-Length') or 0)
+    except ValueError:
+        return 0
+
+
+def record_http_response(response, *_, **__):
+    """ Records a requests response of a msrest client """
+    if not _enabled:
+        return
+    request = response.request
+    record(request.method, request.url, response.status_code, _get_length(request.body),
+           _get_content_length(response.headers), response.elapsed.total_seconds())
+
+
+def instrument_client(client):
+    """ Records the requests of a msrest service client. msrest 0.4 has no response hooks, so the
+    send method of the client is wrapped; each attempt of a retried request is recorded. """
+    service_client = client._client  # pylint: disable=protected-access
+    if getattr(service_client, '_timed', False):
+        return
+    send = service_client.send
+
+    def _send(request, *args, **kwargs):
+        response = send(request, *args, **kwargs)
+        record_http_response(response)
+        return response
+
+    service_client.send = _send
+    service_client._timed = True  # pylint: disable=protected-access
+
+
+@contextmanager
+def measure(host, operation):
+    """ Records the time spent in the body of the with statement, e.g. to get a token """
+    if not _enabled:
+        yield
+        return
+    start = _timer()
+    status = 'error'
+    try:
+        yield
+        status = 'ok'
+    finally:
+        record(operation, host, status, 0, 0, _timer() - start)
+
+
+def instrument_data_client(client):
+    """ Records the requests of an azure-storage service client. The client sends the requests of
+    a thread one after the other, so the response belongs to the last request of the thread. """
+    request_callback = client.request_callback
+    response_callback = client.response_callback
+
+    def _request_callback(request):
+        if request_callback:
+            request_callback(request)
+        _pending.request = (request, _timer())
+
+    def _response_callback(response):
+        pending = getattr(_pending, 'request', None)
+        if pending:
+            request, start = pending
+            _pending.request = None
+            query = request.query or {}
+            query = query.items() if hasattr(query, 'items') else query
+            url = 'https://{}{}?{}'.format(request.host, request.path,
+                                           '&'.join('{}={}'.format(k, v) for k, v in query
+                                                    if v is not None))
+            record(request.method, url, response.status, _get_length(request.body),
+                   _get_length(response.body), _timer() - start)
+        if response_callback:
+            response_callback(response)
+
+    client.request_callback = _request_callback
+    client.response_callback = _response_callback
+
+
+def _percentile(sorted_values, percent):
+    index = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def get_summary():
+    """ Returns a row per host and operation with the count, median and 95th percentile of the
+    latency and the total time, ordered by the total time """
+    with _records_lock:
+        records = list(_records)
+    groups = {}
+    for r in records:
+        groups.setdefault((r.host, '{} {}'.format(r.method, r.path).strip()), []).append(r)
+    summary = []
+    for (host, operation), group in groups.items():
+        latencies = sorted(r.latency for r in group)
+        statuses = sorted(set(str(r.status) for r in group))
+        summary.append({'host': host,
+                        'operation': operation,
+                        'status': ','.join(statuses),
+                        'count': len(group),
+                        'p50': _percentile(latencies, 50),
+                        'p95': _percentile(latencies, 95),
+                        'total': sum(latencies),
+                        'bytes': sum(r.request_bytes + r.response_bytes for r in group)})
+    return sorted(summary, key=lambda s: -s['total'])
+
+
+def report(file=None):  # pylint: disable=redefined-builtin
+    """ Writes the summary of the recorded requests if timing is enabled """
+    global _enabled  # pylint: disable=global-statement
+    if not _enabled:
+        return
+    _enabled = False
+    file = file or sys.stderr
+    wall_time = _timer() - _started
+    summary = get_summary()
+    columns = ('count', 'p50', 'p95', 'total', 'bytes', 'status', 'host', 'operation')
+    rows = [['{:d}'.format(s['count']), '{:.3f}'.format(s['p50']), '{:.3f}'.format(s['p95']),
+             '{:.3f}'.format(s['total']), '{:d}'.format(s['bytes']), s['status'], s['host'],
+             s['operation']] for s in summary]
+    widths = [max([len(c)] + [len(r[i]) for r in rows]) for i, c in enumerate(columns)]
+    lines = ['  '.join(c.ljust(w) for c, w in zip(columns, widths)).rstrip(),
+             '  '.join('-' * w for w in widths)]
+    lines.extend('  '.join(v.ljust(w) for v, w in zip(r, widths)).rstrip() for r in rows)
+    by_host = {}
+    for s in summary:
+        by_host[s['host']] = by_host.get(s['host'], 0) + s['total']
+    lines.append('')
+    lines.extend('{:.3f}s {}'.format(total, host)
+                 for host, total in sorted(by_host.items(), key=lambda h: -h[1]))
+    lines.append('{:.3f}s wall time of the command'.format(wall_time))
+    file.write('\n'.join(lines) + '\n')
@@ -35,6 +35,7 @@ from azure.cli.main import main as cli_main
 
 from azure.cli.core import __version__ as core_version
 import azure.cli.core._debug as _debug
+from azure.cli.core._connection_pool import close_connection_pool
 from azure.cli.core._profile import Profile
 from azure.cli.core._util import CLIError
 
@@ -104,7 +105,7 @@ def _mock_user_access_token(_, _1, _2, _3):  # pylint: disable=unused-argument
     return ('Bearer', 'top-secret-token-for-you')
 
 
-def _mock_operation_delay(_):
+def _mock_operation_delay(*_):
     # don't run time.sleep()
     return
 
@@ -342,6 +343,8 @@ class VCRTestBase(unittest.TestCase):  # pylint: disable=too-many-instance-attri
             if callable(set_up) and not self.skip_setup:
                 self.set_up()
 
+            # connections kept from earlier tests would bypass the cassette
+            close_connection_pool()
             if self.run_live:
                 self.body()
             else:
@@ -368,6 +371,7 @@ class VCRTestBase(unittest.TestCase):  # pylint: disable=too-many-instance-attri
                 _mock_generate_deployment_name)
     def _execute_playback(self):
         # pylint: disable=no-member
+        close_connection_pool()
         with self.my_vcr.use_cassette(self.cassette_path):
             self.body()
         self.success = True
@@ -5,7 +5,8 @@
 
 import unittest
 from six import StringIO
-from azure.cli.core.extensions.transform import _parse_id, _add_resource_group
+from azure.cli.core._util import todict
+from azure.cli.core.extensions.transform import add_resource_group
 
 
 class TestResourceGroupTransform(unittest.TestCase):
@@ -29,31 +30,12 @@ class TestResourceGroupTransform(unittest.TestCase):
     BOGUS_ID = "|completely-bogus-id|"
     DICT_ID = {'value': "/subscriptions/00000000-0000-0000-0000-0000000000000/resourceGroups/REsourceGROUPname/providers/Microsoft.Compute/virtualMachines/vMName"}  # pylint: disable=line-too-long
 
-    def test_split_correct_id(self):
-        result = _parse_id(TestResourceGroupTransform.CORRECT_ID)
-        self.assertDictEqual(result, {
-            'resource-group': 'REsourceGROUPname',
-            'name': 'vMName'
-        })
-
-    def test_split_non_resourcegroup_id(self):
-        with self.assertRaises(KeyError):
-            _parse_id(TestResourceGroupTransform.NON_RG_ID)
-
-    def test_split_bogus_resourcegroup_id(self):
-        with self.assertRaises(IndexError):
-            _parse_id(TestResourceGroupTransform.BOGUS_ID)
-
-    def test_split_dict_id(self):
-        with self.assertRaises(TypeError):
-            _parse_id(TestResourceGroupTransform.DICT_ID)
-
     def test_add_valid_resourcegroup_id(self):
         instance = {
             'id': TestResourceGroupTransform.CORRECT_ID,
             'name': 'A name'
         }
-        _add_resource_group(instance)
+        self.assertIs(add_resource_group(instance), instance)
         self.assertDictEqual(instance, {
             'id': TestResourceGroupTransform.CORRECT_ID,
             'resourceGroup': 'REsourceGROUPname',
@@ -61,15 +43,19 @@ class TestResourceGroupTransform(unittest.TestCase):
         })
 
     def test_dont_add_invalid_resourcegroup_id(self):
-        instance = {
-            'id': TestResourceGroupTransform.BOGUS_ID,
-            'name': 'A name'
-        }
-        _add_resource_group(instance)
-        self.assertDictEqual(instance, {
-            'id': TestResourceGroupTransform.BOGUS_ID,
-            'name': 'A name'
-        })
+        for resource_id in [TestResourceGroupTransform.NON_RG_ID,
+                            TestResourceGroupTransform.BOGUS_ID,
+                            TestResourceGroupTransform.DICT_ID,
+                            None]:
+            instance = {
+                'id': resource_id,
+                'name': 'A name'
+            }
+            add_resource_group(instance)
+            self.assertDictEqual(instance, {
+                'id': resource_id,
+                'name': 'A name'
+            })
 
     def test_dont_stomp_on_existing_resourcegroup_id(self):
         instance = {
@@ -77,13 +63,26 @@ class TestResourceGroupTransform(unittest.TestCase):
             'resourceGroup': 'SomethingElse',
             'name': 'A name'
         }
-        _add_resource_group(instance)
+        add_resource_group(instance)
         self.assertDictEqual(instance, {
             'id': TestResourceGroupTransform.CORRECT_ID,
             'resourceGroup': 'SomethingElse',
             'name': 'A name'
         })
 
+    def test_add_resourcegroup_to_nested_results(self):
+        result = todict([{
+            'id': TestResourceGroupTransform.CORRECT_ID,
+            'nics': [{'id': TestResourceGroupTransform.CORRECT_ID.replace('REsource', 'nic')}],
+            'plan': {'id': TestResourceGroupTransform.BOGUS_ID}
+        }], add_resource_group)
+        self.assertEqual(result, [{
+            'id': TestResourceGroupTransform.CORRECT_ID,
+            'resourceGroup': 'REsourceGROUPname',
+            'nics': [{'id': TestResourceGroupTransform.CORRECT_ID.replace('REsource', 'nic'),
+                      'resourceGroup': 'nicGROUPname'}],
+            'plan': {'id': TestResourceGroupTransform.BOGUS_ID}
+        }])
 
 if __name__ == '__main__':
     unittest.main()
@@ -60,6 +60,76 @@ class TestApplication(unittest.TestCase):
 
         app.raise_event('other_handler_called', args='secret sauce')
 
+    def test_application_handler_registers_during_event(self):
+        calls = []
+
+        def handler(**_):
+            calls.append('handler')
+
+        def registering_handler(**kwargs):
+            calls.append('registering_handler')
+            kwargs['app'].register('event', handler)
+            kwargs['app'].remove('event', registering_handler)
+
+        app = Application(Configuration([]))
+        app.register('event', registering_handler)
+        app.raise_event('event', app=app)
+        self.assertEqual(calls, ['registering_handler'])
+        app.raise_event('event', app=app)
+        self.assertEqual(calls, ['registering_handler', 'handler'])
+        with self.assertRaises(ValueError):
+            app.remove('other_event', handler)
+
+    def test_application_event_data_formatted_lazily(self):
+        import logging
+        from azure.cli.core.application import logger
+
+        class Payload(object):  # pylint: disable=too-few-public-methods
+            formatted = 0
+
+            def __repr__(self):
+                Payload.formatted += 1
+                return 'payload'
+
+        app = Application(Configuration([]))
+        level = logger.level
+        try:
+            logger.setLevel(logging.INFO)
+            app.raise_event(app.TRANSFORM_RESULT, event_data={'result': Payload()})
+            self.assertEqual(Payload.formatted, 0)
+            logger.setLevel(logging.DEBUG)
+            app.raise_event(app.TRANSFORM_RESULT, event_data={'result': Payload()})
+            self.assertEqual(Payload.formatted, 1)
+        finally:
+            logger.setLevel(level)
+
+    def test_application_event_dispatch_overhead(self):
+        import logging
+        import timeit
+        from azure.cli.core.application import logger
+
+        def handler(**_):
+            pass
+
+        app = Application(Configuration([]))
+        for _ in range(5):
+            app.register('event', handler)
+        event_data = {'result': [{'id': str(i)} for i in range(10000)]}
+        level = logger.level
+        try:
+            logger.setLevel(logging.INFO)
+            number = 10000
+            dispatch = min(timeit.repeat(lambda: app.raise_event('event', event_data=event_data),
+                                         number=number, repeat=3)) / number
+            direct = min(timeit.repeat(lambda: [handler(event_data=event_data) for _ in range(5)],
+                                       number=number, repeat=3)) / number
+        finally:
+            logger.setLevel(level)
+        # Without debug logging dispatching must not depend on the size of the event data
+        self.assertLess(dispatch, direct * 10 + 0.00005,
+                        'raise_event took {:.2f}us, calling the handlers {:.2f}us'.format(
+                            dispatch * 1000000, direct * 1000000))
+
     def test_list_value_parameter(self):
         hellos = []
 
@@ -83,6 +153,67 @@ class TestApplication(unittest.TestCase):
         self.assertEqual(hellos[1]['hello'], 'sir')
         self.assertEqual(hellos[1]['something'], 'else')
 
+    def test_list_value_parameter_in_parallel(self):
+        import threading
+        import time
+        lock = threading.Lock()
+        running = [0, 0]  # now, at most
+
+        def handler(args):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            if args['hello'] == 'fail':
+                raise CLIError('failed')
+            return {'hello': args['hello']}
+
+        command = CliCommand('test command', handler)
+        command.add_argument('hello', '--hello', nargs='+', action=IterateAction)
+        cmd_table = {'test command': command}
+
+        argv = 'az test command --hello world fail sir --max-parallel 3'.split()
+        config = Configuration(argv)
+        config.get_command_table = lambda: cmd_table
+        application = Application(config)
+        result = application.execute(argv[1:])
+
+        self.assertEqual(running[1], 3)
+        # the other invocations run and the results keep the order of the values
+        self.assertEqual(result.result, [{'hello': 'world'}, {'hello': 'sir'}])
+        self.assertEqual(result.exit_code, 1)
+
+    def test_application_thread_session(self):
+        import threading
+        app = Application(Configuration([]))
+        shared_session = app.session
+        thread_sessions = {}
+
+        def run_command(name):
+            session = Application(Configuration([])).session
+            app.use_thread_session(session)
+            app.session['command'] = name
+            thread_sessions[name] = app.session
+            app.use_thread_session(None)
+
+        threads = [threading.Thread(target=run_command, args=(name,)) for name in ('a', 'b')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(app.session, shared_session)
+        self.assertEqual(shared_session['command'], 'unknown')
+        self.assertEqual(thread_sessions['a']['command'], 'a')
+        self.assertEqual(thread_sessions['b']['command'], 'b')
+        self.assertNotEqual(thread_sessions['a']['headers']['x-ms-client-request-id'],
+                            thread_sessions['b']['headers']['x-ms-client-request-id'])
+
+        app.reset_session()
+        self.assertIsNot(app.session, shared_session)
+
     def test_expand_file_prefixed_files(self):
         f = tempfile.NamedTemporaryFile(delete=False)
         f.close()
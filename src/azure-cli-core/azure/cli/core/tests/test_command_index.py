@@ -0,0 +1,136 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from azure.cli.core._session import Session
+import azure.cli.core.commands._command_index as command_index
+
+
+class TestCommandIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.index = Session()
+        self.index.load(os.path.join(self.tempdir, 'commandIndex.json'))
+        self.patcher = mock.patch.object(command_index, 'INDEX', self.index)
+        self.patcher.start()
+        self.command_module_map = {
+            'vm create': 'azure.cli.command_modules.vm.commands',
+            'vmss list': 'azure.cli.command_modules.vm.commands',
+            'acs show': 'azure.cli.command_modules.vm.commands',
+            'acs browse': 'azure.cli.command_modules.acs.commands',
+            'group list': 'azure.cli.command_modules.resource.commands',
+            'test command': 'some.test.module'
+        }
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.tempdir)
+
+    def test_command_index_rebuild_and_resolve(self):
+        self.assertFalse(command_index.is_index_current('v1'))
+        command_index.rebuild_index('v1', self.command_module_map)
+        self.assertTrue(command_index.is_index_current('v1'))
+        self.assertFalse(command_index.is_index_current('v2'))
+
+        self.assertEqual(command_index.resolve_command_modules('vmss list'), ['vm'])
+        self.assertEqual(command_index.resolve_command_modules('vmss'), ['vm'])
+        self.assertEqual(command_index.resolve_command_modules('group list --name'), ['resource'])
+        self.assertEqual(command_index.resolve_command_modules('acs'), ['acs', 'vm'])
+        self.assertEqual(command_index.resolve_command_modules('acs show'), ['vm'])
+        self.assertEqual(command_index.resolve_command_modules('acs browse'), ['acs'])
+        self.assertEqual(command_index.resolve_command_modules('acs unknown'), ['acs', 'vm'])
+        self.assertEqual(command_index.resolve_command_modules('vmsss list'), [])
+        self.assertEqual(command_index.resolve_command_modules('test command'), [])
+
+    def test_command_index_persisted(self):
+        command_index.rebuild_index('v1', self.command_module_map)
+        reloaded = Session()
+        reloaded.load(self.index.filename)
+        with mock.patch.object(command_index, 'INDEX', reloaded):
+            self.assertTrue(command_index.is_index_current('v1'))
+            self.assertEqual(command_index.resolve_command_modules('vm create'), ['vm'])
+
+    def test_command_index_rebuild_flag(self):
+        command_index.rebuild_index('v1', self.command_module_map)
+        argv = ['vm', 'list', '--rebuild-command-index']
+        self.assertTrue(command_index.handle_rebuild_command_index_flag(argv))
+        self.assertEqual(argv, ['vm', 'list'])
+        self.assertFalse(command_index.is_index_current('v1'))
+        self.assertFalse(command_index.handle_rebuild_command_index_flag(argv))
+
+    def test_command_index_disabled_without_file(self):
+        with mock.patch.object(command_index, 'INDEX', Session()):
+            self.assertFalse(command_index.is_index_enabled())
+            command_index.rebuild_index('v1', self.command_module_map)
+            self.assertFalse(command_index.is_index_current('v1'))
+
+    def test_command_index_version_tracks_modules(self):
+        mod_dir = os.path.join(self.tempdir, 'vm')
+        os.mkdir(mod_dir)
+        version = command_index.get_index_version([('vm', mod_dir)])
+        self.assertEqual(version, command_index.get_index_version([('vm', mod_dir)]))
+        self.assertNotEqual(version, command_index.get_index_version([('vm', mod_dir),
+                                                                      ('network', mod_dir)]))
+        os.utime(mod_dir, (0, 0))
+        self.assertNotEqual(version, command_index.get_index_version([('vm', mod_dir)]))
+
+        # editing a file of the module in place doesn't change the folder
+        commands_file = os.path.join(mod_dir, 'commands.py')
+        with open(commands_file, 'w') as f:
+            f.write('')
+        os.utime(mod_dir, (0, 0))
+        version = command_index.get_index_version([('vm', mod_dir)])
+        os.utime(commands_file, (10000, 10000))
+        os.utime(mod_dir, (0, 0))
+        self.assertNotEqual(version, command_index.get_index_version([('vm', mod_dir)]))
+
+    def test_command_index_known_command_skips_module_check(self):
+        import azure.cli.core.commands as commands
+        command_index.rebuild_index('v1', self.command_module_map)
+        with mock.patch.object(commands, 'get_installed_command_modules') as installed, \
+                mock.patch.object(commands, 'get_index_version') as index_version, \
+                mock.patch.object(commands, '_load_command_module') as load_module:
+            commands.get_command_table(command_name='vmss list')
+        installed.assert_not_called()
+        index_version.assert_not_called()
+        load_module.assert_called_once_with('vm')
+
+    def test_command_index_outdated_for_unknown_command(self):
+        import azure.cli.core.commands as commands
+        command_index.rebuild_index('v1', self.command_module_map)
+        installed_modules = [('vm', ''), ('network', '')]
+        with mock.patch.object(commands, 'get_installed_command_modules',
+                               return_value=installed_modules), \
+                mock.patch.object(commands, 'get_index_version', return_value='v2'), \
+                mock.patch.object(commands, '_load_command_module') as load_module, \
+                mock.patch.object(commands, 'rebuild_index') as rebuild, \
+                mock.patch.object(commands, 'compile_help_index'):
+            commands.get_command_table(command_name='vm new-command')
+        self.assertEqual([c[0][0] for c in load_module.call_args_list], ['vm', 'network'])
+        rebuild.assert_called_once_with('v2', mock.ANY)
+
+    def test_command_index_unknown_command_loads_no_module(self):
+        import azure.cli.core.commands as commands
+        command_index.rebuild_index('v1', self.command_module_map)
+        with mock.patch.object(commands, 'get_installed_command_modules', return_value=[]), \
+                mock.patch.object(commands, 'get_index_version', return_value='v1'), \
+                mock.patch.object(commands, '_load_command_module') as load_module, \
+                mock.patch.object(commands, 'rebuild_index') as rebuild, \
+                mock.patch.object(commands, 'compile_help_index') as compile_help:
+            commands.get_command_table(command_name='vmsss list')
+        load_module.assert_not_called()
+        rebuild.assert_not_called()
+        compile_help.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -145,6 +145,32 @@ class Test_command_registration(unittest.TestCase):
         self.assertTrue(command3.options['help'] == 'second modification')
         command_table.clear()
 
+    def test_register_cli_argument_resolves_loaded_commands(self):
+        command_table.clear()
+
+        cli_command(None, 'test scope vm-get',
+                    '{}#Test_command_registration.sample_vm_get'.format(__name__), None)
+        cli_command(None, 'test scope vm-show',
+                    '{}#Test_command_registration.sample_vm_get'.format(__name__), None)
+        register_cli_argument('test', 'vm_name', help='test help')
+        register_extra_cli_argument('test scope vm-show', 'added_param')
+
+        command_table['test scope vm-get'].load_arguments()
+        _update_command_definitions(command_table)
+        self.assertEqual(command_table['test scope vm-get'].arguments['vm_name'].options['help'],
+                         'test help')
+        self.assertEqual(command_table['test scope vm-show'].arguments, {})
+
+        # scopes registered after a command was resolved still apply to it
+        register_cli_argument('test scope', 'vm_name', help='scope help')
+        command_table['test scope vm-show'].load_arguments()
+        _update_command_definitions(command_table)
+        for name in ('test scope vm-get', 'test scope vm-show'):
+            self.assertEqual(command_table[name].arguments['vm_name'].options['help'],
+                             'scope help')
+        self.assertIn('added_param', command_table['test scope vm-show'].arguments)
+        command_table.clear()
+
     def test_register_extra_cli_argument(self):
         command_table.clear()
 
@@ -0,0 +1,46 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import unittest
+
+import mock
+import requests
+from requests.adapters import HTTPAdapter
+
+import azure.cli.core._connection_pool as connection_pool
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def tearDown(self):
+        connection_pool.close_connection_pool()
+
+    def test_sessions_share_connection_pool(self):
+        first = connection_pool.get_pooled_session()
+        second = connection_pool.get_pooled_session()
+        # msrest mounts new adapters on the session for every request
+        second.mount('https://', HTTPAdapter(max_retries=3))
+
+        pool = first.get_adapter('https://management.azure.com').poolmanager
+        self.assertIs(second.get_adapter('https://management.azure.com').poolmanager, pool)
+        self.assertEqual(second.get_adapter('https://management.azure.com').max_retries.total, 3)
+
+        connection = pool.connection_from_url('https://management.azure.com')
+        first.close()
+        self.assertIs(pool.connection_from_url('https://management.azure.com'), connection)
+
+        connection_pool.close_connection_pool()
+        self.assertIsNot(connection_pool.get_pooled_session().get_adapter('https://').poolmanager,
+                         pool)
+
+    def test_connection_pool_disabled(self):
+        with mock.patch.dict(os.environ, {'AZURE_CORE_CONNECTION_POOL_SIZE': '0'}):
+            session = connection_pool.get_pooled_session()
+        self.assertIs(type(session), requests.Session)
+
+
+if __name__ == '__main__':
+    unittest.main()
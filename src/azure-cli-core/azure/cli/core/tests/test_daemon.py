@@ -0,0 +1,119 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import unittest
+
+import mock
+
+import azure.cli.core._daemon as daemon
+from azure.cli.core._session import Session
+
+
+def _echo_handler(argv):
+    if argv[0] == 'cache':
+        # caches are saved when the process exits
+        import atexit
+        cache = Session()
+        cache.load(argv[1])
+        cache['key'] = 'old'
+        cache.data['key'] = 'new'
+        atexit.register(cache.save_with_retry)
+        return 0
+    sys.stdout.write('{} {} {}\n'.format(' '.join(argv), os.environ.get('AZ_DAEMON_TEST'),
+                                         os.getcwd()))
+    sys.stderr.write(sys.stdin.read())
+    return int(argv[-1])
+
+
+@unittest.skipUnless(daemon.is_daemon_supported(), 'Unix sockets with fd passing required')
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = os.path.realpath(tempfile.mkdtemp())
+        self.socket_path = os.path.join(self.tempdir, daemon.DAEMON_SOCKET_NAME)
+        self._start_server()
+
+    def _start_server(self):
+        self.server_pid = os.fork()
+        if self.server_pid == 0:
+            try:
+                daemon.serve(self.socket_path, handler=_echo_handler, warm_up=False)
+            finally:
+                os._exit(0)  # pylint: disable=protected-access
+        deadline = time.time() + 10
+        while not os.path.exists(self.socket_path) and time.time() < deadline:
+            time.sleep(0.05)
+
+    def tearDown(self):
+        self._stop_server()
+        shutil.rmtree(self.tempdir)
+
+    def _stop_server(self):
+        os.kill(self.server_pid, signal.SIGTERM)
+        os.waitpid(self.server_pid, 0)
+
+    def _run(self, argv, stdin=b''):
+        paths = [os.path.join(self.tempdir, name) for name in ('stdin', 'stdout', 'stderr')]
+        with open(paths[0], 'wb') as f:
+            f.write(stdin)
+        files = [open(paths[0], 'rb'), open(paths[1], 'wb'), open(paths[2], 'wb')]
+        try:
+            exit_code = daemon.run_in_daemon(argv, socket_path=self.socket_path,
+                                             fds=[f.fileno() for f in files])
+        finally:
+            for f in files:
+                f.close()
+        with open(paths[1], 'rb') as out, open(paths[2], 'rb') as err:
+            return exit_code, out.read().decode('utf-8'), err.read().decode('utf-8')
+
+    def test_daemon_runs_command_with_client_context(self):
+        cwd = os.getcwd()
+        os.chdir(self.tempdir)
+        try:
+            with mock.patch.dict(os.environ, {'AZ_DAEMON_TEST': 'first'}):
+                first = self._run(['vm', 'list', '0'], stdin=b'input')
+            with mock.patch.dict(os.environ, {'AZ_DAEMON_TEST': 'second'}):
+                second = self._run(['vm', 'show', '3'])
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(first, (0, 'vm list 0 first {}\n'.format(self.tempdir), 'input'))
+        self.assertEqual(second, (3, 'vm show 3 second {}\n'.format(self.tempdir), ''))
+
+    def test_daemon_saves_caches_of_requests(self):
+        cache_path = os.path.join(self.tempdir, 'cache.json')
+        self.assertEqual(self._run(['cache', cache_path])[0], 0)
+        cache = Session()
+        cache.load(cache_path)
+        self.assertEqual(cache.data, {'key': 'new'})
+
+    def test_daemon_accepts_only_its_user(self):
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+        self._stop_server()
+        with mock.patch.object(daemon, '_get_peer_uid', return_value=os.getuid() + 1):
+            self._start_server()
+        exit_code, out, _ = self._run(['vm', 'list', '0'])
+        self.assertNotEqual(exit_code, 0)
+        self.assertEqual(out, '')
+
+    def test_daemon_rejects_other_version(self):
+        with mock.patch.object(daemon, 'core_version', '0.0.0'):
+            self.assertIsNone(self._run(['vm', 'list', '0'])[0])
+
+    def test_daemon_not_used(self):
+        self.assertIsNone(daemon.run_in_daemon(['vm', 'list'],
+                                               socket_path=self.socket_path + '.missing'))
+        self.assertIsNone(daemon.run_in_daemon(['daemon', 'stop'], socket_path=self.socket_path))
+        with mock.patch.dict(os.environ, {'_ARGCOMPLETE': '1'}):
+            self.assertIsNone(daemon.run_in_daemon(['vm', 'list'], socket_path=self.socket_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
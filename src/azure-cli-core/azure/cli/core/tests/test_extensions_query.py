@@ -5,7 +5,7 @@
 
 import unittest
 
-from azure.cli.core.extensions.query import jmespath_type
+from azure.cli.core.extensions.query import jmespath_type, _is_item_query, _search_item
 
 
 class TestQuery(unittest.TestCase):
@@ -55,6 +55,23 @@ class TestQuery(unittest.TestCase):
         with self.assertRaises(ValueError):
             jmespath_type(query)
 
+    def test_query_applied_per_item(self):
+        from collections import OrderedDict
+        from jmespath import Options
+        items = [{'name': 'a', 'location': 'westus'}, {'name': 'b', 'location': 'eastus'},
+                 {'location': 'westus'}]
+        options = Options(OrderedDict)
+        for query in ('[].name', '[*].name', "[?location=='westus']", "[?location=='westus'].name",
+                      '[].{n:name, l:location}'):
+            expression = jmespath_type(query)
+            self.assertTrue(_is_item_query(expression), query)
+            per_item = [_search_item(expression, item, options) for item in items]
+            self.assertEqual([r for r in per_item if r is not None],
+                             expression.search(items, options), query)
+        for query in ('length(@)', '[0]', 'sort_by(@, &name)', '[].name | [0]', 'name'):
+            self.assertFalse(_is_item_query(jmespath_type(query)), query)
+
+
 
 if __name__ == '__main__':
     unittest.main()
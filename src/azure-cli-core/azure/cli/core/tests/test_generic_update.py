@@ -351,5 +351,59 @@ class GenericUpdateTest(unittest.TestCase):
         self.assertEqual(len(my_obj['dict3']), 1, 'verify only one object added to empty dict')
 
 
+    def test_generic_update_patch(self):
+        class ModelTestObject(object):
+            _validation = {'location': {'required': True}}
+            _attribute_map = {
+                'location': {'key': 'location', 'type': 'str'},
+                'tags': {'key': 'tags', 'type': '{str}'},
+                'my_prop': {'key': 'myProp', 'type': 'str'},
+                'etag': {'key': 'etag', 'type': 'str'}
+            }
+
+            def __init__(self):
+                self.location = 'westus'
+                self.tags = {'a': 'b'}
+                self.my_prop = 'my_value'
+                self.etag = 'v1'
+
+        my_obj = ModelTestObject()
+        calls = []
+
+        def my_get():
+            return my_obj
+
+        def my_set(parameters, custom_headers=None):
+            calls.append(('set', parameters, custom_headers))
+            return parameters
+
+        def my_patch(parameters):
+            calls.append(('patch', parameters, None))
+            return parameters
+
+        config = Configuration([])
+        app = Application(config)
+
+        for op in (my_get, my_set, my_patch):
+            setattr(sys.modules[__name__], op.__name__, op)
+        cli_generic_update_command(None, 'gencommand', '{}#my_get'.format(__name__),
+                                   '{}#my_set'.format(__name__),
+                                   patcher_op='{}#my_patch'.format(__name__))
+
+        # only the property which changed, and the required ones, are sent
+        app.execute('gencommand --set tags.c=d'.split())
+        operation, parameters, _ = calls.pop()
+        self.assertEqual(operation, 'patch')
+        self.assertEqual((parameters.location, parameters.tags, parameters.my_prop,
+                          parameters.etag), ('westus', {'a': 'b', 'c': 'd'}, None, None))
+        self.assertEqual(my_obj.my_prop, 'my_value', 'verify the instance is left as it was')
+
+        # a removal can't be patched, the whole object is set if it wasn't changed meanwhile
+        app.execute('gencommand --remove tags.a'.split())
+        operation, parameters, headers = calls.pop()
+        self.assertEqual(operation, 'set')
+        self.assertEqual(parameters.my_prop, 'my_value')
+        self.assertEqual(headers, {'If-Match': 'v1'})
+
 if __name__ == '__main__':
     unittest.main()
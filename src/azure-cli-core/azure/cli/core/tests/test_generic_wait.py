@@ -0,0 +1,121 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import sys
+import threading
+import unittest
+
+import mock
+
+from azure.cli.core.application import IterateValue
+from azure.cli.core.commands import command_table
+from azure.cli.core.commands.arm import cli_generic_wait_command
+import azure.cli.core.commands._polling as polling
+import azure.cli.core.commands._wait as wait
+from azure.cli.core._util import CLIError
+
+
+class _Resource(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self, name, provisioning_state):
+        self.name = name
+        self.provisioning_state = provisioning_state
+
+
+class _Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestGenericWait(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.patchers = [mock.patch.object(wait.time, 'time', self.clock.time),
+                         mock.patch.object(wait.time, 'sleep', self.clock.sleep),
+                         mock.patch.object(polling, 'get_polling_policy', polling.PollingPolicy)]
+        for patcher in self.patchers:
+            patcher.start()
+        # the time each resource succeeds at
+        self.ready = {'a': 3, 'b': 10, 'c': 5, 'd': 1000}
+        self.calls = []
+        self.lock = threading.Lock()
+
+        def get_res(resource_group_name, name):
+            with self.lock:
+                self.calls.append(('get', resource_group_name, name, self.clock.now))
+            return self._get_resource(name)
+
+        def list_res(resource_group_name):
+            with self.lock:
+                self.calls.append(('list', resource_group_name, None, self.clock.now))
+            return [self._get_resource(n) for n in ('a', 'b', 'd')]
+
+        setattr(sys.modules[__name__], get_res.__name__, get_res)
+        setattr(sys.modules[__name__], list_res.__name__, list_res)
+        cli_generic_wait_command(None, 'wait-res', '{}#get_res'.format(__name__),
+                                 lister_op='{}#list_res'.format(__name__))
+        self.command = command_table['wait-res']
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        command_table.pop('wait-res', None)
+
+    def _get_resource(self, name):
+        state = 'Succeeded' if self.clock.now >= self.ready[name] else 'Updating'
+        return _Resource(name, state)
+
+    def _wait(self, resource_group_name, name, timeout=60, interval=30):
+        return self.command.handler({'resource_group_name': resource_group_name, 'name': name,
+                                     'timeout': timeout, 'interval': interval, 'created': True,
+                                     'deleted': False, 'updated': False, 'exists': False,
+                                     'custom': None})
+
+    def test_generic_wait_for_several_resources(self):
+        self.assertTrue(self.command.handles_iterate_values)
+        rows = self._wait(IterateValue(['RG1', 'rg2', 'rg1']), IterateValue(['a', 'c', 'b']))
+
+        # the resources are reported as they reach the condition
+        self.assertEqual([(r['name'], r['resourceGroup'], r['status'], r['elapsed']) for r in rows],
+                         [('a', 'RG1', 'Succeeded', 3), ('c', 'rg2', 'Succeeded', 7),
+                          ('b', 'rg1', 'Succeeded', 15)])
+        # one list call checks the resources of a resource group; each is checked at 0, 1, 3, 7
+        # and 15 seconds, until it succeeded
+        self.assertEqual(sorted(c[3] for c in self.calls if c[0] == 'list'), [0, 1, 3])
+        self.assertEqual(sorted((c[2], c[3]) for c in self.calls if c[0] == 'get'),
+                         [('b', 7), ('b', 15), ('c', 0), ('c', 1), ('c', 3), ('c', 7)])
+
+        self.clock.now = 0
+        with self.assertRaises(CLIError) as error:
+            self._wait(IterateValue(['rg1', 'rg1']), IterateValue(['a', 'd']), timeout=20)
+        self.assertTrue(str(error.exception).endswith('timed out: d'))
+
+    def test_generic_wait_for_one_resource(self):
+        self.assertIsNone(self._wait('rg1', 'b'))
+        self.assertEqual([c[3] for c in self.calls], [0, 1, 3, 7, 15])
+        self.assertTrue(all(c[0] == 'get' for c in self.calls))
+
+        self.clock.now = 0
+        with self.assertRaises(CLIError) as error:
+            self._wait('rg1', 'd', timeout=20)
+        self.assertIn('timed-out', str(error.exception))
+
+    def test_generic_wait_rejects_zero_interval(self):
+        with self.assertRaises(CLIError) as error:
+            self._wait('rg1', 'b', interval=0)
+        self.assertIn('--interval', str(error.exception))
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
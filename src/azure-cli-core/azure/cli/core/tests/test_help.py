@@ -6,7 +6,10 @@
 from __future__ import print_function
 
 import logging
+import os
+import shutil
 import sys
+import tempfile
 import unittest
 import mock
 from six import StringIO
@@ -55,6 +58,57 @@ class HelpArgumentGroupRegistryTest(unittest.TestCase):
         self.assertEqual(group_registry.get_group_priority('Global Arguments'), '001000')
 
 
+class HelpIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.helps = {
+            'test_group1': 'type: group\nshort-summary: this module does xyz one-line or so\n',
+            'test_group1 test_command1': 'type: command\nshort-summary: one-line summary\n'
+        }
+        self.patchers = [
+            mock.patch.object(azure.cli.core.help_files, 'helps', self.helps),
+            mock.patch.object(azure.cli.core.help_files, '_help_index',
+                              azure.cli.core.help_files.Session()),
+            mock.patch.object(azure.cli.core.help_files, '_help_index_save_registered', True)
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        azure.cli.core.help_files.enable_help_index(os.path.join(self.tempdir, 'helpIndex.json'))
+
+    def tearDown(self):
+        azure.cli.core.help_files.enable_help_index(None)
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.tempdir)
+
+    def test_help_index_parses_changed_entries_only(self):
+        help_files = azure.cli.core.help_files
+        help_files.compile_help_index()
+        help_files._help_index.save()  # pylint: disable=protected-access
+
+        reloaded = help_files.Session()
+        self.helps['test_group1 test_command1'] = 'short-summary: updated summary\n'
+        with mock.patch.object(help_files, '_help_index', reloaded), \
+                mock.patch.object(help_files, '_parse_help_text',
+                                  wraps=help_files._parse_help_text) as parse:  # pylint: disable=protected-access
+            self.assertEqual(help_files._load_help_file('test_group1'),  # pylint: disable=protected-access
+                             {'type': 'group',
+                              'short-summary': 'this module does xyz one-line or so'})
+            self.assertEqual(parse.call_count, 0)
+            self.assertEqual(help_files._load_help_file('test_group1 test_command1'),  # pylint: disable=protected-access
+                             {'short-summary': 'updated summary'})
+            self.assertEqual(parse.call_count, 1)
+            self.assertIsNone(help_files._load_help_file('test_group2'))  # pylint: disable=protected-access
+
+    def test_help_index_drops_unregistered_entries(self):
+        help_files = azure.cli.core.help_files
+        help_files.compile_help_index()
+        del self.helps['test_group1 test_command1']
+        help_files.compile_help_index()
+        self.assertEqual(sorted(help_files._help_index['entries']), ['test_group1'])  # pylint: disable=protected-access
+
+
 class HelpObjectTest(unittest.TestCase):
     def test_short_summary_no_fullstop(self):
         obj = _help.HelpObject()
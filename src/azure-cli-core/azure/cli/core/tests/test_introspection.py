@@ -0,0 +1,91 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from azure.cli.core._session import Session
+import azure.cli.core.commands._introspection as introspection
+
+SAMPLE_OPERATION = 'azure.cli.core.tests.test_introspection#sample_operation'
+
+
+def sample_operation(client, resource_group_name, name, tags=None, raw=False,
+                     force=False, custom_headers=None):
+    """ Update a sample resource.
+
+    :param resource_group_name: The name of the resource group.
+    :param name: The name of the resource. It must be
+     unique within the resource group.
+    :param tags: Resource tags.
+    """
+    pass
+
+
+class TestIntrospectionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.metadata = Session()
+        self.metadata.load(os.path.join(self.tempdir, 'commandMetadata.json'))
+        self.patchers = [mock.patch.object(introspection, 'METADATA', self.metadata),
+                         mock.patch.object(introspection, '_save_registered', True)]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.tempdir)
+
+    def _load(self, no_wait_param=None):
+        args = introspection.extract_args_from_operation(SAMPLE_OPERATION, no_wait_param)
+        summary = introspection.extract_full_summary_from_operation(SAMPLE_OPERATION)
+        return [(name, arg.type.settings) for name, arg in args], summary
+
+    def test_introspection_cache_skips_operation_import(self):
+        args, summary = self._load()
+        self.assertEqual([name for name, _ in args],
+                         ['resource_group_name', 'name', 'tags', 'force'])
+        self.assertEqual(args[1][1]['help'],
+                         'The name of the resource. It must be unique within the resource group.')
+        self.assertEqual(args[3][1]['action'], 'store_true')
+        self.assertEqual(summary, 'Update a sample resource.')
+
+        self.metadata.save()
+        reloaded = Session()
+        reloaded.load(self.metadata.filename)
+        with mock.patch.object(introspection, 'METADATA', reloaded), \
+                mock.patch('azure.cli.core.commands.get_op_handler',
+                           side_effect=AssertionError('operation imported')):
+            self.assertEqual(self._load(), (args, summary))
+
+        # the no-wait variant of the arguments is cached separately
+        no_wait_args = dict(self._load(no_wait_param='raw')[0])
+        self.assertEqual(no_wait_args['raw']['options_list'], ['--no-wait'])
+
+    def test_introspection_cache_invalidated_by_module_version(self):
+        self._load()
+        with mock.patch.object(introspection, '_get_module_version', return_value=1), \
+                mock.patch('azure.cli.core.commands.get_op_handler',
+                           return_value=sample_operation) as get_op_handler:
+            self._load()
+            self.assertEqual(get_op_handler.call_count, 2)
+            self._load()
+            self.assertEqual(get_op_handler.call_count, 2)
+
+    def test_introspection_cache_disabled_without_file(self):
+        with mock.patch.object(introspection, 'METADATA', Session()):
+            args, _ = self._load()
+            self.assertEqual(len(args), 4)
+        self.assertEqual(self.metadata.data, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import timeit
+import unittest
+
+import mock
+
+import azure.cli.core.commands as commands
+import azure.cli.core.commands._polling as polling
+
+
+class _FakePoller(object):
+    """ Requests the status of an operation which takes `duration` seconds like the msrestazure
+    AzureOperationPoller, on a fake clock """
+
+    def __init__(self, duration, headers=None):
+        self.duration = duration
+        self.now = 0
+        self.polls = 0
+        self._response = mock.MagicMock(headers=headers or {})
+
+    def _delay(self):
+        self.now += 30
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def run(self):
+        with mock.patch.object(polling.time, 'sleep', self.sleep):
+            while self.now < self.duration:
+                self._delay()
+                self.polls += 1
+        return self.polls
+
+
+class _ThreadedPoller(object):
+
+    def __init__(self, duration):
+        self._response = None
+        self._callbacks = []
+        self._thread = threading.Timer(duration, self._finish)
+        self._thread.start()
+
+    def _finish(self):
+        for callback in self._callbacks:
+            callback(None)
+
+    def add_done_callback(self, func):
+        self._callbacks.append(func)
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def result(self):
+        self._thread.join()
+        return 'result'
+
+
+class TestLongRunningOperation(unittest.TestCase):
+
+    def _count_polls(self, policy, duration, headers=None):
+        poller = _FakePoller(duration, headers)
+        polling.apply_polling_policy(poller, policy)
+        return poller.run()
+
+    def test_polling_policy(self):
+        adaptive = polling.PollingPolicy()
+        # 1, 2, 4, 8, 16 seconds, then every 30 seconds
+        self.assertEqual(self._count_polls(adaptive, 3), 2)
+        self.assertEqual(self._count_polls(adaptive, 600), 24)
+        # the service knows best
+        self.assertEqual(self._count_polls(adaptive, 600, {'Retry-After': '60'}), 10)
+
+        fixed = polling.PollingPolicy(adaptive=False)
+        self.assertEqual(self._count_polls(fixed, 3), 1)
+        self.assertEqual(_FakePoller(3).run(), 1)
+        self.assertEqual(self._count_polls(fixed, 600), _FakePoller(600).run())
+        self.assertEqual(polling.PollingPolicy(interval=5, max_interval=10).get_interval(3), 10)
+
+    def test_wait_ends_when_operation_is_done(self):
+        poller = _ThreadedPoller(0.05)
+        start = timeit.default_timer()
+        with mock.patch.object(commands, '_get_poller_response_content') as get_content:
+            self.assertEqual(commands.LongRunningOperation()(poller), 'result')
+        # without waiting for the interval of one second
+        self.assertLess(timeit.default_timer() - start, 0.9)
+        # the response is only parsed to log the progress at debug level
+        self.assertFalse(get_content.called)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,8 +9,8 @@ import unittest
 from collections import OrderedDict
 from six import StringIO
 
-from azure.cli.core._output import (OutputProducer, format_json, format_table,
-                                    format_tsv, CommandResultItem)
+from azure.cli.core._output import (OutputProducer, format_json, format_jsonl, format_table,
+                                    format_tsv, CommandResultItem, StreamingResult)
 import azure.cli.core._util as util
 
 
@@ -177,6 +177,54 @@ qwerty  0b1f6472qwerty         1  0b1f6472
         result = format_tsv(CommandResultItem([obj1, obj2]))
         self.assertEqual(result, '1\t2\n3\t4\n')
 
+    def test_out_streaming_result(self):
+        items = [{'name': 'a', 'tags': {'x': '1'}}, {'name': 'b', 'tags': None},
+                 {'name': 'c', 'tags': {}}]
+
+        def _stream(format_type):
+            fetched = []
+
+            def _fetch():
+                for item in items:
+                    fetched.append(item)
+                    yield item
+            result = StreamingResult(_fetch()).map(lambda i: None if i['name'] == 'c' else i)
+            io = StringIO()
+            formatter = OutputProducer.get_formatter(format_type)
+            self.assertTrue(OutputProducer.can_stream(format_type))
+            OutputProducer(formatter=formatter, file=io).out(CommandResultItem(result))
+            self.assertEqual(fetched, items)
+            return io.getvalue()
+
+        expected = items[:2]
+        self.assertEqual(_stream('json'), format_json(CommandResultItem(expected)))
+        self.assertEqual(_stream('tsv'), format_tsv(CommandResultItem(expected)))
+
+        io = StringIO()
+        OutputProducer(formatter=format_json, file=io).out(
+            CommandResultItem(StreamingResult(iter([]))))
+        self.assertEqual(io.getvalue(), '[]\n')
+
+        # formats which need all items get a list
+        self.assertFalse(OutputProducer.can_stream('table'))
+        io = StringIO()
+        OutputProducer(formatter=format_table, file=io).out(
+            CommandResultItem(StreamingResult(iter(expected))))
+        self.assertEqual(io.getvalue(), format_table(CommandResultItem(expected)))
+
+
+    def test_out_jsonl(self):
+        items = [OrderedDict([('name', 'b'), ('id', 1)]), {'tags': {'a': u'\u00e9'}, 'data': b'x'}]
+        output_producer = OutputProducer(formatter=format_jsonl, file=self.io)
+        output_producer.out(CommandResultItem(StreamingResult(iter(items))))
+        self.assertEqual(self.io.getvalue().splitlines()[0], '{"name":"b","id":1}')
+        self.assertEqual(len(self.io.getvalue().splitlines()), 2)
+        self.assertEqual(format_jsonl(CommandResultItem(items)), self.io.getvalue())
+        self.assertEqual(format_jsonl(CommandResultItem({'id': '0b1f6472'})),
+                         '{"id":"0b1f6472"}\n')
+        self.assertEqual(format_jsonl(CommandResultItem([])), '')
+
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -105,6 +105,49 @@ class TestParser(unittest.TestCase):
         args = parser.parse_args('test command --opt sNake_CASE'.split())
         self.assertEqual(args.opt, 'snake_case')
 
+    def test_lazy_command_table(self):
+        def test_handler1():
+            pass
+
+        def test_handler2():
+            pass
+
+        command = CliCommand('group1 command1', test_handler1)
+        command.add_argument('arg1', '--arg1', required=True)
+        command2 = CliCommand('group1 sub-group command2', test_handler2)
+        command2.add_argument('arg2', '--arg2')
+        command3 = CliCommand('group2 command3', test_handler2)
+        cmd_table = {'group1 command1': command,
+                     'group1 sub-group command2': command2,
+                     'group2 command3': command3}
+
+        parser = AzCliCommandParser()
+        parser.load_command_table(cmd_table, lazy=True)
+        self.assertEqual(list(parser.subparsers), [()])
+        self.assertEqual(sorted(parser.subparsers[()].choices), ['group1', 'group2'])
+
+        args = parser.parse_args('group1 command1 --arg1 yep'.split())
+        self.assertIs(args.func, test_handler1)
+        self.assertEqual(args.arg1, 'yep')
+        # only the parsers on the path of the parsed command have been created
+        self.assertEqual(sorted(parser.subparsers), [(), ('group1',)])
+        group1_choices = parser.subparsers[('group1',)].choices
+        self.assertIsInstance(dict.get(group1_choices, 'command1'), AzCliCommandParser)
+        self.assertNotIsInstance(dict.get(group1_choices, 'sub-group'), AzCliCommandParser)
+
+        # loading the table again replaces the parsers already created
+        parser.load_command_table(cmd_table, lazy=True)
+        self.assertNotIsInstance(dict.get(group1_choices, 'command1'), AzCliCommandParser)
+
+        args = parser.parse_args('group1 sub-group command2 --arg2 nope'.split())
+        self.assertIs(args.func, test_handler2)
+        self.assertEqual(args.arg2, 'nope')
+        self.assertEqual(sorted(parser.subparsers), [(), ('group1',), ('group1', 'sub-group')])
+
+        AzCliCommandParser.error = VerifyError(self)
+        parser.parse_args('group2 command3 --arg1 yep'.split())
+        self.assertTrue(AzCliCommandParser.error.called)
+
 
 class VerifyError(object):  # pylint: disable=too-few-public-methods
 
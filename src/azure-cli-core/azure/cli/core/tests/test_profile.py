@@ -5,11 +5,13 @@
 
 # pylint: disable=protected-access, unsubscriptable-object
 import json
+import os
 import unittest
 import mock
 from azure.mgmt.resource.subscriptions.models import (SubscriptionState, Subscription,
                                                       SubscriptionPolicies, spendingLimit)
-from azure.cli.core._profile import Profile, CredsCache, SubscriptionFinder, CLOUD
+from azure.cli.core._profile import (Profile, CredsCache, SubscriptionFinder, CLOUD,
+                                     get_shared_creds_cache, reset_shared_creds_cache)
 from azure.cli.core._util import CLIError
 
 
@@ -50,6 +52,9 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
                                              cls.state2,
                                              cls.tenant_id)
 
+    def setUp(self):
+        reset_shared_creds_cache()
+
     def test_normalize(self):
         consolidated = Profile._normalize_properties(self.user1,
                                                      [self.subscription1],
@@ -342,8 +347,9 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         self.assertEqual(mock_read_cred_file.call_count, 1)
         self.assertEqual(mock_persist_creds.call_count, 1)
 
+    @mock.patch('azure.cli.core._profile.file_lock')
     @mock.patch('azure.cli.core._profile._delete_file', autospec=True)
-    def test_logout_all(self, mock_delete_cred_file):
+    def test_logout_all(self, mock_delete_cred_file, mock_file_lock):
         # setup
         storage_mock = {'subscriptions': None}
         profile = Profile(storage_mock)
@@ -356,12 +362,17 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         profile._set_subscriptions(consolidated + consolidated2)
 
         self.assertEqual(2, len(storage_mock['subscriptions']))
+        adal_token_cache = profile._creds_cache.adal_token_cache
         # action
         profile.logout_all()
 
         # verify
         self.assertEqual([], storage_mock['subscriptions'])
         self.assertEqual(mock_delete_cred_file.call_count, 1)
+        # the file is deleted under the lock of the merging writes
+        mock_file_lock.assert_called_once_with(profile._creds_cache._token_file)
+        self.assertIs(profile._creds_cache.adal_token_cache, adal_token_cache)
+        self.assertFalse(adal_token_cache.read_items())
 
     @mock.patch('adal.AuthenticationContext', autospec=True)
     def test_find_subscriptions_thru_username_password(self, mock_auth_context):
@@ -384,6 +395,45 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         mock_auth_context.acquire_token.assert_called_once_with(
             mgmt_resource, self.user1, mock.ANY)
 
+    @mock.patch('adal.AuthenticationContext', autospec=True)
+    def test_find_subscriptions_in_multiple_tenants(self, mock_auth_context):
+        tenants = ['tenant{}'.format(i) for i in range(10)]
+        mock_auth_context.acquire_token_with_username_password.return_value = self.token_entry1
+        mock_auth_context.acquire_token.return_value = self.token_entry1
+        failing_auth_context = mock.MagicMock()
+        failing_auth_context.acquire_token.side_effect = ValueError('tenant is gone')
+
+        def auth_context_factory(authority, _):
+            return failing_auth_context if authority.endswith('/tenant3') else mock_auth_context
+
+        def arm_client_factory(_):
+            client = mock.MagicMock()
+            client.tenants.list.return_value = [TenantStub(t) for t in tenants]
+            client.subscriptions.list.return_value = [
+                SubscriptionStub(self.id1, self.display_name1, self.state1, None)]
+            return client
+
+        finder = SubscriptionFinder(auth_context_factory, None, arm_client_factory)
+        mgmt_resource = 'https://management.core.windows.net/'
+
+        # action #1, all tenants
+        subs = finder.find_from_user_account(self.user1, 'bar', mgmt_resource)
+
+        # assert #1, the failing tenant is skipped and the order of the tenants is kept
+        self.assertEqual([s.tenant_id for s in subs], [t for t in tenants if t != 'tenant3'])
+
+        # action #2, filtered tenants
+        subs = finder.find_from_user_account(self.user1, 'bar', mgmt_resource,
+                                             tenant_filter=['TENANT5', 'tenant1'])
+
+        # assert #2
+        self.assertEqual([s.tenant_id for s in subs], ['tenant1', 'tenant5'])
+
+        # action #3, the only tenant fails
+        with self.assertRaises(ValueError):
+            finder.find_from_user_account(self.user1, 'bar', mgmt_resource,
+                                          tenant_filter=['tenant3'])
+
     @mock.patch('adal.AuthenticationContext', autospec=True)
     def test_find_subscriptions_through_interactive_flow(self, mock_auth_context):
         test_nonsense_code = {'message': 'magic code for you'}
@@ -446,9 +496,9 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         self.assertEqual(creds_cache._service_principal_creds, [test_sp])
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
-    @mock.patch('os.fdopen', autospec=True)
-    @mock.patch('os.open', autospec=True)
-    def test_credscache_add_new_sp_creds(self, _, mock_open_for_write, mock_read_file):
+    @mock.patch('azure.cli.core._profile.write_file_atomic', autospec=True)
+    @mock.patch('azure.cli.core._profile.file_lock')
+    def test_credscache_add_new_sp_creds(self, _, mock_write_file, mock_read_file):
         test_sp = {
             "servicePrincipalId": "myapp",
             "servicePrincipalTenant": "mytenant",
@@ -459,7 +509,6 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
             "servicePrincipalTenant": "mytenant2",
             "accessToken": "Secret2"
         }
-        mock_open_for_write.return_value = FileHandleStub()
         mock_read_file.return_value = [self.token_entry1, test_sp]
         creds_cache = CredsCache()
 
@@ -473,18 +522,17 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         token_entries = [e for _, e in creds_cache.adal_token_cache.read_items()]  # noqa: F812
         self.assertEqual(token_entries, [self.token_entry1])
         self.assertEqual(creds_cache._service_principal_creds, [test_sp, test_sp2])
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
+        mock_write_file.assert_called_with(mock.ANY, mock.ANY, mode=0o600)
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
-    @mock.patch('os.fdopen', autospec=True)
-    @mock.patch('os.open', autospec=True)
-    def test_credscache_remove_creds(self, _, mock_open_for_write, mock_read_file):
+    @mock.patch('azure.cli.core._profile.write_file_atomic', autospec=True)
+    @mock.patch('azure.cli.core._profile.file_lock')
+    def test_credscache_remove_creds(self, _, mock_write_file, mock_read_file):
         test_sp = {
             "servicePrincipalId": "myapp",
             "servicePrincipalTenant": "mytenant",
             "accessToken": "Secret"
         }
-        mock_open_for_write.return_value = FileHandleStub()
         mock_read_file.return_value = [self.token_entry1, test_sp]
         creds_cache = CredsCache()
 
@@ -501,14 +549,14 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
         # assert #2
         self.assertEqual(creds_cache._service_principal_creds, [])
 
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
-        self.assertEqual(mock_open_for_write.call_count, 2)
+        mock_write_file.assert_called_with(mock.ANY, mock.ANY, mode=0o600)
+        self.assertEqual(mock_write_file.call_count, 2)
 
     @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
-    @mock.patch('os.fdopen', autospec=True)
-    @mock.patch('os.open', autospec=True)
+    @mock.patch('azure.cli.core._profile.write_file_atomic', autospec=True)
+    @mock.patch('azure.cli.core._profile.file_lock')
     @mock.patch('adal.AuthenticationContext', autospec=True)
-    def test_credscache_new_token_added_by_adal(self, mock_adal_auth_context, _, mock_open_for_write, mock_read_file):  # pylint: disable=line-too-long
+    def test_credscache_new_token_added_by_adal(self, mock_adal_auth_context, _, mock_write_file, mock_read_file):  # pylint: disable=line-too-long
         token_entry2 = {
             "accessToken": "new token",
             "tokenType": "Bearer",
@@ -524,7 +572,6 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
             return mock_adal_auth_context
 
         mock_adal_auth_context.acquire_token.side_effect = acquire_token_side_effect
-        mock_open_for_write.return_value = FileHandleStub()
         mock_read_file.return_value = [self.token_entry1]
         creds_cache = CredsCache(auth_ctx_factory=get_auth_context)
 
@@ -538,21 +585,249 @@ class Test_Profile(unittest.TestCase):  # pylint: disable=too-many-public-method
             mock.ANY)
 
         # assert
-        mock_open_for_write.assert_called_with(mock.ANY, 'w+')
+        mock_write_file.assert_called_with(mock.ANY, mock.ANY, mode=0o600)
         self.assertEqual(token, 'new token')
         self.assertEqual(token_type, token_entry2['tokenType'])
 
 
-class FileHandleStub(object):  # pylint: disable=too-few-public-methods
+    def test_credscache_merges_changes_of_other_processes(self):
+        import shutil
+        import tempfile
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        test_sp = {
+            "servicePrincipalId": "myapp",
+            "servicePrincipalTenant": "mytenant",
+            "accessToken": "Secret"
+        }
+        with open(os.path.join(config_dir, 'accessTokens.json'), 'w') as f:
+            json.dump([self.token_entry1, test_sp], f)
+        with mock.patch('azure.cli.core._profile.get_config_dir', return_value=config_dir):
+            creds_cache1 = CredsCache()
+            creds_cache2 = CredsCache()
+
+        def _read_token_file():
+            with open(os.path.join(config_dir, 'accessTokens.json')) as f:
+                return json.load(f)
+
+        # action #1, two processes login and logout at the same time
+        creds_cache1.save_service_principal_cred('myapp2', 'Secret2', 'mytenant2')
+        creds_cache2.remove_cached_creds(self.user1)
+
+        # assert #1
+        self.assertEqual([x['servicePrincipalId'] for x in _read_token_file()],
+                         ['myapp', 'myapp2'])
+        self.assertFalse(creds_cache2.adal_token_cache.read_items())
+        self.assertEqual(len(creds_cache2._service_principal_creds), 2)
+
+        # action #2, entries the process didn't change are kept as the other process wrote them
+        creds_cache1.remove_cached_creds('myapp')
+
+        # assert #2
+        self.assertEqual([x['servicePrincipalId'] for x in _read_token_file()], ['myapp2'])
+        self.assertFalse(creds_cache1.adal_token_cache.read_items())
+
+    @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
+    @mock.patch('adal.AuthenticationContext', autospec=True)
+    def test_credscache_reuses_access_token_until_expiry(self, mock_adal_auth_context,
+                                                         mock_read_file):
+        import datetime
+        token_entry = {
+            "accessToken": "new token",
+            "tokenType": "Bearer",
+            "userId": self.user1,
+            "expiresOn": str(datetime.datetime.now() + datetime.timedelta(hours=1))
+        }
+        mock_adal_auth_context.acquire_token.return_value = token_entry
+        mock_read_file.return_value = []
+        creds_cache = CredsCache(auth_ctx_factory=lambda _, **__: mock_adal_auth_context)
+        mgmt_resource = 'https://management.core.windows.net/'
+
+        # action
+        for _ in range(3):
+            _, token = creds_cache.retrieve_token_for_user(self.user1, self.tenant_id,
+                                                           mgmt_resource)
+
+        # assert
+        self.assertEqual(token, 'new token')
+        self.assertEqual(mock_adal_auth_context.acquire_token.call_count, 1)
+
+        # tokens about to expire are acquired again
+        token_entry['expiresOn'] = str(datetime.datetime.now() + datetime.timedelta(minutes=1))
+        graph_resource = 'https://graph.windows.net/'
+        creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, graph_resource)
+        creds_cache.retrieve_token_for_user(self.user1, self.tenant_id, graph_resource)
+        self.assertEqual(mock_adal_auth_context.acquire_token.call_count, 3)
+
+    @mock.patch('azure.cli.core._profile._get_file_stamp', autospec=True)
+    @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
+    def test_shared_credscache_reloads_changed_token_file(self, mock_read_file, mock_file_stamp):
+        mock_read_file.return_value = [self.token_entry1]
+        mock_file_stamp.return_value = (1.0, 100)
+        creds_cache = get_shared_creds_cache()
+        adal_token_cache = creds_cache.adal_token_cache
+
+        # action #1, the token file didn't change
+        Profile()
+
+        # assert #1
+        self.assertIs(Profile()._creds_cache, creds_cache)
+        self.assertEqual(mock_read_file.call_count, 1)
+
+        # action #2, another process logged out
+        mock_read_file.return_value = []
+        mock_file_stamp.return_value = (2.0, 2)
+        profile = Profile()
+
+        # assert #2
+        self.assertIs(profile._creds_cache, creds_cache)
+        self.assertEqual(mock_read_file.call_count, 2)
+        self.assertFalse(creds_cache.adal_token_cache.read_items())
+        # the subscription finder of a login shares the cache, so it is refreshed in place
+        self.assertIs(creds_cache.adal_token_cache, adal_token_cache)
+        self.assertIs(profile._subscription_finder._adal_token_cache, adal_token_cache)
+
+
+    @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
+    @mock.patch('azure.cli.core._profile.write_file_atomic', autospec=True)
+    @mock.patch('azure.cli.core._profile.file_lock')
+    @mock.patch('adal.AuthenticationContext', autospec=True)
+    def test_credscache_persists_service_principal_tokens(self, mock_adal_auth_context, _,
+                                                          mock_write_file, mock_read_file):
+        import datetime
+        test_sp = {
+            "servicePrincipalId": "myapp",
+            "servicePrincipalTenant": "mytenant",
+            "accessToken": "Secret"
+        }
+        mock_adal_auth_context.acquire_token_with_client_credentials.return_value = {
+            "accessToken": "sp token",
+            "tokenType": "Bearer",
+            "expiresOn": str(datetime.datetime.now() + datetime.timedelta(hours=1))
+        }
+        mock_read_file.return_value = [test_sp]
+        mgmt_resource = 'https://management.core.windows.net/'
+        creds_cache = CredsCache(auth_ctx_factory=lambda _, _2: mock_adal_auth_context)
+
+        # action #1, the token is acquired and persisted
+        creds_cache.retrieve_token_for_service_principal('myapp', mgmt_resource)
+
+        # assert #1
+        persisted = json.loads(mock_write_file.call_args[0][1])
+        self.assertEqual(len(persisted), 2)
+        self.assertEqual(persisted[0], test_sp)
+        self.assertEqual(persisted[1]['tokenServicePrincipalId'], 'myapp')
+        self.assertEqual(persisted[1]['resource'], mgmt_resource)
+
+        # action #2, the next command reuses the persisted token
+        mock_read_file.return_value = persisted
+        creds_cache = CredsCache(auth_ctx_factory=lambda _, _2: mock_adal_auth_context)
+        token_type, token = creds_cache.retrieve_token_for_service_principal('myapp',
+                                                                             mgmt_resource)
+
+        # assert #2
+        self.assertEqual((token_type, token), ('Bearer', 'sp token'))
+        self.assertEqual(creds_cache._service_principal_creds, [test_sp])
+        self.assertFalse(creds_cache.adal_token_cache.read_items())
+        self.assertEqual(
+            mock_adal_auth_context.acquire_token_with_client_credentials.call_count, 1)
+
+        # action #3, logging out removes the token
+        creds_cache.remove_cached_creds('myapp')
+        self.assertEqual(json.loads(mock_write_file.call_args[0][1]), [])
+
+    @mock.patch('adal.AuthenticationContext', autospec=True)
+    def test_credscache_shares_service_principal_tokens_between_processes(
+            self, mock_adal_auth_context):
+        import datetime
+        import shutil
+        import tempfile
+        config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, config_dir)
+        test_sp = {
+            "servicePrincipalId": "myapp",
+            "servicePrincipalTenant": "mytenant",
+            "accessToken": "Secret"
+        }
+        with open(os.path.join(config_dir, 'accessTokens.json'), 'w') as f:
+            json.dump([self.token_entry1, test_sp], f)
+        mock_adal_auth_context.acquire_token_with_client_credentials.return_value = {
+            "accessToken": "sp token",
+            "tokenType": "Bearer",
+            "expiresOn": str(datetime.datetime.now() + datetime.timedelta(hours=1))
+        }
+        with mock.patch('azure.cli.core._profile.get_config_dir', return_value=config_dir):
+            creds_cache1 = CredsCache(auth_ctx_factory=lambda _, _2: mock_adal_auth_context)
+            creds_cache2 = CredsCache(auth_ctx_factory=lambda _, _2: mock_adal_auth_context)
+        mgmt_resource = 'https://management.core.windows.net/'
+
+        # action #1, a process acquires a token while another one logs out a user
+        creds_cache2.remove_cached_creds(self.user1)
+        creds_cache1.retrieve_token_for_service_principal('myapp', mgmt_resource)
+
+        # assert #1
+        with open(os.path.join(config_dir, 'accessTokens.json')) as f:
+            persisted = json.load(f)
+        self.assertEqual([x.get('tokenServicePrincipalId') for x in persisted], [None, 'myapp'])
+        self.assertEqual(persisted[0], test_sp)
+
+        # action #2, the other process uses the token rather than acquiring one
+        token = creds_cache2.retrieve_token_for_service_principal('myapp', mgmt_resource)
 
-    def write(self, content):
-        pass
+        # assert #2
+        self.assertEqual(token, ('Bearer', 'sp token'))
+        self.assertEqual(
+            mock_adal_auth_context.acquire_token_with_client_credentials.call_count, 1)
 
-    def __enter__(self):
-        return self
 
-    def __exit__(self, _2, _3, _4):
-        pass
+    @mock.patch('azure.cli.core._profile._load_tokens_from_file', autospec=True)
+    @mock.patch('azure.cli.core._profile.write_file_atomic', autospec=True)
+    @mock.patch('azure.cli.core._profile.file_lock')
+    @mock.patch('adal.AuthenticationContext', autospec=True)
+    def test_credscache_serves_cached_tokens_while_acquiring(self, mock_adal_auth_context, _,
+                                                             _2, mock_read_file):
+        import datetime
+        import threading
+        test_sp = {
+            "servicePrincipalId": "myapp",
+            "servicePrincipalTenant": "mytenant",
+            "accessToken": "Secret"
+        }
+        expires_on = str(datetime.datetime.now() + datetime.timedelta(hours=1))
+        mock_read_file.return_value = [test_sp, {
+            "tokenServicePrincipalId": "myapp",
+            "servicePrincipalTenant": "mytenant",
+            "resource": "https://graph.windows.net/",
+            "tokenType": "Bearer",
+            "accessToken": "graph token",
+            "expiresOn": expires_on
+        }]
+        acquiring, cache_hit = threading.Event(), threading.Event()
+
+        def _acquire_token(*_):
+            acquiring.set()
+            cache_hit.wait(10)
+            return {"accessToken": "sp token", "tokenType": "Bearer", "expiresOn": expires_on}
+
+        mock_adal_auth_context.acquire_token_with_client_credentials.side_effect = _acquire_token
+        creds_cache = CredsCache(auth_ctx_factory=lambda _, _2: mock_adal_auth_context)
+        mgmt_resource = 'https://management.core.windows.net/'
+        thread = threading.Thread(target=creds_cache.retrieve_token_for_service_principal,
+                                  args=('myapp', mgmt_resource))
+        thread.start()
+
+        # action, a cached token is used while another one is acquired
+        acquiring.wait(10)
+        token = creds_cache.retrieve_token_for_service_principal('myapp',
+                                                                 'https://graph.windows.net/')
+        self.assertTrue(thread.is_alive())
+        cache_hit.set()
+        thread.join()
+
+        # assert
+        self.assertEqual(token, ('Bearer', 'graph token'))
+        self.assertEqual(creds_cache.retrieve_token_for_service_principal('myapp', mgmt_resource),
+                         ('Bearer', 'sp token'))
 
 
 class SubscriptionStub(Subscription):  # pylint: disable=too-few-public-methods
@@ -0,0 +1,119 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import mock
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer  # pylint: disable=import-error
+
+from azure.cli.core.application import Application, Configuration
+import azure.cli.core.profiler as profiler
+
+
+def _sample_handler(**kwargs):
+    kwargs['event_data']['calls'] += 1
+
+
+class _ListHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        body = b'{"value": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.patchers = [mock.patch.object(profiler, '_events', []),
+                         mock.patch.object(profiler, '_enabled', False),
+                         mock.patch.object(profiler, '_install_import_hook')]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.tempdir)
+
+    def test_profiler_flag_and_environment(self):
+        argv = ['vm', 'list', '--profile-startup']
+        with mock.patch.dict(os.environ, {profiler.PROFILE_ENV_NAME: '0'}):
+            self.assertTrue(profiler.handle_profile_flag(argv))
+        self.assertEqual(argv, ['vm', 'list'])
+        self.assertIsNone(profiler._trace_file)  # pylint: disable=protected-access
+
+        trace_file = os.path.join(self.tempdir, 'trace.json')
+        with mock.patch.dict(os.environ, {profiler.PROFILE_ENV_NAME: trace_file}):
+            self.assertTrue(profiler.handle_profile_flag(argv))
+        self.assertEqual(profiler._trace_file, trace_file)  # pylint: disable=protected-access
+
+    def test_profiler_disabled(self):
+        with mock.patch.dict(os.environ, {profiler.PROFILE_ENV_NAME: ''}):
+            self.assertFalse(profiler.handle_profile_flag(['vm', 'list']))
+        with profiler.span('todict', 'result'):
+            pass
+        self.assertIs(profiler.timed(_sample_handler, 'event'), _sample_handler)
+        self.assertEqual(profiler._events, [])  # pylint: disable=protected-access
+
+    def test_profiler_times_event_handlers(self):
+        profiler.enable()
+        app = Application(Configuration([]))
+        app.register('Test.Event', _sample_handler)
+        event_data = {'calls': 0}
+        app.raise_event('Test.Event', event_data=event_data)
+        self.assertEqual(event_data['calls'], 1)
+
+        trace_file = profiler.write_trace(os.path.join(self.tempdir, 'trace', 'az.json'))
+        with open(trace_file) as f:
+            events = [e for e in json.load(f)['traceEvents'] if e['ph'] == 'X']
+        handler_event = [e for e in events if e['name'].endswith('_sample_handler')][0]
+        self.assertEqual(handler_event['cat'], 'event')
+        self.assertEqual(handler_event['args'], {'event': 'Test.Event'})
+        event = [e for e in events if e['name'] == 'Test.Event'][0]
+        self.assertLessEqual(event['ts'], handler_event['ts'])
+        self.assertGreaterEqual(event['ts'] + event['dur'],
+                                handler_event['ts'] + handler_event['dur'])
+
+    def test_profiler_records_mgmt_client_requests(self):
+        from azure.mgmt.resource import ResourceManagementClient
+        from msrest.authentication import BasicTokenAuthentication
+        from azure.cli.core.commands.client_factory import configure_common_settings
+
+        profiler.enable()
+        server = HTTPServer(('127.0.0.1', 0), _ListHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            base_url = 'http://127.0.0.1:{}'.format(server.server_port)
+            client = ResourceManagementClient(
+                BasicTokenAuthentication({'access_token': 'token'}), 'sub', base_url=base_url)
+            configure_common_settings(client)
+            self.assertEqual(list(client.resource_groups.list()), [])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        events = [e for e in profiler._events if e['cat'] == 'http']  # pylint: disable=protected-access
+        self.assertEqual([(e['name'], e['args']) for e in events],
+                         [('GET {}/subscriptions/sub/resourcegroups'.format(base_url),
+                           {'status': 200})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from azure.cli.core._session import Session
+import azure.cli.core.commands._provider_cache as provider_cache
+
+
+def _get_provider(namespace, resource_types):
+    provider = mock.MagicMock()
+    provider.namespace = namespace
+    provider.resource_types = []
+    for name, api_versions in resource_types:
+        resource_type = mock.MagicMock()
+        resource_type.resource_type = name
+        resource_type.api_versions = api_versions
+        provider.resource_types.append(resource_type)
+    return provider
+
+
+def _get_client(subscription_id, *providers):
+    client = mock.MagicMock()
+    client.config.subscription_id = subscription_id
+    client.providers.get.side_effect = \
+        lambda namespace: next(p for p in providers if p.namespace.lower() == namespace.lower())
+    client.providers.list.return_value = iter(providers)
+    return client
+
+
+class TestProviderCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.providers = Session()
+        self.providers.load(os.path.join(self.tempdir, 'providerCache.json'))
+        self.ttl = 100
+        self.now = 1000.0
+        self.patchers = [
+            mock.patch.object(provider_cache, 'PROVIDERS', self.providers),
+            mock.patch.object(provider_cache, 'get_provider_cache_ttl', lambda: self.ttl),
+            mock.patch.object(provider_cache.time, 'time', lambda: self.now)
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.network = _get_provider('Microsoft.Network', [('virtualNetworks', ['2016-09-01'])])
+        self.compute = _get_provider('Microsoft.Compute', [('virtualMachines', ['2016-04-30'])])
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        shutil.rmtree(self.tempdir)
+
+    def test_provider_cache_reuses_entries_until_expired(self):
+        client = _get_client('sub1', self.network)
+        expected = [{'resourceType': 'virtualNetworks', 'apiVersions': ['2016-09-01']}]
+
+        self.assertEqual(provider_cache.get_provider_resource_types(client, 'Microsoft.Network'),
+                         expected)
+        self.assertEqual(provider_cache.get_provider_resource_types(client, 'microsoft.network'),
+                         expected)
+        self.assertEqual(client.providers.get.call_count, 1)
+
+        # entries are persisted
+        reloaded = Session()
+        reloaded.load(self.providers.filename)
+        with mock.patch.object(provider_cache, 'PROVIDERS', reloaded):
+            provider_cache.get_provider_resource_types(client, 'Microsoft.Network')
+        self.assertEqual(client.providers.get.call_count, 1)
+
+        # other subscriptions have their own entries
+        other = _get_client('sub2', self.network)
+        provider_cache.get_provider_resource_types(other, 'Microsoft.Network')
+        self.assertEqual(other.providers.get.call_count, 1)
+
+        self.now += self.ttl
+        provider_cache.get_provider_resource_types(client, 'Microsoft.Network')
+        self.assertEqual(client.providers.get.call_count, 2)
+
+        self.ttl = 0
+        provider_cache.get_provider_resource_types(client, 'Microsoft.Network')
+        provider_cache.get_provider_resource_types(client, 'Microsoft.Network')
+        self.assertEqual(client.providers.get.call_count, 4)
+
+    def test_provider_cache_refresh(self):
+        client = _get_client('sub1', self.network, self.compute)
+        provider_cache.get_provider_resource_types(client, 'Microsoft.Network')
+
+        self.assertEqual(provider_cache.refresh_provider_cache(client),
+                         ['Microsoft.Network', 'Microsoft.Compute'])
+        provider_cache.get_provider_resource_types(client, 'Microsoft.Network')
+        provider_cache.get_provider_resource_types(client, 'Microsoft.Compute')
+        self.assertEqual(client.providers.get.call_count, 1)
+
+        self.compute.resource_types[0].api_versions = ['2017-03-30']
+        self.assertEqual(provider_cache.refresh_provider_cache(client, 'Microsoft.Compute'),
+                         ['Microsoft.Compute'])
+        self.assertEqual(provider_cache.get_provider_resource_types(client, 'Microsoft.Compute'),
+                         [{'resourceType': 'virtualMachines', 'apiVersions': ['2017-03-30']}])
+        self.assertEqual(client.providers.get.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import unittest
+
+import mock
+
+import azure.cli.core._request_scheduler as scheduler
+
+
+class _Clock(object):  # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _get_response(status_code, headers=None):
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestRequestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.patchers = [mock.patch.object(scheduler.time, 'time', self.clock.time),
+                         mock.patch.object(scheduler.time, 'sleep', self.clock.sleep)]
+        for patcher in self.patchers:
+            patcher.start()
+        scheduler.reset_host_limiters()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        scheduler.reset_host_limiters()
+
+    def test_host_limiter_token_bucket(self):
+        limiter = scheduler.HostLimiter('management.azure.com', rate=2)
+        for _ in range(6):
+            limiter.acquire()
+        # a burst of two requests, then one request every half second
+        self.assertAlmostEqual(sum(self.clock.sleeps), 2.0)
+
+        limiter.pause(10)
+        limiter.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 12.0)
+
+        self.clock.sleeps = []
+        unlimited = scheduler.HostLimiter('management.azure.com')
+        unlimited.update({'x-ms-ratelimit-remaining-subscription-reads': '5'})
+        for _ in range(3):
+            unlimited.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 2.0)
+        unlimited.update({'x-ms-ratelimit-remaining-subscription-reads': '11999'})
+        for _ in range(3):
+            unlimited.acquire()
+        self.assertAlmostEqual(sum(self.clock.sleeps), 2.0)
+
+    def test_retry_after_header(self):
+        self.assertEqual(scheduler.get_retry_after({'Retry-After': '7'}), 7)
+        self.assertIsNone(scheduler.get_retry_after({}))
+        self.assertAlmostEqual(
+            scheduler.get_retry_after({'retry-after': 'Thu, 01 Jan 1970 00:16:50 GMT'}), 10)
+        for attempt in range(1, 10):
+            backoff = min(90, 0.8 * 2 ** (attempt - 1))
+            self.assertTrue(backoff / 2 <= scheduler.get_backoff(attempt) <= backoff)
+
+    def test_schedule_client_retries_throttled_requests(self):
+        client = mock.MagicMock()
+        client.config.retry_policy.policy.status_forcelist = [408, 500, 503]
+        client._client = mock.MagicMock(spec=['send'])  # pylint: disable=protected-access
+        responses = [_get_response(429, {'Retry-After': '3'}), _get_response(200)]
+        client._client.send.side_effect = lambda *_, **__: responses.pop(0)  # pylint: disable=protected-access
+        scheduler.schedule_client(client)
+        scheduler.schedule_client(client)
+        self.assertEqual(client.config.retry_policy.policy.status_forcelist, [408, 500])
+
+        request = mock.MagicMock(url='https://management.azure.com/subscriptions', method='POST',
+                                 data=None)
+        response = client._client.send(request)  # pylint: disable=protected-access
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.clock.sleeps, [3])
+
+        # the other requests to the host wait as well
+        scheduler.get_host_limiter('https://management.azure.com/other').pause(5)
+        responses.append(_get_response(503))
+        response = client._client.send(request)  # pylint: disable=protected-access
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.clock.sleeps, [3, 5])
+
+        request.method = 'GET'
+        responses.extend([_get_response(503)] * (scheduler.DEFAULT_THROTTLING_RETRIES + 1))
+        response = client._client.send(request)  # pylint: disable=protected-access
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.clock.sleeps), 2 + scheduler.DEFAULT_THROTTLING_RETRIES)
+        self.assertEqual(responses, [])
+
+    def test_schedule_client_retries_only_rewindable_bodies(self):
+        import io
+        from msrest.pipeline import ClientRequest
+        client = mock.MagicMock()
+        client.config.retry_policy.policy.status_forcelist = []
+        client._client = mock.MagicMock(spec=['send'])  # pylint: disable=protected-access
+        bodies = []
+
+        def _send(request, headers=None, content=None, **_):
+            request.add_content(content)
+            bodies.append(request.data.read())
+            return _get_response(429 if len(bodies) == 1 else 200, {'Retry-After': '1'})
+
+        client._client.send.side_effect = _send  # pylint: disable=protected-access
+        scheduler.schedule_client(client)
+        url = 'https://management.azure.com/upload'
+
+        # a file is read again from the start
+        stream = io.BytesIO(b'header:data')
+        stream.read(7)
+        response = client._client.send(ClientRequest('PUT', url), {}, stream)  # pylint: disable=protected-access
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(bodies, [b'data', b'data'])
+
+        # a generator is not sent again
+        bodies = []
+        response = client._client.send(ClientRequest('PUT', url),  # pylint: disable=protected-access
+                                       content=_ChunkReader([b'da', b'ta']))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(bodies, [b'data'])
+
+
+class _ChunkReader(object):  # pylint: disable=too-few-public-methods
+    """ A stream which can't be rewound """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def read(self):
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import threading
+import unittest
+
+import mock
+from six import StringIO
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer  # pylint: disable=import-error
+
+import azure.cli.core.request_timing as request_timing
+
+
+class _ListHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        body = b'{"value": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):  # pylint: disable=arguments-differ
+        pass
+
+
+class TestRequestTiming(unittest.TestCase):
+
+    def tearDown(self):
+        request_timing.handle_timing_flag([])
+
+    def test_path_template(self):
+        template = request_timing.get_path_template
+        self.assertEqual(
+            template('https://management.azure.com/subscriptions/0b1f6471/resourceGroups/myRG/'
+                     'providers/Microsoft.Network/virtualNetworks/vnet1/subnets/subnet1'
+                     '?api-version=2016-09-01'),
+            '/subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}/providers/'
+            'Microsoft.Network/virtualNetworks/{name}/subnets/{name}')
+        self.assertEqual(
+            template('https://management.azure.com/subscriptions/0b1f6471/providers/'
+                     'Microsoft.Compute/virtualMachines'),
+            '/subscriptions/{subscriptionId}/providers/Microsoft.Compute/virtualMachines')
+        self.assertEqual(
+            template('https://myaccount.blob.core.windows.net/mycontainer/myblob?comp=block&'
+                     'blockid=AAAA'),
+            '/{name}/{name}?comp=block')
+        self.assertEqual(
+            template('https://graph.windows.net/00000000-0000-0000-0000-000000000000/users'),
+            '/{id}/users')
+
+    def test_timing_summary(self):
+        argv = ['vm', 'list', '--timing']
+        self.assertTrue(request_timing.handle_timing_flag(argv))
+        self.assertEqual(argv, ['vm', 'list'])
+
+        url = 'https://management.azure.com/subscriptions/{}/resourceGroups/rg{}/providers/' \
+              'Microsoft.Compute/virtualMachines?api-version=2016-04-30-preview'
+        for i in range(20):
+            request_timing.record('GET', url.format('sub', i), 200, 0, 100, (i + 1) / 10.0)
+        request_timing.record('GET', 'https://management.azure.com/subscriptions', 200, 0, 10,
+                              0.5)
+        with self.assertRaises(ValueError):
+            with request_timing.measure(request_timing.AUTH_HOST, 'get token'):
+                raise ValueError()
+
+        summary = request_timing.get_summary()
+        self.assertEqual(len(summary), 3)
+        self.assertEqual(summary[0]['host'], 'management.azure.com')
+        self.assertEqual(summary[0]['operation'],
+                         'GET /subscriptions/{subscriptionId}/resourceGroups/{resourceGroupName}/'
+                         'providers/Microsoft.Compute/virtualMachines')
+        self.assertEqual(summary[0]['count'], 20)
+        self.assertAlmostEqual(summary[0]['p50'], 1.1)
+        self.assertAlmostEqual(summary[0]['p95'], 1.9)
+        self.assertAlmostEqual(summary[0]['total'], 21.0)
+        self.assertEqual(summary[0]['bytes'], 2000)
+        self.assertEqual([(s['host'], s['status']) for s in summary[1:]],
+                         [('management.azure.com', '200'), ('auth', 'error')])
+
+        output = StringIO()
+        request_timing.report(output)
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('count'))
+        self.assertIn('21.500s management.azure.com', lines)
+        self.assertTrue(lines[-1].endswith('wall time of the command'))
+
+        # nothing is recorded or reported without the flag
+        request_timing.handle_timing_flag(['vm', 'list'])
+        request_timing.record('GET', url.format('sub', 0), 200, 0, 100, 1)
+        self.assertEqual(request_timing.get_summary(), [])
+        output = StringIO()
+        request_timing.report(output)
+        self.assertEqual(output.getvalue(), '')
+
+    def test_data_client_instrumented(self):
+        request_timing.handle_timing_flag(['--timing'])
+        client = mock.MagicMock()
+        client.request_callback = None
+        response_callback = client.response_callback
+        request_timing.instrument_data_client(client)
+
+        request = mock.MagicMock(host='myaccount.blob.core.windows.net', path='/c/b',
+                                 method='PUT', query={'comp': 'block'}, body=b'abc')
+        client.request_callback(request)
+        response = mock.MagicMock(status=201, body=b'')
+        client.response_callback(response)
+        response_callback.assert_called_once_with(response)
+
+        summary = request_timing.get_summary()
+        self.assertEqual([(s['host'], s['operation'], s['status'], s['bytes']) for s in summary],
+                         [('myaccount.blob.core.windows.net', 'PUT /{name}/{name}?comp=block',
+                           '201', 3)])
+
+    def test_mgmt_client_instrumented(self):
+        from azure.mgmt.resource import ResourceManagementClient
+        from msrest.authentication import BasicTokenAuthentication
+        from azure.cli.core.commands.client_factory import configure_common_settings
+
+        server = HTTPServer(('127.0.0.1', 0), _ListHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            client = ResourceManagementClient(
+                BasicTokenAuthentication({'access_token': 'token'}), 'sub',
+                base_url='http://127.0.0.1:{}'.format(server.server_port))
+            configure_common_settings(client)
+            request_timing.handle_timing_flag(['--timing'])
+            self.assertEqual(list(client.resource_groups.list()), [])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        summary = request_timing.get_summary()
+        self.assertEqual([(s['host'], s['operation'], s['status'], s['count']) for s in summary],
+                         [('127.0.0.1:{}'.format(server.server_port),
+                           'GET /subscriptions/{subscriptionId}/resourcegroups', '200', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
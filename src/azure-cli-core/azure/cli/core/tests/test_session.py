@@ -0,0 +1,83 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import mock
+
+import azure.cli.core._session as _session
+from azure.cli.core._session import Session, write_file_atomic
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'azureProfile.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def _read(self):
+        with open(self.filename, 'rb') as f:
+            return json.loads(f.read().decode('utf-8-sig'))
+
+    def test_session_keeps_updates_of_other_processes(self):
+        first = Session()
+        first.load(self.filename)
+        second = Session()
+        second.load(self.filename)
+
+        first['subscriptions'] = ['a']
+        second['installationId'] = 'b'
+        del first['subscriptions']
+        second['subscriptions'] = ['c']
+
+        self.assertEqual(self._read(), {'installationId': 'b', 'subscriptions': ['c']})
+
+        # save writes all data of the session
+        first.data['other'] = 'value'
+        first.save()
+        self.assertEqual(self._read(), {'other': 'value'})
+
+    def test_session_transaction_writes_once(self):
+        session = Session()
+        session.load(self.filename)
+        session['unchanged'] = 1
+        with mock.patch.object(_session, 'write_file_atomic', wraps=write_file_atomic) as write:
+            with session.transaction():
+                session['a'] = 1
+                with session.transaction():
+                    session['b'] = 2
+                    del session['unchanged']
+                self.assertEqual(write.call_count, 0)
+            self.assertEqual(write.call_count, 1)
+
+            with session.transaction():
+                pass
+            self.assertEqual(write.call_count, 1)
+
+        self.assertEqual(self._read(), {'a': 1, 'b': 2})
+
+    def test_write_file_atomic(self):
+        write_file_atomic(self.filename, '{}')
+        self.assertEqual(stat.S_IMODE(os.stat(self.filename).st_mode) & 0o077, 0)
+        os.chmod(self.filename, 0o644)
+
+        write_file_atomic(self.filename, '{"a": 1}')
+
+        self.assertEqual(self._read(), {'a': 1})
+        self.assertEqual(os.listdir(self.tempdir), ['azureProfile.json'])
+        if os.name != 'nt':
+            self.assertEqual(stat.S_IMODE(os.stat(self.filename).st_mode), 0o644)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,10 +5,44 @@
 
 # pylint: disable=line-too-long
 from collections import namedtuple
+from datetime import datetime
+from enum import Enum
 import unittest
 import tempfile
 
+from msrest.serialization import Model
+
 from azure.cli.core._util import get_file_json, todict, to_snake_case, truncate_text
+from azure.cli.core.extensions.transform import add_resource_group
+
+
+class _Color(Enum):
+    red = 'Red'
+
+
+class _SubResource(Model):
+    _attribute_map = {'id': {'key': 'id', 'type': 'str'}}
+
+    def __init__(self, id=None):  # pylint: disable=redefined-builtin
+        self.id = id
+
+
+class _Resource(Model):
+    _attribute_map = {
+        'id': {'key': 'id', 'type': 'str'},
+        'provisioning_state': {'key': 'properties.provisioningState', 'type': 'str'},
+        'color': {'key': 'properties.color', 'type': 'str'},
+        'created_time': {'key': 'properties.createdTime', 'type': 'iso-8601'},
+        'subnets': {'key': 'properties.subnets', 'type': '[SubResource]'}
+    }
+
+    def __init__(self, id=None, subnets=None):  # pylint: disable=redefined-builtin
+        self.id = id
+        self.provisioning_state = 'Succeeded'
+        self.color = _Color.red
+        self.created_time = datetime(2017, 3, 1)
+        self.subnets = subnets
+        self._private = 1
 
 
 class TestUtils(unittest.TestCase):
@@ -107,6 +141,28 @@ class TestUtils(unittest.TestCase):
         with self.assertRaises(ValueError):
             truncate_text('string to shorten', width=-1)
 
+    def test_application_todict_model(self):
+        rg_id = '/subscriptions/sub/resourceGroups/myRG/providers/Microsoft.Network/virtualNetworks/vnet1'
+        resource = _Resource(rg_id, [_SubResource(rg_id + '/subnets/subnet1'), _SubResource('/subscriptions/sub')])
+        # attributes the model doesn't declare are converted as well
+        resource.extra_value = {'nested_key': 'x'}
+        resource.callback = lambda: None
+        expected = {
+            'id': rg_id,
+            'provisioningState': 'Succeeded',
+            'color': 'Red',
+            'createdTime': '2017-03-01T00:00:00',
+            'subnets': [{'id': rg_id + '/subnets/subnet1'}, {'id': '/subscriptions/sub'}],
+            'extraValue': {'nested_key': 'x'}
+        }
+        self.assertEqual(todict(resource), expected)
+        self.assertEqual(todict([resource, resource]), [expected, expected])
+
+        expected['resourceGroup'] = 'myRG'
+        expected['subnets'][0]['resourceGroup'] = 'myRG'
+        self.assertEqual(todict(resource, add_resource_group), expected)
+
+
 
 if __name__ == '__main__':
     unittest.main()
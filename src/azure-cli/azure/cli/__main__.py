@@ -6,8 +6,18 @@
 import sys
 import os
 
-import azure.cli.main
-import azure.cli.core.telemetry as telemetry
+import azure.cli.core.profiler as profiler
+from azure.cli.core._daemon import run_in_daemon
+
+# Profiled commands run in this process so that the imports are part of the profile. Otherwise
+# hand the command to a warm daemon (see 'az daemon start') before importing the rest of the CLI.
+if not profiler.handle_profile_flag(sys.argv):
+    daemon_exit_code = run_in_daemon(sys.argv[1:])
+    if daemon_exit_code is not None:
+        sys.exit(daemon_exit_code)
+
+import azure.cli.main  # pylint: disable=wrong-import-position
+import azure.cli.core.telemetry as telemetry  # pylint: disable=wrong-import-position
 
 try:
     telemetry.start()
@@ -32,3 +42,4 @@ except KeyboardInterrupt:
     sys.exit(1)
 finally:
     telemetry.conclude()
+    profiler.conclude()
@@ -8,7 +8,11 @@ import sys
 
 from azure.cli.core.application import APPLICATION, Configuration
 import azure.cli.core.azlogging as azlogging
-from azure.cli.core._session import ACCOUNT, CONFIG, SESSION
+import azure.cli.core.profiler as profiler
+import azure.cli.core.request_timing as request_timing
+from azure.cli.core._session import ACCOUNT, CONFIG, SESSION, INDEX, METADATA, PROVIDERS
+from azure.cli.core.commands._command_index import handle_rebuild_command_index_flag
+from azure.cli.core.help_files import enable_help_index
 from azure.cli.core._util import (show_version_info_exit, handle_exception)
 from azure.cli.core._environment import get_config_dir
 import azure.cli.core.telemetry as telemetry
@@ -18,6 +22,7 @@ logger = azlogging.get_az_logger(__name__)
 
 def main(args, file=sys.stdout):  # pylint: disable=redefined-builtin
     azlogging.configure_logging(args)
+    request_timing.handle_timing_flag(args)
     logger.debug('Command arguments %s', args)
 
     if len(args) > 0 and args[0] == '--version':
@@ -29,19 +34,30 @@ def main(args, file=sys.stdout):  # pylint: disable=redefined-builtin
     ACCOUNT.load(os.path.join(azure_folder, 'azureProfile.json'))
     CONFIG.load(os.path.join(azure_folder, 'az.json'))
     SESSION.load(os.path.join(azure_folder, 'az.sess'), max_age=3600)
+    INDEX.load(os.path.join(azure_folder, 'commandIndex.json'))
+    METADATA.load(os.path.join(azure_folder, 'commandMetadata.json'))
+    PROVIDERS.load(os.path.join(azure_folder, 'providerCache.json'))
+    enable_help_index(os.path.join(azure_folder, 'helpIndex.json'))
+    handle_rebuild_command_index_flag(args)
 
     config = Configuration(args)
     APPLICATION.initialize(config)
 
     try:
-        cmd_result = APPLICATION.execute(args)
+        # Write each file the command changes once, when the command is done
+        with ACCOUNT.transaction(), CONFIG.transaction(), SESSION.transaction():
+            cmd_result = APPLICATION.execute(args)
 
         # Commands can return a dictionary/list of results
         # If they do, we print the results.
         if cmd_result and cmd_result.result is not None:
             from azure.cli.core._output import OutputProducer
-            formatter = OutputProducer.get_formatter(APPLICATION.configuration.output_format)
-            OutputProducer(formatter=formatter, file=file).out(cmd_result)
+            output_format = APPLICATION.configuration.output_format
+            with profiler.span('output', 'output', format=output_format):
+                formatter = OutputProducer.get_formatter(output_format)
+                OutputProducer(formatter=formatter, file=file).out(cmd_result)
+        if cmd_result and cmd_result.exit_code:
+            return cmd_result.exit_code
 
     except Exception as ex:  # pylint: disable=broad-except
 
@@ -52,3 +68,5 @@ def main(args, file=sys.stdout):  # pylint: disable=redefined-builtin
 
         error_code = handle_exception(ex)
         return error_code
+    finally:
+        request_timing.report()
@@ -24,3 +24,38 @@ helps['component update'] = """
     type: command
     short-summary: Update Azure CLI 2.0 (Preview) and all of the installed components
 """
+
+helps['daemon'] = """
+    type: group
+    short-summary: Manage a background process that keeps the CLI loaded to speed up commands
+    long-summary: While the daemon runs, az forwards each command to it over a Unix socket in the
+        configuration directory instead of starting up from scratch. Not available on Windows.
+"""
+
+helps['daemon start'] = """
+    type: command
+    short-summary: Start the daemon in the background
+    long-summary: Restart the daemon after installing or updating components so it runs the
+        updated code.
+"""
+
+helps['daemon stop'] = """
+    type: command
+    short-summary: Stop the daemon. Subsequent commands run in their own process again.
+"""
+
+helps['daemon status'] = """
+    type: command
+    short-summary: Show whether the daemon is running
+"""
+
+helps['batch-run'] = """
+    type: command
+    short-summary: Run the az commands listed in a file in a single process
+    long-summary: Commands share the loaded command modules and the process, so each one skips the
+        CLI startup. The result of every command is written as a JSON line with its line number,
+        exit code and error. The command fails if any of the listed commands fails.
+    examples:
+        - name: Run the commands in cmds.txt, four at a time.
+          text: az batch-run --file cmds.txt --parallel 4
+"""
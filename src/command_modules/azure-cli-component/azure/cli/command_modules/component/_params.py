@@ -3,7 +3,10 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+from argcomplete.completers import FilesCompleter
+
 from azure.cli.core.commands import register_cli_argument
+from azure.cli.core.commands.parameters import file_type
 
 # pylint: disable=line-too-long
 register_cli_argument('component', 'component_name', options_list=('--name', '-n'), help='Name of component')
@@ -11,3 +14,6 @@ register_cli_argument('component', 'link', options_list=('--link', '-l'), help='
 register_cli_argument('component', 'private', help='Include packages from a private server.', action='store_true')
 register_cli_argument('component', 'pre', help='Include pre-release versions', action='store_true')
 register_cli_argument('component', 'additional_components', options_list=('--add',), nargs='+', help='The names of additional components to install (space separated)')
+register_cli_argument('daemon start', 'timeout', type=int, help='Seconds to wait for the daemon to accept requests')
+register_cli_argument('batch-run', 'file_path', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter(), help='File with one az command per line. Empty lines and # comments are skipped.')
+register_cli_argument('batch-run', 'parallel', type=int, help='Maximum number of commands to run at the same time')
@@ -11,3 +11,9 @@ cli_command(__name__, 'component list', 'azure.cli.command_modules.component.cus
 cli_command(__name__, 'component update', 'azure.cli.command_modules.component.custom#update')
 cli_command(__name__, 'component remove', 'azure.cli.command_modules.component.custom#remove')
 cli_command(__name__, 'component list-available', 'azure.cli.command_modules.component.custom#list_available_components')
+
+cli_command(__name__, 'daemon start', 'azure.cli.command_modules.component.custom#start_daemon')
+cli_command(__name__, 'daemon stop', 'azure.cli.command_modules.component.custom#stop_daemon')
+cli_command(__name__, 'daemon status', 'azure.cli.command_modules.component.custom#show_daemon_status')
+
+cli_command(__name__, 'batch-run', 'azure.cli.command_modules.component.custom#batch_run')
@@ -146,3 +146,108 @@ def update(private=False, pre=False, link=None, additional_components=None):
         for c in additional_components:
             package_list += [COMPONENT_PREFIX + c]
     _install_or_update(package_list, link, private, pre)
+
+
+def start_daemon(timeout=120):
+    """ Start a background process that keeps the CLI loaded and runs the commands of
+    subsequent az invocations """
+    from azure.cli.core._daemon import is_daemon_supported, start_daemon as _start_daemon
+    if not is_daemon_supported():
+        raise CLIError('The daemon is not supported on this platform.')
+    try:
+        _start_daemon(timeout=timeout)
+    except RuntimeError as ex:
+        raise CLIError(ex)
+    return show_daemon_status()
+
+
+def stop_daemon():
+    """ Stop the daemon """
+    from azure.cli.core._daemon import stop_daemon as _stop_daemon
+    if not _stop_daemon():
+        logger.warning('The daemon is not running.')
+
+
+def show_daemon_status():
+    """ Show whether the daemon is running """
+    from azure.cli.core._daemon import get_daemon_pid, get_daemon_socket_path
+    pid = get_daemon_pid()
+    return {'running': bool(pid), 'pid': pid, 'socket': get_daemon_socket_path() if pid else None}
+
+
+def _read_batch_commands(lines):
+    import shlex
+    commands = []
+    for line_number, line in enumerate(lines, 1):
+        try:
+            argv = shlex.split(line, comments=True)
+        except ValueError as ex:
+            raise CLIError('Unable to parse line {}: {}'.format(line_number, ex))
+        if argv and argv[0] == 'az':
+            argv = argv[1:]
+        if argv:
+            commands.append((line_number, line.strip(), argv))
+    return commands
+
+
+def _run_batch_command(command):
+    from azure.cli.core.application import APPLICATION, Application, Configuration
+    from azure.cli.core._util import handle_exception
+    from azure.cli.core._output import StreamingResult
+    line_number, text, argv = command
+    record = {'line': line_number, 'command': text, 'exitCode': 0, 'result': None, 'error': None}
+    # Every command gets its own application and session, so the output format, query and
+    # request headers of commands running at the same time don't mix.
+    app = Application(Configuration(list(argv)))
+    APPLICATION.use_thread_session(app.session)
+    try:
+        result_item = app.execute(list(argv))
+        result = result_item.result if result_item else None
+        if result_item and result_item.exit_code:
+            record['exitCode'] = result_item.exit_code
+            record['error'] = 'Some of the invocations of the command failed.'
+        # The items of streamed list results are fetched here, within the error handling
+        record['result'] = list(result) if isinstance(result, StreamingResult) else result
+    except SystemExit as ex:
+        record['exitCode'] = ex.code if isinstance(ex.code, int) else 1
+        record['error'] = 'Invalid command or arguments.' if record['exitCode'] else None
+    except Exception as ex:  # pylint: disable=broad-except
+        record['exitCode'] = handle_exception(ex)
+        record['error'] = str(ex)
+    finally:
+        APPLICATION.use_thread_session(None)
+    return record
+
+
+def batch_run(file_path, parallel=1):
+    """ Run the az commands listed in a file in this process """
+    import json
+    import sys
+    from multiprocessing.pool import ThreadPool
+    from azure.cli.core._output import ComplexEncoder
+    if parallel < 1:
+        raise CLIError('--parallel must be at least 1.')
+    try:
+        with open(file_path) as f:
+            commands = _read_batch_commands(f)
+    except (IOError, OSError) as ex:
+        raise CLIError(ex)
+
+    pool = ThreadPool(parallel) if parallel > 1 else None
+    # imap hands out the results in the order of the file while the pool works ahead
+    records = pool.imap(_run_batch_command, commands) if pool \
+        else (_run_batch_command(c) for c in commands)
+    failed_lines = []
+    try:
+        for record in records:
+            print(json.dumps(record, sort_keys=True, cls=ComplexEncoder))
+            sys.stdout.flush()
+            if record['exitCode']:
+                failed_lines.append(record['line'])
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    if failed_lines:
+        raise CLIError('{} of {} commands failed. Failed lines: {}'.format(
+            len(failed_lines), len(commands), ', '.join(str(l) for l in failed_lines)))
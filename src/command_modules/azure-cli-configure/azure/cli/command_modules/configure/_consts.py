@@ -7,7 +7,13 @@ OUTPUT_LIST = [
     {'name': 'json', 'desc': 'JSON formatted output that most closely matches API responses'},
     {'name': 'jsonc', 'desc': 'Colored JSON formatted output that most closely matches API responses'}, #pylint: disable=line-too-long
     {'name': 'table', 'desc': 'Human-readable output format'},
-    {'name': 'tsv', 'desc': 'Tab and Newline delimited, great for GREP, AWK, etc.'}
+    {'name': 'tsv', 'desc': 'Tab and Newline delimited, great for GREP, AWK, etc.'},
+    {'name': 'jsonl', 'desc': 'One JSON object per line, great for jq and log shippers'}
+]
+
+POLLING_LIST = [
+    {'name': 'adaptive', 'desc': 'Check soon after a long running operation starts, then less and less often'}, #pylint: disable=line-too-long
+    {'name': 'fixed', 'desc': 'Check at the configured interval (default 30 seconds), or as often as the service asks'} #pylint: disable=line-too-long
 ]
 
 LOGIN_METHOD_LIST = [
@@ -31,6 +37,7 @@ MSG_HEADING_ENV_VARS = '\nEnvironment variables:'
 
 MSG_PROMPT_MANAGE_GLOBAL = '\nDo you wish to change your settings?'
 MSG_PROMPT_GLOBAL_OUTPUT = '\nWhat default output format would you like?'
+MSG_PROMPT_POLLING = '\nHow often should the status of long running operations be checked?'
 MSG_PROMPT_LOGIN = '\nHow would you like to log in to access your subscriptions?'
 MSG_PROMPT_TELEMETRY = '\nMicrosoft would like to collect anonymous Azure CLI usage'\
     ' data to improve our CLI.  Participation is voluntary and when you choose to'\
@@ -16,7 +16,8 @@ from azure.cli.core.prompting import (prompt,
                                       prompt_choice_list,
                                       prompt_pass,
                                       NoTTYException)
-from azure.cli.command_modules.configure._consts import (OUTPUT_LIST, LOGIN_METHOD_LIST,
+from azure.cli.command_modules.configure._consts import (OUTPUT_LIST, POLLING_LIST,
+                                                         LOGIN_METHOD_LIST,
                                                          MSG_INTRO,
                                                          MSG_CLOSING,
                                                          MSG_GLOBAL_SETTINGS_LOCATION,
@@ -24,6 +25,7 @@ from azure.cli.command_modules.configure._consts import (OUTPUT_LIST, LOGIN_METH
                                                          MSG_HEADING_ENV_VARS,
                                                          MSG_PROMPT_MANAGE_GLOBAL,
                                                          MSG_PROMPT_GLOBAL_OUTPUT,
+                                                         MSG_PROMPT_POLLING,
                                                          MSG_PROMPT_LOGIN,
                                                          MSG_PROMPT_TELEMETRY,
                                                          MSG_PROMPT_FILE_LOGGING)
@@ -112,6 +114,10 @@ def _handle_global_configuration():
                                           'core', 'output', OUTPUT_LIST))
         answers['output_type_prompt'] = output_index
         answers['output_type_options'] = str(OUTPUT_LIST)
+        polling_index = prompt_choice_list(MSG_PROMPT_POLLING, POLLING_LIST,
+                                           default=get_default_from_config(global_config, \
+                                           'core', 'polling', POLLING_LIST))
+        answers['polling_prompt'] = polling_index
         allow_telemetry = prompt_y_n(MSG_PROMPT_TELEMETRY, default='y')
         answers['telemetry_prompt'] = allow_telemetry
         enable_file_logging = prompt_y_n(MSG_PROMPT_FILE_LOGGING, default='n')
@@ -125,6 +131,7 @@ def _handle_global_configuration():
         except configparser.DuplicateSectionError:
             pass
         global_config.set('core', 'output', OUTPUT_LIST[output_index]['name'])
+        global_config.set('core', 'polling', POLLING_LIST[polling_index]['name'])
         global_config.set('core', 'collect_telemetry', 'yes' if allow_telemetry else 'no')
         global_config.set('logging', 'enable_log_file', 'yes' if enable_file_logging else 'no')
         if not os.path.isdir(GLOBAL_CONFIG_DIR):
@@ -14,7 +14,7 @@ from azure.cli.core.commands import (command_table,
                                      LongRunningOperation,
                                      get_op_handler)
 from azure.cli.core.commands._introspection import \
-    (extract_full_summary_from_signature, extract_args_from_signature)
+    (extract_full_summary_from_operation, extract_args_from_operation)
 
 from azure.cli.core._util import CLIError
 
@@ -106,8 +106,8 @@ def _create_key_vault_command(module_name, name, operation, transform_result, ta
 
     command_module_map[name] = module_name
     name = ' '.join(name.split())
-    arguments_loader = lambda: extract_args_from_signature(get_op_handler(operation))
-    description_loader = lambda: extract_full_summary_from_signature(get_op_handler(operation))
+    arguments_loader = lambda: extract_args_from_operation(operation)
+    description_loader = lambda: extract_full_summary_from_operation(operation)
     cmd = CliCommand(name, _execute_command, table_transformer=table_transformer,
                      arguments_loader=arguments_loader, description_loader=description_loader)
     return cmd
@@ -8,7 +8,8 @@
 def _network_client_factory(**_):
     from azure.mgmt.network import NetworkManagementClient
     from azure.cli.core.commands.client_factory import get_mgmt_service_client
-    return get_mgmt_service_client(NetworkManagementClient)
+    from azure.cli.command_modules.network._edit import stage_edits
+    return stage_edits(get_mgmt_service_client(NetworkManagementClient))
 
 def resource_client_factory(**_):
     from azure.mgmt.resource import ResourceManagementClient
@@ -0,0 +1,289 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""Staged edits of the child resources of application gateways and load balancers.
+
+Updating a gateway takes minutes, and every command which creates, updates or deletes one of its
+child resources (e.g. 'network application-gateway rule create') updates the whole gateway.
+'edit-begin' opens an edit of the resource: until 'edit-commit' or 'edit-abort', those commands
+queue their change in a file of the configuration directory instead. They still get the
+resource, with the queued changes applied, so they can refer to the children created before.
+'edit-commit' gets the resource once, applies the queued changes and the children given in a
+spec file, and updates the resource with a single request. The etag of the resource is sent as
+If-Match, so the update fails rather than overwriting changes made meanwhile.
+"""
+
+import copy
+import errno
+import json
+import os
+
+from msrestazure.azure_operation import AzureOperationPoller, OperationFinished
+
+import azure.cli.core.azlogging as azlogging
+from azure.cli.core._config import GLOBAL_CONFIG_DIR
+from azure.cli.core._session import file_lock, write_file_atomic
+from azure.cli.core._util import CLIError
+
+logger = azlogging.get_az_logger(__name__)
+
+EDITS_DIR = os.path.join(GLOBAL_CONFIG_DIR, 'network_edits')
+
+# the model type and the child collections of the resources which can be edited
+EDITABLE_RESOURCES = {
+    'application_gateways': ('ApplicationGateway', [
+        'authentication_certificates', 'ssl_certificates', 'frontend_ip_configurations',
+        'frontend_ports', 'backend_address_pools', 'backend_http_settings_collection',
+        'http_listeners', 'request_routing_rules', 'probes', 'url_path_maps']),
+    'load_balancers': ('LoadBalancer', [
+        'frontend_ip_configurations', 'inbound_nat_rules', 'inbound_nat_pools',
+        'backend_address_pools', 'load_balancing_rules', 'probes'])
+}
+
+CREATE, UPDATE, DELETE = 'create', 'update', 'delete'
+
+_staged_types = {}
+
+
+def _finish_operation():
+    raise OperationFinished()
+
+
+class _StagedOperation(object):  # pylint: disable=too-few-public-methods
+    """ Stands in for the operation of a poller which completed without sending a request """
+
+    def __init__(self, resource):
+        self.status = 'Succeeded'
+        self.resource = resource
+
+
+class _StagedPoller(AzureOperationPoller):
+    """ The outcome of a queued update: done, with the resource as it will be """
+
+    def __init__(self, resource):
+        # the thread of the poller ends right away, without a request
+        super(_StagedPoller, self).__init__(_finish_operation, None, None)
+        self._operation = _StagedOperation(resource)
+
+
+class _StagedOperations(object):
+    """ Mixed into the operations of the network client on application gateways or load
+    balancers: get and create_or_update go through the edit of the resource, if there is one. """
+
+    def _get_edit_path(self, resource_group_name, resource_name):
+        return os.path.join(EDITS_DIR, self.config.subscription_id, self._resource_type,
+                            resource_group_name.lower(), '{}.json'.format(resource_name.lower()))
+
+    def _lock_edit(self, resource_group_name, resource_name):
+        """ The lock that commands hold while they change the edit of the resource """
+        path = self._get_edit_path(resource_group_name, resource_name)
+        if not os.path.isdir(os.path.dirname(path)):
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError as ex:
+                if ex.errno != errno.EEXIST:
+                    raise
+        return file_lock(path)
+
+    def _load_edit(self, resource_group_name, resource_name):
+        try:
+            with open(self._get_edit_path(resource_group_name, resource_name)) as f:
+                return json.load(f)
+        except IOError as ex:
+            if ex.errno != errno.ENOENT:
+                raise
+            return None
+
+    def _save_edit(self, resource_group_name, resource_name, edit):
+        write_file_atomic(self._get_edit_path(resource_group_name, resource_name),
+                          json.dumps(edit, indent=2))
+
+    def _get_collection_info(self, collection):
+        """ The model type of the children of a collection and their segment of the IDs """
+        model_type = self._deserialize.dependencies[EDITABLE_RESOURCES[self._resource_type][0]]
+        attribute = model_type._attribute_map[collection]  # pylint: disable=protected-access
+        return attribute['type'][1:-1], attribute['key'].split('.')[-1]
+
+    def _get_parts(self, resource):
+        """ The resource without its children, and the children by collection and name, as
+        they are sent """
+        model_type, collections = EDITABLE_RESOURCES[self._resource_type]
+        rest = copy.copy(resource)
+        children = {}
+        for collection in collections:
+            child_type, _ = self._get_collection_info(collection)
+            children[collection] = {
+                child.name.lower(): (child.name, self._serialize.body(child, child_type))
+                for child in getattr(resource, collection, None) or []}
+            setattr(rest, collection, None)
+        return self._serialize.body(rest, model_type), children
+
+    def _apply(self, resource, operation):
+        collection = operation['collection']
+        child_type, segment = self._get_collection_info(collection)
+        name = operation['name']
+        children = getattr(resource, collection, None) or []
+        match = next((c for c in children if c.name.lower() == name.lower()), None)
+        if operation['type'] == UPDATE and match is None:
+            raise CLIError("'{}' was deleted since the update of it was queued.".format(name))
+        children = [c for c in children if c is not match]
+        if operation['type'] != DELETE:
+            child = self._deserialize(child_type, operation['value'])
+            if not child.id and resource.id:
+                # children created by the same update refer to each other by ID
+                child.id = '{}/{}/{}'.format(resource.id, segment, name)
+            children.append(child)
+        setattr(resource, collection, children)
+
+    def _get_spec_operations(self, spec):
+        """ Upserts of the children given by collection, in the REST format of the API """
+        _, collections = EDITABLE_RESOURCES[self._resource_type]
+        keys = {self._get_collection_info(c)[1]: c for c in collections}
+        if not isinstance(spec, dict):
+            raise CLIError('The spec must map child collections to lists of children.')
+        operations = []
+        for key, children in spec.items():
+            if key not in keys:
+                raise CLIError("Unknown child collection '{}'. Available: {}".format(
+                    key, ', '.join(sorted(keys))))
+            for child in children or []:
+                if not isinstance(child, dict) or not child.get('name'):
+                    raise CLIError("Each child in '{}' must have a name.".format(key))
+                operations.append({'type': CREATE, 'collection': keys[key],
+                                   'name': child['name'], 'value': child})
+        return operations
+
+    def get(self, resource_group_name, resource_name, *args, **kwargs):
+        resource = super(_StagedOperations, self).get(
+            resource_group_name, resource_name, *args, **kwargs)
+        edit = self._load_edit(resource_group_name, resource_name)
+        if edit is None or kwargs.get('raw'):
+            return resource
+        for operation in edit['operations']:
+            self._apply(resource, operation)
+        self._fetched[(resource_group_name.lower(), resource_name.lower())] = \
+            self._get_parts(resource)
+        return resource
+
+    def create_or_update(self, resource_group_name, resource_name, parameters, *args, **kwargs):
+        if self._load_edit(resource_group_name, resource_name) is None:
+            return super(_StagedOperations, self).create_or_update(
+                resource_group_name, resource_name, parameters, *args, **kwargs)
+        fetched = self._fetched.get((resource_group_name.lower(), resource_name.lower()))
+        rest, children = self._get_parts(parameters)
+        if fetched is None or fetched[0] != rest:
+            raise CLIError("Only changes of child resources can be queued while '{}' is "
+                           "edited. Run 'edit-commit' or 'edit-abort' first.".format(resource_name))
+        operations = []
+        for collection, staged in children.items():
+            before = fetched[1][collection]
+            for key, (name, value) in staged.items():
+                if key not in before:
+                    operations.append({'type': CREATE, 'collection': collection, 'name': name,
+                                       'value': value})
+                elif before[key][1] != value:
+                    operations.append({'type': UPDATE, 'collection': collection, 'name': name,
+                                       'value': value})
+            operations.extend({'type': DELETE, 'collection': collection, 'name': name}
+                              for key, (name, _) in before.items() if key not in staged)
+        # other commands may queue their changes at the same time
+        with self._lock_edit(resource_group_name, resource_name):
+            edit = self._load_edit(resource_group_name, resource_name)
+            if edit is None:
+                raise CLIError("The edit of '{}' was committed or aborted meanwhile.".format(
+                    resource_name))
+            edit['operations'].extend(operations)
+            self._save_edit(resource_group_name, resource_name, edit)
+        logger.warning("Queued %d change(s) to '%s', %d in total. Run 'edit-commit' to apply "
+                       "them.", len(operations), resource_name, len(edit['operations']))
+        self._fetched[(resource_group_name.lower(), resource_name.lower())] = (rest, children)
+        return _StagedPoller(parameters)
+
+    def begin_edit(self, resource_group_name, resource_name):
+        # fails if the resource doesn't exist
+        super(_StagedOperations, self).get(resource_group_name, resource_name)
+        with self._lock_edit(resource_group_name, resource_name):
+            if self._load_edit(resource_group_name, resource_name) is not None:
+                raise CLIError("'{}' is already being edited. Run 'edit-commit' or 'edit-abort' "
+                               "first.".format(resource_name))
+            self._save_edit(resource_group_name, resource_name, {'operations': []})
+
+    def show_edit(self, resource_group_name, resource_name):
+        edit = self._load_edit(resource_group_name, resource_name)
+        if edit is None:
+            raise CLIError("'{}' is not being edited.".format(resource_name))
+        return [{'type': o['type'], 'collection': o['collection'], 'name': o['name']}
+                for o in edit['operations']]
+
+    def abort_edit(self, resource_group_name, resource_name):
+        with self._lock_edit(resource_group_name, resource_name):
+            if self._load_edit(resource_group_name, resource_name) is None:
+                raise CLIError("'{}' is not being edited.".format(resource_name))
+            os.remove(self._get_edit_path(resource_group_name, resource_name))
+
+    def commit_edit(self, resource_group_name, resource_name, spec=None, no_wait=False):
+        from msrestazure.azure_exceptions import CloudError
+        edit = self._load_edit(resource_group_name, resource_name)
+        if edit is None and spec is None:
+            raise CLIError("'{}' is not being edited. Run 'edit-begin' first or give the "
+                           "children to apply with --spec.".format(resource_name))
+        operations = (edit['operations'] if edit else []) + \
+            (self._get_spec_operations(spec) if spec is not None else [])
+        resource = super(_StagedOperations, self).get(resource_group_name, resource_name)
+        for operation in operations:
+            self._apply(resource, operation)
+        custom_headers = {'If-Match': resource.etag} if resource.etag else None
+        try:
+            result = super(_StagedOperations, self).create_or_update(
+                resource_group_name, resource_name, resource, custom_headers=custom_headers,
+                raw=no_wait)
+            result = None if no_wait else result.result()
+        except CloudError as ex:
+            if getattr(ex, 'status_code', None) == 412:
+                raise CLIError("'{}' was changed since it was read. Run 'edit-commit' again to "
+                               "apply the changes to the current version.".format(resource_name))
+            raise
+        if edit is not None:
+            self._end_edit(resource_group_name, resource_name, edit)
+        return result
+
+    def _end_edit(self, resource_group_name, resource_name, committed):
+        """ Removes the committed operations from the edit. Changes queued while the commit was
+        running stay queued. """
+        committed = committed['operations']
+        with self._lock_edit(resource_group_name, resource_name):
+            edit = self._load_edit(resource_group_name, resource_name)
+            if edit is None or edit['operations'][:len(committed)] != committed:
+                return
+            edit['operations'] = edit['operations'][len(committed):]
+            if edit['operations']:
+                self._save_edit(resource_group_name, resource_name, edit)
+                logger.warning("%d change(s) to '%s' were queued while the edit was committed. "
+                               "Run 'edit-commit' to apply them.", len(edit['operations']),
+                               resource_name)
+            else:
+                os.remove(self._get_edit_path(resource_group_name, resource_name))
+
+
+def _get_staged_operations(operations, resource_type):
+    operations_type = type(operations)
+    if operations_type not in _staged_types:
+        _staged_types[operations_type] = type(
+            'Staged' + operations_type.__name__, (_StagedOperations, operations_type), {})
+    staged = object.__new__(_staged_types[operations_type])
+    staged.__dict__.update(operations.__dict__)
+    staged._resource_type = resource_type  # pylint: disable=protected-access
+    staged._fetched = {}  # pylint: disable=protected-access
+    return staged
+
+
+def stage_edits(client):
+    """ Makes the updates of the child resources of the network client go through the edits
+    of their resource """
+    for resource_type in EDITABLE_RESOURCES:
+        operations = getattr(client, resource_type, None)
+        if operations is not None and not isinstance(operations, _StagedOperations):
+            setattr(client, resource_type, _get_staged_operations(operations, resource_type))
+    return client
@@ -68,6 +68,33 @@ helps['network application-gateway wait'] = """
     type: command
     short-summary: Place the CLI in a waiting state until a condition of the Application Gateway is met.
 """
+
+helps['network application-gateway edit-begin'] = """
+    type: command
+    short-summary: Start queueing the changes of the child resources of an application gateway.
+    long-summary: >
+        Until the edit is committed or aborted, the commands which create, update or delete the
+        child resources of the gateway queue their change instead of updating the gateway.
+"""
+
+helps['network application-gateway edit-show'] = """
+    type: command
+    short-summary: List the changes queued to an application gateway.
+"""
+
+helps['network application-gateway edit-commit'] = """
+    type: command
+    short-summary: Apply the queued changes to an application gateway with a single update.
+    long-summary: >
+        The update fails if the gateway was changed since it was read, so no change is
+        lost. Children given with --spec are applied after the queued changes, and can be given
+        without starting an edit.
+"""
+
+helps['network application-gateway edit-abort'] = """
+    type: command
+    short-summary: Discard the changes queued to an application gateway.
+"""
 #endregion
 
 # region Application Gateway Address Pool
@@ -809,6 +836,33 @@ helps['network lb update'] = """
     type: command
     short-summary: Update a load balancer.
 """
+
+helps['network lb edit-begin'] = """
+    type: command
+    short-summary: Start queueing the changes of the child resources of a load balancer.
+    long-summary: >
+        Until the edit is committed or aborted, the commands which create, update or delete the
+        child resources of the load balancer queue their change instead of updating the load balancer.
+"""
+
+helps['network lb edit-show'] = """
+    type: command
+    short-summary: List the changes queued to a load balancer.
+"""
+
+helps['network lb edit-commit'] = """
+    type: command
+    short-summary: Apply the queued changes to a load balancer with a single update.
+    long-summary: >
+        The update fails if the load balancer was changed since it was read, so no change is
+        lost. Children given with --spec are applied after the queued changes, and can be given
+        without starting an edit.
+"""
+
+helps['network lb edit-abort'] = """
+    type: command
+    short-summary: Discard the changes queued to a load balancer.
+"""
 #endregion
 
 # region Load Balancer address pool
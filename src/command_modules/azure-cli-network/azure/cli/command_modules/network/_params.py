@@ -241,6 +241,9 @@ register_cli_argument('network application-gateway waf-config', 'firewall_mode',
 for item in ['ssl-policy', 'waf-config']:
     register_cli_argument('network application-gateway {}'.format(item), 'application_gateway_name', options_list=('--gateway-name',), help='The name of the application gateway.')
 
+edit_spec_help = 'Path to a JSON or YAML file which maps child collections, e.g. {}, to lists of children in the format of the REST API. The children are created or replaced by name.'
+register_cli_argument('network application-gateway edit-commit', 'spec', help=edit_spec_help.format('backendAddressPools'), completer=FilesCompleter())
+
 # ExpressRoutes
 register_cli_argument('network express-route', 'circuit_name', circuit_name_type, options_list=('--name', '-n'))
 register_cli_argument('network express-route', 'sku_family', help='Chosen SKU family of ExpressRoute circuit.', **enum_choice_list(ExpressRouteCircuitSkuFamily))
@@ -434,6 +437,7 @@ register_cli_argument('network lb', 'frontend_ip_name', help='The name of the fr
 register_cli_argument('network lb', 'floating_ip', help='Enable floating IP.', **enum_choice_list(['true', 'false']))
 register_cli_argument('network lb', 'idle_timeout', help='Idle timeout in minutes.')
 register_cli_argument('network lb', 'protocol', help='', **enum_choice_list(TransportProtocol))
+register_cli_argument('network lb edit-commit', 'spec', help=edit_spec_help.format('loadBalancingRules'), completer=FilesCompleter())
 
 register_cli_argument('network lb create', 'public_ip_dns_name', validator=process_lb_create_namespace)
 register_cli_argument('network lb create', 'public_ip_address_allocation', default='dynamic', **enum_choice_list(IPAllocationMethod))
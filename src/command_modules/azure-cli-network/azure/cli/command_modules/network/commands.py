@@ -31,7 +31,8 @@ cli_generic_update_command(__name__, 'network application-gateway update',
                            cf_application_gateways, no_wait_param='raw',
                            custom_function_op=custom_path.format('update_application_gateway'))
 cli_generic_wait_command(__name__, 'network application-gateway wait',
-                         'azure.mgmt.network.operations.application_gateways_operations#ApplicationGatewaysOperations.get', cf_application_gateways)
+                         'azure.mgmt.network.operations.application_gateways_operations#ApplicationGatewaysOperations.get', cf_application_gateways,
+                         lister_op='azure.mgmt.network.operations.application_gateways_operations#ApplicationGatewaysOperations.list')
 
 cli_command(__name__, 'network application-gateway create',
             'azure.cli.command_modules.network.mgmt_app_gateway.lib.operations.app_gateway_operations#AppGatewayOperations.create_or_update',
@@ -63,8 +64,8 @@ for subresource, alias in property_map.items():
     cli_command(__name__, 'network application-gateway {} delete'.format(alias), 'azure.cli.command_modules.network._util#{}'.format(delete_network_resource_property_entry('application_gateways', subresource)), no_wait_param='no_wait')
     cli_command(__name__, 'network application-gateway {} create'.format(alias), custom_path.format('create_ag_{}'.format(_make_singular(subresource))), no_wait_param='no_wait')
     cli_generic_update_command(__name__, 'network application-gateway {} update'.format(alias),
-                               'azure.mgmt.network.operations.application_gateways_operations#ApplicationGatewaysOperations.get',
-                               'azure.mgmt.network.operations.application_gateways_operations#ApplicationGatewaysOperations.create_or_update',
+                               custom_path.format('get_application_gateway'),
+                               custom_path.format('set_application_gateway'),
                                cf_application_gateways, no_wait_param='raw',
                                custom_function_op=custom_path.format('update_ag_{}'.format(_make_singular(subresource))),
                                child_collection_prop_name=subresource)
@@ -78,6 +79,11 @@ cli_command(__name__, 'network application-gateway url-path-map rule delete', cu
 cli_command(__name__, 'network application-gateway waf-config set', custom_path.format('set_ag_waf_config'), no_wait_param='no_wait')
 cli_command(__name__, 'network application-gateway waf-config show', custom_path.format('show_ag_waf_config'))
 
+cli_command(__name__, 'network application-gateway edit-begin', custom_path.format('begin_ag_edit'))
+cli_command(__name__, 'network application-gateway edit-show', custom_path.format('show_ag_edit'))
+cli_command(__name__, 'network application-gateway edit-commit', custom_path.format('commit_ag_edit'), no_wait_param='no_wait')
+cli_command(__name__, 'network application-gateway edit-abort', custom_path.format('abort_ag_edit'))
+
 # ExpressRouteCircuitAuthorizationsOperations
 cli_command(__name__, 'network express-route auth delete', 'azure.mgmt.network.operations.express_route_circuit_authorizations_operations#ExpressRouteCircuitAuthorizationsOperations.delete', cf_express_route_circuit_authorizations)
 cli_command(__name__, 'network express-route auth show', 'azure.mgmt.network.operations.express_route_circuit_authorizations_operations#ExpressRouteCircuitAuthorizationsOperations.get', cf_express_route_circuit_authorizations)
@@ -146,33 +152,38 @@ cli_command(__name__, 'network lb address-pool create', custom_path.format('crea
 cli_command(__name__, 'network lb rule create', custom_path.format('create_lb_rule'))
 cli_command(__name__, 'network lb probe create', custom_path.format('create_lb_probe'))
 
+cli_command(__name__, 'network lb edit-begin', custom_path.format('begin_lb_edit'))
+cli_command(__name__, 'network lb edit-show', custom_path.format('show_lb_edit'))
+cli_command(__name__, 'network lb edit-commit', custom_path.format('commit_lb_edit'), no_wait_param='no_wait')
+cli_command(__name__, 'network lb edit-abort', custom_path.format('abort_lb_edit'))
+
 cli_generic_update_command(__name__, 'network lb frontend-ip update',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.get',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.create_or_update',
+                           custom_path.format('get_load_balancer'),
+                           custom_path.format('set_load_balancer'),
                            cf_load_balancers,
                            child_collection_prop_name='frontend_ip_configurations',
                            custom_function_op=custom_path.format('set_lb_frontend_ip_configuration'))
 cli_generic_update_command(__name__, 'network lb inbound-nat-rule update',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.get',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.create_or_update',
+                           custom_path.format('get_load_balancer'),
+                           custom_path.format('set_load_balancer'),
                            cf_load_balancers,
                            child_collection_prop_name='inbound_nat_rules',
                            custom_function_op=custom_path.format('set_lb_inbound_nat_rule'))
 cli_generic_update_command(__name__, 'network lb inbound-nat-pool update',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.get',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.create_or_update',
+                           custom_path.format('get_load_balancer'),
+                           custom_path.format('set_load_balancer'),
                            cf_load_balancers,
                            child_collection_prop_name='inbound_nat_pools',
                            custom_function_op=custom_path.format('set_lb_inbound_nat_pool'))
 cli_generic_update_command(__name__, 'network lb rule update',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.get',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.create_or_update',
+                           custom_path.format('get_load_balancer'),
+                           custom_path.format('set_load_balancer'),
                            cf_load_balancers,
                            child_collection_prop_name='load_balancing_rules',
                            custom_function_op=custom_path.format('set_lb_rule'))
 cli_generic_update_command(__name__, 'network lb probe update',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.get',
-                           'azure.mgmt.network.operations.load_balancers_operations#LoadBalancersOperations.create_or_update',
+                           custom_path.format('get_load_balancer'),
+                           custom_path.format('set_load_balancer'),
                            cf_load_balancers,
                            child_collection_prop_name='probes',
                            custom_function_op=custom_path.format('set_lb_probe'))
@@ -345,7 +356,8 @@ cli_command(__name__, 'network vnet-gateway revoked-cert delete', custom_path.fo
 
 cli_command(__name__, 'network vnet-gateway create', 'azure.cli.command_modules.network.mgmt_vnet_gateway.lib.operations.vnet_gateway_operations#VnetGatewayOperations.create_or_update', cf_vnet_gateway_create, transform=DeploymentOutputLongRunningOperation('Starting network vnet-gateway create'),
             no_wait_param='raw')
-cli_generic_wait_command(__name__, 'network vnet-gateway wait', 'azure.mgmt.network.operations.virtual_network_gateways_operations#VirtualNetworkGatewaysOperations.get', cf_virtual_network_gateways)
+cli_generic_wait_command(__name__, 'network vnet-gateway wait', 'azure.mgmt.network.operations.virtual_network_gateways_operations#VirtualNetworkGatewaysOperations.get', cf_virtual_network_gateways,
+                         lister_op='azure.mgmt.network.operations.virtual_network_gateways_operations#VirtualNetworkGatewaysOperations.list')
 
 # VirtualNetworksOperations
 cli_command(__name__, 'network vnet delete', 'azure.mgmt.network.operations.virtual_networks_operations#VirtualNetworksOperations.delete', cf_virtual_networks)
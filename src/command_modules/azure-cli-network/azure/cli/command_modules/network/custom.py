@@ -4,6 +4,7 @@
 # --------------------------------------------------------------------------------------------
 from collections import Counter
 from itertools import groupby
+import os
 from msrestazure.azure_exceptions import CloudError
 
 # pylint: disable=no-self-use,too-many-arguments,no-member,too-many-lines
@@ -44,6 +45,16 @@ def _upsert(collection, obj, key_name, key_value):
         collection.remove(match)
     collection.append(obj)
 
+def _load_edit_spec(spec):
+    import yaml
+    if spec is None:
+        return None
+    try:
+        with open(os.path.expanduser(spec)) as f:
+            return yaml.safe_load(f)
+    except (IOError, yaml.YAMLError) as ex:
+        raise CLIError("Failed to load the spec '{}': {}".format(spec, ex))
+
 #region Generic list commands
 def _generic_list(operation_name, resource_group_name):
     ncf = _network_client_factory()
@@ -400,6 +411,30 @@ def show_ag_waf_config(resource_group_name, application_gateway_name):
     return _network_client_factory().application_gateways.get(
         resource_group_name, application_gateway_name).web_application_firewall_configuration
 
+def get_application_gateway(client, resource_group_name, application_gateway_name):
+    return client.get(resource_group_name, application_gateway_name)
+
+def set_application_gateway(client, resource_group_name, application_gateway_name, parameters,
+                            custom_headers=None, raw=False):
+    return client.create_or_update(resource_group_name, application_gateway_name, parameters,
+                                   custom_headers=custom_headers, raw=raw)
+
+def begin_ag_edit(resource_group_name, application_gateway_name):
+    _network_client_factory().application_gateways.begin_edit(
+        resource_group_name, application_gateway_name)
+
+def show_ag_edit(resource_group_name, application_gateway_name):
+    return _network_client_factory().application_gateways.show_edit(
+        resource_group_name, application_gateway_name)
+
+def commit_ag_edit(resource_group_name, application_gateway_name, spec=None, no_wait=False):
+    return _network_client_factory().application_gateways.commit_edit(
+        resource_group_name, application_gateway_name, _load_edit_spec(spec), no_wait)
+
+def abort_ag_edit(resource_group_name, application_gateway_name):
+    _network_client_factory().application_gateways.abort_edit(
+        resource_group_name, application_gateway_name)
+
 #endregion
 
 #region Load Balancer subresource commands
@@ -592,6 +627,28 @@ def set_lb_rule(
         instance.probe = _get_property(parent.probes, probe_name)
 
     return parent
+
+def get_load_balancer(client, resource_group_name, load_balancer_name):
+    return client.get(resource_group_name, load_balancer_name)
+
+def set_load_balancer(client, resource_group_name, load_balancer_name, parameters,
+                      custom_headers=None):
+    return client.create_or_update(resource_group_name, load_balancer_name, parameters,
+                                   custom_headers=custom_headers)
+
+def begin_lb_edit(resource_group_name, load_balancer_name):
+    _network_client_factory().load_balancers.begin_edit(resource_group_name, load_balancer_name)
+
+def show_lb_edit(resource_group_name, load_balancer_name):
+    return _network_client_factory().load_balancers.show_edit(
+        resource_group_name, load_balancer_name)
+
+def commit_lb_edit(resource_group_name, load_balancer_name, spec=None, no_wait=False):
+    return _network_client_factory().load_balancers.commit_edit(
+        resource_group_name, load_balancer_name, _load_edit_spec(spec), no_wait)
+
+def abort_lb_edit(resource_group_name, load_balancer_name):
+    _network_client_factory().load_balancers.abort_edit(resource_group_name, load_balancer_name)
 #endregion
 
 #region NIC commands
@@ -0,0 +1,239 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+# pylint: disable=too-few-public-methods,protected-access,unused-argument
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+from msrest.serialization import Model, Serializer, Deserializer
+from msrestazure.azure_exceptions import CloudError
+from msrestazure.azure_operation import AzureOperationPoller
+
+import azure.cli.command_modules.network._edit as edit
+from azure.cli.core._util import CLIError
+from azure.cli.core.commands._polling import PollingPolicy, apply_polling_policy
+
+
+class Child(Model):
+    _attribute_map = {
+        'id': {'key': 'id', 'type': 'str'},
+        'name': {'key': 'name', 'type': 'str'},
+        'port': {'key': 'properties.port', 'type': 'int'},
+        'probe_id': {'key': 'properties.probe.id', 'type': 'str'},
+    }
+
+    def __init__(self, id=None, name=None, port=None,  # pylint: disable=redefined-builtin
+                 probe_id=None):
+        self.id = id
+        self.name = name
+        self.port = port
+        self.probe_id = probe_id
+
+
+class LoadBalancer(Model):
+    _attribute_map = dict(
+        [('id', {'key': 'id', 'type': 'str'}),
+         ('etag', {'key': 'etag', 'type': 'str'}),
+         ('location', {'key': 'location', 'type': 'str'})] +
+        [(c, {'key': 'properties.{}'.format(k), 'type': '[Child]'}) for c, k in [
+            ('frontend_ip_configurations', 'frontendIPConfigurations'),
+            ('inbound_nat_rules', 'inboundNatRules'),
+            ('inbound_nat_pools', 'inboundNatPools'),
+            ('backend_address_pools', 'backendAddressPools'),
+            ('load_balancing_rules', 'loadBalancingRules'),
+            ('probes', 'probes')]])
+
+    def __init__(self, **kwargs):
+        for attr in self._attribute_map:
+            setattr(self, attr, kwargs.get(attr))
+
+
+class _Poller(object):
+
+    def __init__(self, result):
+        self._result = result
+
+    def result(self):
+        return self._result
+
+
+class _Service(object):
+    """ Keeps one load balancer """
+
+    def __init__(self):
+        self.body = {'id': '/lb1', 'etag': '1', 'location': 'westus', 'properties': {
+            'probes': [{'id': '/lb1/probes/old', 'name': 'old', 'properties': {'port': 1}},
+                       {'id': '/lb1/probes/keep', 'name': 'keep', 'properties': {'port': 2}}]}}
+        self.requests = []
+        self.read_etag = None
+        self.on_update = None
+
+
+class LoadBalancersOperations(object):
+
+    def __init__(self, service):
+        classes = {'LoadBalancer': LoadBalancer, 'Child': Child}
+        self.config = mock.MagicMock(subscription_id='sub')
+        self._serialize = Serializer(classes)
+        self._deserialize = Deserializer(classes)
+        self._service = service
+
+    def get(self, resource_group_name, load_balancer_name,
+            expand=None, custom_headers=None, raw=False):
+        self._service.requests.append(('GET', None))
+        lb = self._deserialize('LoadBalancer', self._service.body)
+        lb.etag = self._service.read_etag or lb.etag
+        return lb
+
+    def create_or_update(self, resource_group_name, load_balancer_name,
+                         parameters, custom_headers=None, raw=False):
+        self._service.requests.append(('PUT', custom_headers))
+        if custom_headers and custom_headers.get('If-Match') != self._service.body['etag']:
+            raise CloudError(mock.MagicMock(status_code=412, text='',
+                                            reason='Precondition Failed'))
+        if self._service.on_update:
+            self._service.on_update()
+        body = self._serialize.body(parameters, 'LoadBalancer')
+        body['etag'] = str(int(self._service.body['etag']) + 1)
+        self._service.body = body
+        return _Poller(self._deserialize('LoadBalancer', body))
+
+
+class _Client(object):
+
+    def __init__(self, operations):
+        self.load_balancers = operations
+
+
+class TestNetworkEdit(unittest.TestCase):
+
+    def setUp(self):
+        self.edits_dir = tempfile.mkdtemp()
+        self.patcher = mock.patch.object(edit, 'EDITS_DIR', self.edits_dir)
+        self.patcher.start()
+        self.service = _Service()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.edits_dir)
+
+    def _client(self):
+        # each command gets a new client
+        return edit.stage_edits(_Client(LoadBalancersOperations(self.service))).load_balancers
+
+    def _probes(self):
+        return {p['name']: p['properties']['port']
+                for p in self.service.body['properties']['probes']}
+
+    def test_network_edit_queue_and_commit(self):
+        self._client().begin_edit('rg', 'lb1')
+
+        # create a probe, then a rule referring to it
+        client = self._client()
+        lb = client.get('rg', 'lb1')
+        lb.probes.append(Child(name='new', port=3))
+        poller = client.create_or_update('rg', 'lb1', lb)
+        self.assertIsInstance(poller, AzureOperationPoller)
+        apply_polling_policy(poller, PollingPolicy())
+        poller.wait()
+        self.assertIs(poller.result(), lb)
+        with self.assertRaises(ValueError):
+            poller.add_done_callback(lambda _: None)
+        client = self._client()
+        lb = client.get('rg', 'lb1')
+        probe = next(p for p in lb.probes if p.name == 'new')
+        self.assertEqual(probe.id, '/lb1/probes/new')
+        lb.load_balancing_rules = [Child(name='rule', port=80, probe_id=probe.id)]
+        client.create_or_update('rg', 'lb1', lb)
+
+        # update one probe, delete another
+        client = self._client()
+        lb = client.get('rg', 'lb1')
+        lb.probes = [p for p in lb.probes if p.name != 'old']
+        lb.probes[0].port = 20
+        client.create_or_update('rg', 'lb1', lb)
+
+        with self.assertRaises(CLIError):
+            client = self._client()
+            lb = client.get('rg', 'lb1')
+            lb.location = 'eastus'
+            client.create_or_update('rg', 'lb1', lb)
+
+        self.assertEqual(self._client().show_edit('rg', 'lb1'), [
+            {'type': 'create', 'collection': 'probes', 'name': 'new'},
+            {'type': 'create', 'collection': 'load_balancing_rules', 'name': 'rule'},
+            {'type': 'update', 'collection': 'probes', 'name': 'keep'},
+            {'type': 'delete', 'collection': 'probes', 'name': 'old'}])
+        self.assertNotIn('PUT', [r[0] for r in self.service.requests])
+
+        self.service.requests = []
+        result = self._client().commit_edit('rg', 'lb1')
+        self.assertEqual(self.service.requests, [('GET', None), ('PUT', {'If-Match': '1'})])
+        self.assertEqual(self._probes(), {'keep': 20, 'new': 3})
+        self.assertEqual(result.load_balancing_rules[0].probe_id, '/lb1/probes/new')
+        self.assertEqual([f for f in os.listdir(os.path.join(self.edits_dir, 'sub',
+                                                             'load_balancers', 'rg'))
+                          if f.endswith('.json')], [])
+
+        # without an edit the updates are sent right away
+        client = self._client()
+        lb = client.get('rg', 'lb1')
+        lb.probes = []
+        client.create_or_update('rg', 'lb1', lb)
+        self.assertEqual(self._probes(), {})
+
+    def test_network_edit_commit_spec(self):
+        client = self._client()
+        client.begin_edit('rg', 'lb1')
+        with self.assertRaises(CLIError):
+            client.begin_edit('rg', 'LB1')
+        with self.assertRaises(CLIError):
+            client.commit_edit('rg', 'lb1', {'unknown': []})
+
+        # the load balancer is changed after it was read
+        self.service.read_etag = '0'
+        spec = {'probes': [{'name': 'spec', 'properties': {'port': 9}}]}
+        with self.assertRaises(CLIError):
+            client.commit_edit('rg', 'lb1', spec)
+        self.assertEqual(client.show_edit('rg', 'lb1'), [])
+        self.service.read_etag = None
+
+        client.commit_edit('rg', 'lb1', spec)
+        self.assertEqual(self._probes(), {'old': 1, 'keep': 2, 'spec': 9})
+        with self.assertRaises(CLIError):
+            client.abort_edit('rg', 'lb1')
+
+    def test_network_edit_keeps_changes_queued_during_commit(self):
+        self._client().begin_edit('rg', 'lb1')
+        client = self._client()
+        lb = client.get('rg', 'lb1')
+        lb.probes.append(Child(name='first', port=3))
+        client.create_or_update('rg', 'lb1', lb)
+
+        def _queue_change():
+            self.service.on_update = None
+            client = self._client()
+            lb = client.get('rg', 'lb1')
+            lb.probes.append(Child(name='second', port=4))
+            client.create_or_update('rg', 'lb1', lb)
+
+        self.service.on_update = _queue_change
+        self._client().commit_edit('rg', 'lb1')
+        self.assertEqual(self._probes(), {'old': 1, 'keep': 2, 'first': 3})
+        self.assertEqual(self._client().show_edit('rg', 'lb1'),
+                         [{'type': 'create', 'collection': 'probes', 'name': 'second'}])
+
+        self._client().commit_edit('rg', 'lb1')
+        self.assertEqual(self._probes(), {'old': 1, 'keep': 2, 'first': 3, 'second': 4})
+        with self.assertRaises(CLIError):
+            self._client().show_edit('rg', 'lb1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,9 @@ helps['login'] = """
                 - name: Log in with user name and password. This doesn't work with Microsoft accounts or accounts that have two-factor authentication enabled.
                   text: >
                     az login -u johndoe@contoso.com -p VerySecret
+                - name: Log in interactively and only search two of the account's tenants for subscriptions.
+                  text: >
+                    az login --tenant-filter 00000000-0000-0000-0000-000000000001 00000000-0000-0000-0000-000000000002
                 - name: Log in with a service principal.
                   text: >
                     az login --service-principal -u http://azure-cli-2016-08-05-14-31-15 -p VerySecret --tenant contoso.onmicrosoft.com
@@ -21,6 +21,7 @@ register_cli_argument('login', 'password', options_list=('--password', '-p'), he
 register_cli_argument('login', 'service_principal', action='store_true', help='The credential representing a service principal.')
 register_cli_argument('login', 'username', options_list=('--username', '-u'), help='Organization id or service principal')
 register_cli_argument('login', 'tenant', options_list=('--tenant', '-t'), help='The tenant associated with the service principal.')
+register_cli_argument('login', 'tenant_filter', nargs='+', help='Space separated IDs of the tenants to search for subscriptions. Other tenants of the account are skipped.')
 
 register_cli_argument('logout', 'username', help='account user, if missing, logout the current active account')
 
@@ -51,7 +51,7 @@ def account_clear():
     profile.logout_all()
 
 
-def login(username=None, password=None, service_principal=None, tenant=None):
+def login(username=None, password=None, service_principal=None, tenant=None, tenant_filter=None):
     """Log in to access Azure subscriptions"""
     interactive = False
 
@@ -71,7 +71,8 @@ def login(username=None, password=None, service_principal=None, tenant=None):
             username,
             password,
             service_principal,
-            tenant)
+            tenant,
+            tenant_filter)
     except AdalError as err:
         # try polish unfriendly server errors
         if username:
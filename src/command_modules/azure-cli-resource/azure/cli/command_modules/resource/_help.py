@@ -208,6 +208,22 @@ helps['provider unregister'] = """
     type: command
     short-summary: Unregister a provider
 """
+helps['provider cache'] = """
+    type: group
+    short-summary: Manage the local cache of provider resource types and api-versions
+"""
+helps['provider cache refresh'] = """
+    type: command
+    short-summary: Reload the cached resource types and api-versions of the providers
+    long-summary: Generic resource commands resolve api-versions from a cache which is kept for
+        a day. Set 'provider_cache_ttl' in the 'core' section of the configuration to change the
+        number of seconds, or to 0 to turn the cache off.
+    examples:
+        - name: Reload the cache for all the providers of the current subscription
+          text: az provider cache refresh
+        - name: Reload the cache for one provider
+          text: az provider cache refresh -n Microsoft.Network
+"""
 helps['tag'] = """
     type: group
     short-summary: Manage resource tags
@@ -56,6 +56,7 @@ cli_command(__name__, 'provider list', 'azure.mgmt.resource.resources.operations
 cli_command(__name__, 'provider show', 'azure.mgmt.resource.resources.operations.providers_operations#ProvidersOperations.get', cf_providers)
 cli_command(__name__, 'provider register', 'azure.cli.command_modules.resource.custom#register_provider')
 cli_command(__name__, 'provider unregister', 'azure.cli.command_modules.resource.custom#unregister_provider')
+cli_command(__name__, 'provider cache refresh', 'azure.cli.command_modules.resource.custom#refresh_provider_cache')
 
 # Resource feature commands
 cli_command(__name__, 'feature list', 'azure.cli.command_modules.resource.custom#list_features', cf_features)
@@ -95,7 +96,8 @@ cli_generic_update_command(__name__, 'resource update',
 cli_generic_update_command(__name__, 'group update',
                            'azure.mgmt.resource.resources.operations.resource_groups_operations#ResourceGroupsOperations.get',
                            'azure.mgmt.resource.resources.operations.resource_groups_operations#ResourceGroupsOperations.create_or_update',
-                           lambda: _resource_client_factory().resource_groups)
+                           lambda: _resource_client_factory().resource_groups,
+                           patcher_op='azure.mgmt.resource.resources.operations.resource_groups_operations#ResourceGroupsOperations.patch')
 
 cli_command(__name__, 'policy assignment create', 'azure.cli.command_modules.resource.custom#create_policy_assignment')
 cli_command(__name__, 'policy assignment delete', 'azure.cli.command_modules.resource.custom#delete_policy_assignment')
@@ -22,6 +22,8 @@ from azure.cli.core._util import CLIError, get_file_json
 import azure.cli.core.azlogging as azlogging
 from azure.cli.core.commands.client_factory import get_mgmt_service_client
 from azure.cli.core.commands.arm import is_valid_resource_id, parse_resource_id
+from azure.cli.core.commands._provider_cache import (get_provider_resource_types,
+                                                     refresh_provider_cache as _refresh_cache)
 
 from ._client_factory import (_resource_client_factory,
                               _resource_policy_client_factory,
@@ -240,6 +242,13 @@ def register_provider(resource_provider_namespace):
 def unregister_provider(resource_provider_namespace):
     _update_provider(resource_provider_namespace, registering=False)
 
+def refresh_provider_cache(resource_provider_namespace=None):
+    ''' Reloads the cached resource types and api-versions of the resource providers of the
+    subscription, or of one provider when a namespace is given. '''
+    rcf = _resource_client_factory()
+    namespaces = _refresh_cache(rcf, resource_provider_namespace)
+    logger.warning('Cached the resource types of %d provider(s).', len(namespaces))
+
 def _update_provider(namespace, registering):
     rcf = _resource_client_factory()
     if registering:
@@ -597,20 +606,20 @@ class _ResourceUtils(object): #pylint: disable=too-many-instance-attributes
 
     @staticmethod
     def _resolve_api_version(rcf, resource_provider_namespace, parent_resource_path, resource_type):
-        provider = rcf.providers.get(resource_provider_namespace)
+        resource_types = get_provider_resource_types(rcf, resource_provider_namespace)
 
         #If available, we will use parent resource's api-version
         resource_type_str = (parent_resource_path.split('/')[0]
                              if parent_resource_path else resource_type)
 
-        rt = [t for t in provider.resource_types
-              if t.resource_type.lower() == resource_type_str.lower()]
+        rt = [t for t in resource_types
+              if t['resourceType'].lower() == resource_type_str.lower()]
         if not rt:
             raise IncorrectUsageError('Resource type {} not found.'
                                       .format(resource_type_str))
-        if len(rt) == 1 and rt[0].api_versions:
-            npv = [v for v in rt[0].api_versions if 'preview' not in v.lower()]
-            return npv[0] if npv else rt[0].api_versions[0]
+        if len(rt) == 1 and rt[0]['apiVersions']:
+            npv = [v for v in rt[0]['apiVersions'] if 'preview' not in v.lower()]
+            return npv[0] if npv else rt[0]['apiVersions'][0]
         else:
             raise IncorrectUsageError(
                 'API version is required and could not be resolved for resource {}'
@@ -34,19 +34,20 @@ def load_json(string_or_file_path):
 def _resolve_api_version(provider_namespace, resource_type, parent_path):
     from azure.mgmt.resource.resources import ResourceManagementClient
     from azure.cli.core.commands.client_factory import get_mgmt_service_client
+    from azure.cli.core.commands._provider_cache import get_provider_resource_types
     client = get_mgmt_service_client(ResourceManagementClient)
-    provider = client.providers.get(provider_namespace)
+    resource_types = get_provider_resource_types(client, provider_namespace)
 
     # If available, we will use parent resource's api-version
     resource_type_str = (parent_path.split('/')[0] if parent_path else resource_type)
 
-    rt = [t for t in provider.resource_types  # pylint: disable=no-member
-          if t.resource_type.lower() == resource_type_str.lower()]
+    rt = [t for t in resource_types
+          if t['resourceType'].lower() == resource_type_str.lower()]
     if not rt:
         raise CLIError('Resource type {} not found.'.format(resource_type_str))
-    if len(rt) == 1 and rt[0].api_versions:
-        npv = [v for v in rt[0].api_versions if 'preview' not in v.lower()]
-        return npv[0] if npv else rt[0].api_versions[0]
+    if len(rt) == 1 and rt[0]['apiVersions']:
+        npv = [v for v in rt[0]['apiVersions'] if 'preview' not in v.lower()]
+        return npv[0] if npv else rt[0]['apiVersions'][0]
     else:
         raise CLIError(
             'API version is required and could not be resolved for resource {}'